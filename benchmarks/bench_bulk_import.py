@@ -0,0 +1,131 @@
+"""
+Importing a ZIP of DOCX resumes as candidates, cold caches each time:
+
+* one by one: what N single uploads cost (`Candidate` save, then the
+  extract stage: extraction, one `get_embedding`, save, index);
+* bulk: screening/bulk_import.py with 1 and --workers extraction
+  processes, in transactions of --batch-size.
+
+    python benchmarks/bench_bulk_import.py [--resumes 500] [--workers 4] [--batch-size 200]
+
+Runs against an in-memory database and temporary media/cache directories,
+and needs sentence-transformers.
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+TMP = tempfile.mkdtemp(prefix="bench_bulk_import_")
+settings.configure(
+    BASE_DIR=TMP,
+    INSTALLED_APPS=["screening"],
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}},
+    MEDIA_ROOT=os.path.join(TMP, "media"),
+    CONTENT_CACHE_DIR=os.path.join(TMP, "content"),
+    VECTOR_INDEX_DIR=os.path.join(TMP, "vectors"),
+    EMBEDDING_LRU_SIZE=100000,
+)
+django.setup()
+
+from django.core.files.base import ContentFile  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from docx import Document  # noqa: E402
+
+from screening import bulk_import, content_cache, embeddings  # noqa: E402
+from screening.models import Candidate, CandidateImport, JobDescription, ScoringJob  # noqa: E402
+from screening.tasks import run_extract  # noqa: E402
+
+SECTIONS = ["Summary", "Experience", "Projects", "Education", "Skills"]
+VOCAB = (
+    "developed designed implemented maintained led managed delivered built migrated optimized "
+    "backend frontend services platform pipeline dashboards python java django postgresql docker "
+    "aws kubernetes latency reliability analytics customers team the a and of to with for"
+).split()
+
+
+def docx_resume(rng, i):
+    doc = Document()
+    doc.add_paragraph(f"Candidate {i}")
+    for heading in SECTIONS:
+        doc.add_paragraph(heading)
+        for _ in range(4):
+            doc.add_paragraph(" ".join(rng.choice(VOCAB) for _ in range(40)))
+    out = io.BytesIO()
+    doc.save(out)
+    return out.getvalue()
+
+
+def build_archive(path, count, seed):
+    rng = random.Random(seed)
+    manifest = ["file,first_name,last_name,email"]
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for i in range(count):
+            archive.writestr(f"resumes/r{i:05d}.docx", docx_resume(rng, i))
+            manifest.append(f"r{i:05d}.docx,First{i},Last{i},user{i}@example.com")
+        archive.writestr("manifest.csv", "\n".join(manifest) + "\n")
+
+
+def cold():
+    embeddings.LRU.clear()
+    content_cache.evict(limit=0)
+
+
+def one_by_one(path, job):
+    rows = bulk_import.read_manifest(zipfile.ZipFile(path).read("manifest.csv"))
+    with zipfile.ZipFile(path) as archive:
+        for info in bulk_import.archive_entries(archive):
+            identity = rows[os.path.basename(info.filename).lower()]
+            candidate = Candidate.objects.create(
+                resume=ContentFile(archive.read(info), name=os.path.basename(info.filename)),
+                applied_to=job, verdict="Pending", **identity,
+            )
+            run_extract(ScoringJob.objects.create(candidate=candidate))
+
+
+def bulk(path, job, workers, batch_size):
+    record = CandidateImport.objects.create(job=job)
+    bulk_import.run_import(record, archive=path, workers=workers, batch_size=batch_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resumes", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    call_command("migrate", verbosity=0)
+    path = os.path.join(TMP, "resumes.zip")
+    build_archive(path, args.resumes, args.seed)
+    embeddings.get_embedding("warm up the model")
+
+    print(f"resumes={args.resumes} archive={os.path.getsize(path) / 1e6:.1f} MB batch={args.batch_size}")
+    rows = [
+        ("one by one", lambda job: one_by_one(path, job)),
+        ("bulk, 1 worker", lambda job: bulk(path, job, 1, args.batch_size)),
+        (f"bulk, {args.workers} workers", lambda job: bulk(path, job, args.workers, args.batch_size)),
+    ]
+    base = None
+    for name, run in rows:
+        job = JobDescription.objects.create(title=name, raw_text="Python engineer")
+        cold()
+        started = time.perf_counter()
+        run(job)
+        seconds = time.perf_counter() - started
+        base = base or seconds
+        assert Candidate.objects.filter(applied_to=job).count() == args.resumes
+        print(f"{name:>18}: {seconds:7.2f}s  {args.resumes / seconds:7.1f} resumes/s  {base / seconds:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
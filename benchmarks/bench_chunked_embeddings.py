@@ -0,0 +1,93 @@
+"""
+Encode cost of chunked embeddings (screening/chunking.py) against one
+truncated embedding per document, on synthetic multi-page resumes:
+
+* whole: one `get_embeddings` call over the full texts (what the model
+  reads is cut at 256 word pieces);
+* chunked, cold: every section window of every resume in one call;
+* chunked, one section edited: the same resumes with one section changed,
+  so only that section's windows miss the cache.
+
+    python benchmarks/bench_chunked_embeddings.py [--resumes 50] [--pages 3]
+
+Runs against an in-memory database and needs sentence-transformers.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+settings.configure(
+    BASE_DIR=os.getcwd(),
+    INSTALLED_APPS=["screening"],
+    DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}},
+    EMBEDDING_LRU_SIZE=100000,
+)
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+
+from screening import chunking, embeddings  # noqa: E402
+
+WORDS_PER_PAGE = 450
+SECTIONS = ["Summary", "Experience", "Projects", "Education", "Skills", "Certifications"]
+VOCAB = (
+    "developed designed implemented maintained led managed delivered built migrated optimized "
+    "backend frontend services platform pipeline dashboards python java django postgresql docker "
+    "aws kubernetes latency reliability analytics customers team the a and of to with for"
+).split()
+
+
+def resume(rng, pages):
+    words_per_section = pages * WORDS_PER_PAGE // len(SECTIONS)
+    return "\n".join(
+        f"{heading}\n" + " ".join(rng.choice(VOCAB) for _ in range(words_per_section)) for heading in SECTIONS
+    )
+
+
+def timed(fn):
+    embeddings.LRU.clear()
+    calls = []
+    encode = embeddings._encode
+    embeddings._encode = lambda texts: (calls.append(len(texts)), encode(texts))[1]
+    started = time.perf_counter()
+    try:
+        fn()
+    finally:
+        embeddings._encode = encode
+    return time.perf_counter() - started, sum(calls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resumes", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    call_command("migrate", verbosity=0)
+    rng = random.Random(args.seed)
+    texts = [resume(rng, args.pages) for _ in range(args.resumes)]
+    edited = [text.replace("Skills\n", "Skills\nterraform ", 1) for text in texts]
+    embeddings.get_embedding("warm up the model")
+
+    settings.EMBEDDING_CHUNKING = "off"
+    whole, whole_encoded = timed(lambda: embeddings.get_embeddings(texts))
+    settings.EMBEDDING_CHUNKING = "mean"
+    cold, cold_encoded = timed(lambda: chunking.chunk_embeddings(texts))
+    warm, warm_encoded = timed(lambda: chunking.chunk_embeddings(edited))
+
+    print(f"resumes={args.resumes} pages={args.pages} windows/resume={len(chunking.chunk_text(texts[0]))}")
+    for name, seconds, encoded in (("whole (truncated)", whole, whole_encoded),
+                                   ("chunked, cold", cold, cold_encoded),
+                                   ("chunked, one edit", warm, warm_encoded)):
+        print(f"{name:>18}: {seconds:7.3f}s  {encoded:5d} texts encoded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Throughput, resident memory and score parity of the sentence-embedding
+backends (screening/embedding_backends.py): sentence-transformers in
+float32 against ONNX Runtime in float32 and int8.
+
+    python manage.py export_embedding_model          # once
+    python benchmarks/bench_embedding_backends.py [--texts 256] [--words 200] [--threads 1]
+
+Each backend runs in a fresh process so its RSS isn't shared with the
+others'. Parity is reported against the torch backend.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from screening import embedding_backends  # noqa: E402
+
+VOCAB = (
+    "developed designed implemented maintained led managed delivered built migrated optimized "
+    "backend frontend services platform pipeline dashboards python java django postgresql docker "
+    "aws kubernetes latency reliability analytics customers team nurse accounting retail sales "
+    "the a and of to with for"
+).split()
+
+VARIANTS = [("torch", False), ("onnx", False), ("onnx", True)]
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(args, name, quantized, texts, results):
+    before = rss_mb()
+    started = time.perf_counter()
+    backend = embedding_backends.load_backend(name, args.model, onnx_dir=args.onnx_dir, quantized=quantized,
+                                              threads=args.threads)
+    load_s = time.perf_counter() - started
+    loaded = rss_mb()
+    backend.encode(texts[:args.batch], batch_size=args.batch)
+    started = time.perf_counter()
+    backend.encode(texts, batch_size=args.batch)
+    seconds = time.perf_counter() - started
+    results.put({"load_s": load_s, "rss_mb": rss_mb(), "model_mb": loaded - before,
+                 "texts_per_s": len(texts) / seconds})
+
+
+def parity(args, texts, results):
+    reference = embedding_backends.load_backend("torch", args.model, threads=args.threads)
+    reports = {}
+    for name, quantized in VARIANTS[1:]:
+        candidate = embedding_backends.load_backend(name, onnx_dir=args.onnx_dir, quantized=quantized,
+                                                    threads=args.threads)
+        reports[(name, quantized)] = embedding_backends.parity_report(reference, candidate, texts)
+    results.put(reports)
+
+
+def run(target, *args):
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=target, args=(*args, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=embedding_backends.DEFAULT_MODEL)
+    parser.add_argument("--onnx-dir", default=None, help="Default: models/onnx/<model>.")
+    parser.add_argument("--texts", type=int, default=256)
+    parser.add_argument("--words", type=int, default=200, help="Words per text (the model reads ~190).")
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+    args.onnx_dir = args.onnx_dir or os.path.join("models", "onnx", os.path.basename(args.model.rstrip("/")))
+
+    rng = random.Random(0)
+    texts = [" ".join(rng.choice(VOCAB) for _ in range(args.words)) for _ in range(args.texts)]
+    print(f"model={args.model} texts={args.texts}x{args.words} words batch={args.batch} threads={args.threads}")
+    base = None
+    for name, quantized in VARIANTS:
+        r = run(measure, args, name, quantized, texts)
+        base = base or r["texts_per_s"]
+        label = f"{name}{' int8' if quantized else ''}"
+        print(f"{label:>10}: {r['texts_per_s']:8.1f} texts/s ({r['texts_per_s'] / base:4.2f}x)  "
+              f"load {r['load_s']:5.2f}s  +{r['model_mb']:6.1f} MB for the model  RSS {r['rss_mb']:6.1f} MB")
+    for (name, quantized), report in run(parity, args, texts[:64]).items():
+        label = f"{name}{' int8' if quantized else ''}"
+        print(f"{label:>10} vs torch: min vector cosine {report['min_vector_cosine']:.5f}, "
+              f"max semantic score drift {report['max_semantic_score_drift']:.3f} points")
+
+
+if __name__ == "__main__":
+    main()
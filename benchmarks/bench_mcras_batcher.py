@@ -0,0 +1,84 @@
+"""
+Throughput and latency of single-sample MCRAS requests from concurrent
+clients, with and without mcras.inference.MicroBatcher.
+
+    python benchmarks/bench_mcras_batcher.py [--clients 1 8 32] [--requests 2000]
+
+"direct" calls InferenceEngine.predict per sample (serialized by its
+lock); "batched" submits through a MicroBatcher.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcras.inference import InferenceEngine, MicroBatcher  # noqa: E402
+from mcras.inference.batcher import _percentile  # noqa: E402
+from mcras.models import MCRAS  # noqa: E402
+
+
+def run_clients(call, samples, clients):
+    per_client = len(samples) // clients
+    latencies = []
+    lock = threading.Lock()
+
+    def client(chunk):
+        local = []
+        for sample in chunk:
+            start = time.perf_counter()
+            call(sample)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(samples[i * per_client:(i + 1) * per_client],))
+               for i in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return len(latencies) / elapsed, _percentile(latencies, 50), _percentile(latencies, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--channels", type=int, default=8)
+    parser.add_argument("--input-size", type=int, default=32)
+    parser.add_argument("--hidden-size", type=int, default=64)
+    parser.add_argument("--seq-len", type=int, default=50)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-delay-ms", type=float, default=5)
+    parser.add_argument("--threads", type=int, default=torch.get_num_threads())
+    args = parser.parse_args()
+    torch.set_num_threads(args.threads)
+    torch.manual_seed(0)
+
+    model = MCRAS(args.input_size, args.hidden_size, args.channels, 10).eval()
+    engine = InferenceEngine(model)
+    samples = list(torch.randn(args.requests, args.channels, args.seq_len, args.input_size))
+
+    print(f"{engine.config} seq_len={args.seq_len} max_batch={args.max_batch_size} "
+          f"max_delay={args.max_delay_ms}ms threads={args.threads}")
+    print(f"{'clients':>7} {'mode':>8} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'mean batch':>11}")
+    for clients in args.clients:
+        rate, p50, p99 = run_clients(engine.predict, samples, clients)
+        print(f"{clients:>7} {'direct':>8} {rate:>9.0f} {p50 * 1e3:>8.2f} {p99 * 1e3:>8.2f} {1:>11.1f}")
+        batcher = MicroBatcher(engine.predict, args.max_batch_size, args.max_delay_ms, max_queue=args.requests)
+        rate, p50, p99 = run_clients(batcher.predict, samples, clients)
+        mean_batch = batcher.metrics.snapshot()["mean_batch_size"]
+        batcher.close()
+        print(f"{clients:>7} {'batched':>8} {rate:>9.0f} {p50 * 1e3:>8.2f} {p99 * 1e3:>8.2f} {mean_batch:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+CPU benchmark of mcras.fused.FusedMCRAS against the per-channel MCRAS loop.
+
+    python benchmarks/bench_mcras_fused.py [--channels 1 2 4 8 16] [--repeat 20]
+
+Both models share weights; every configuration also checks that their
+outputs agree.
+"""
+import argparse
+import os
+import sys
+import time
+
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcras.fused import FusedMCRAS  # noqa: E402
+from mcras.models import MCRAS  # noqa: E402
+
+
+def bench(model, x, repeat):
+    with torch.inference_mode():
+        for _ in range(3):
+            model(x)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            model(x)
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--channels", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--seq-len", type=int, default=50)
+    parser.add_argument("--input-size", type=int, default=32)
+    parser.add_argument("--hidden-size", type=int, default=64)
+    parser.add_argument("--rnn-type", choices=["LSTM", "GRU"], default="LSTM")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=torch.get_num_threads())
+    args = parser.parse_args()
+    torch.set_num_threads(args.threads)
+    torch.manual_seed(0)
+
+    print(f"batch={args.batch} seq_len={args.seq_len} input={args.input_size} hidden={args.hidden_size} "
+          f"rnn={args.rnn_type} threads={args.threads}")
+    print(f"{'channels':>8} {'per-channel ms':>15} {'fused ms':>10} {'speedup':>8} {'max |diff|':>11}")
+    for channels in args.channels:
+        model = MCRAS(args.input_size, args.hidden_size, channels, 2, args.rnn_type).eval()
+        fused = FusedMCRAS.from_mcras(model).eval()
+        x = torch.randn(args.batch, channels, args.seq_len, args.input_size)
+        with torch.inference_mode():
+            diff = (model(x) - fused(x)).abs().max().item()
+        base = bench(model, x, args.repeat)
+        fast = bench(fused, x, args.repeat)
+        print(f"{channels:>8} {base * 1e3:>15.2f} {fast * 1e3:>10.2f} {base / fast:>7.2f}x {diff:>11.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+CPU latency, weight size and accuracy of mcras.inference.InferenceEngine
+variants against the float eager model.
+
+    python benchmarks/bench_mcras_inference.py [--batch 1 32] [--repeat 30] [--compile]
+
+All variants share one randomly initialised MCRAS; accuracy is measured on
+random inputs, so pass a real checkpoint (--checkpoint) and trust the
+argmax agreement only on real data.
+"""
+import argparse
+import os
+import sys
+import time
+
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcras.inference import InferenceEngine, load_checkpoint  # noqa: E402
+from mcras.models import MCRAS  # noqa: E402
+
+
+def bench(predict, x, repeat):
+    for _ in range(3):
+        predict(x)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predict(x)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checkpoint")
+    parser.add_argument("--channels", type=int, default=8)
+    parser.add_argument("--input-size", type=int, default=32)
+    parser.add_argument("--hidden-size", type=int, default=64)
+    parser.add_argument("--classes", type=int, default=10)
+    parser.add_argument("--rnn-type", choices=["LSTM", "GRU"], default="LSTM")
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 32])
+    parser.add_argument("--seq-len", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--compile", action="store_true", help="also try torch.compile (slow to build)")
+    parser.add_argument("--threads", type=int, default=torch.get_num_threads())
+    args = parser.parse_args()
+    torch.set_num_threads(args.threads)
+    torch.manual_seed(0)
+
+    if args.checkpoint:
+        model, _ = load_checkpoint(args.checkpoint)
+    else:
+        model = MCRAS(args.input_size, args.hidden_size, args.channels, args.classes, args.rnn_type).eval()
+
+    variants = [
+        ("eager", dict(backend="eager")),
+        ("torchscript", dict(backend="torchscript")),
+        ("eager+int8", dict(backend="eager", quantize=True)),
+        ("torchscript+int8", dict(backend="torchscript", quantize=True)),
+    ]
+    if args.compile:
+        variants.append(("compile", dict(backend="compile")))
+
+    engines = [(name, InferenceEngine(model, **kwargs)) for name, kwargs in variants]
+    config = engines[0][1].config
+    print(f"{config} seq_len={args.seq_len} threads={args.threads}")
+    header = "".join(f"{f'b={b} ms':>10}" for b in args.batch)
+    print(f"{'variant':>18}{header} {'weights KB':>11} {'max |diff|':>11} {'argmax agree':>13}")
+    for name, engine in engines:
+        cells = ""
+        for batch in args.batch:
+            x = torch.randn(batch, config["num_channels"], args.seq_len, config["input_size"])
+            cells += f"{bench(engine.predict, x, args.repeat) * 1e3:>10.2f}"
+        report = engine.report
+        print(f"{name:>18}{cells} {report['engine_bytes'] / 1024:>11.0f} "
+              f"{report['max_abs_diff']:>11.2e} {report['argmax_agreement']:>13.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Training-step cost of MCRAS on ragged series: every batch padded to the
+longest series in the dataset, random batches cropped to their longest
+member and masked with `lengths`, and length-bucketed batches cropped and
+masked (what mcras.data_loader does).
+
+    python benchmarks/bench_mcras_lengths.py [--samples 512] [--min-len 20 --max-len 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcras.data_loader import LengthBucketSampler  # noqa: E402
+from mcras.models import MCRAS  # noqa: E402
+
+
+def run(model, x, lengths, batches, use_lengths, crop):
+    started = time.perf_counter()
+    for batch in batches:
+        batch = torch.tensor(batch)
+        batch_lengths = lengths[batch]
+        xb = x[batch]
+        if crop:
+            xb = xb[:, :, :int(batch_lengths.max())]
+        out = model(xb, batch_lengths if use_lengths else None)
+        out.sum().backward()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=512)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--min-len", type=int, default=20)
+    parser.add_argument("--max-len", type=int, default=200)
+    parser.add_argument("--channels", type=int, default=4)
+    parser.add_argument("--input-size", type=int, default=16)
+    parser.add_argument("--hidden-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=torch.get_num_threads())
+    args = parser.parse_args()
+    torch.set_num_threads(args.threads)
+    torch.manual_seed(0)
+
+    rng = np.random.default_rng(0)
+    lengths = torch.from_numpy(rng.integers(args.min_len, args.max_len + 1, args.samples))
+    x = torch.randn(args.samples, args.channels, args.max_len, args.input_size)
+    x = x * (torch.arange(args.max_len) < lengths[:, None]).view(args.samples, 1, args.max_len, 1)
+    model = MCRAS(args.input_size, args.hidden_size, args.channels, 10)
+
+    random_batches = [b.tolist() for b in torch.randperm(args.samples).split(args.batch)]
+    bucketed = list(LengthBucketSampler(lengths.numpy(), args.batch))
+    useful = lengths.sum().item() / (args.samples * args.max_len)
+    print(f"samples={args.samples} lengths={args.min_len}-{args.max_len} (useful steps {useful:.0%}) "
+          f"batch={args.batch} threads={args.threads}")
+    rows = [
+        ("padded to max", random_batches, False, False),
+        ("random, cropped", random_batches, True, True),
+        ("bucketed, cropped", bucketed, True, True),
+    ]
+    base = None
+    for name, batches, use_lengths, crop in rows:
+        seconds = run(model, x, lengths, batches, use_lengths, crop)
+        base = base or seconds
+        print(f"{name:>20}: {seconds:6.2f}s  {base / seconds:4.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Per-tick cost of mcras.streaming.StreamingMCRAS against recomputing
+MCRAS.forward over the whole history on every new time step.
+
+    python benchmarks/bench_mcras_streaming.py [--history 50 200 1000]
+
+Each row also checks that the streamed logits match the full recompute.
+"""
+import argparse
+import os
+import sys
+import time
+
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcras.models import MCRAS  # noqa: E402
+from mcras.streaming import StreamingMCRAS  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--ticks", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=1)
+    parser.add_argument("--channels", type=int, default=8)
+    parser.add_argument("--input-size", type=int, default=32)
+    parser.add_argument("--hidden-size", type=int, default=64)
+    parser.add_argument("--rnn-type", choices=["LSTM", "GRU"], default="LSTM")
+    parser.add_argument("--threads", type=int, default=torch.get_num_threads())
+    args = parser.parse_args()
+    torch.set_num_threads(args.threads)
+    torch.manual_seed(0)
+
+    model = MCRAS(args.input_size, args.hidden_size, args.channels, 10, args.rnn_type).eval()
+    stream = StreamingMCRAS(model)
+    print(f"batch={args.batch} channels={args.channels} input={args.input_size} hidden={args.hidden_size} "
+          f"rnn={args.rnn_type} threads={args.threads}")
+    print(f"{'history':>8} {'recompute ms/tick':>18} {'streaming ms/tick':>18} {'speedup':>8} {'max |diff|':>11}")
+    for history in args.history:
+        x = torch.randn(args.batch, args.channels, history + args.ticks, args.input_size)
+        _, state = stream.step(x[:, :, :history])
+
+        with torch.inference_mode():
+            start = time.perf_counter()
+            for t in range(history, history + args.ticks):
+                expected = model(x[:, :, :t + 1])
+            recompute = (time.perf_counter() - start) / args.ticks
+
+        start = time.perf_counter()
+        for t in range(history, history + args.ticks):
+            logits, state = stream.step(x[:, :, t], state)
+        streaming = (time.perf_counter() - start) / args.ticks
+
+        diff = (logits - expected).abs().max().item()
+        print(f"{history:>8} {recompute * 1e3:>18.2f} {streaming * 1e3:>18.3f} "
+              f"{recompute / streaming:>7.0f}x {diff:>11.2e}")
+
+
+if __name__ == "__main__":
+    main()
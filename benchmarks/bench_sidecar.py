@@ -0,0 +1,121 @@
+"""
+Memory and throughput of N worker processes that each load the sentence
+model, against the same N processes borrowing it from one sidecar
+(screening/sidecar.py) over a Unix socket.
+
+    python benchmarks/bench_sidecar.py [--workers 4] [--requests 50] [--backend torch]
+
+Each worker sends `--requests` encode calls of `--texts` texts, like
+`semantic_score` does per candidate. RSS is summed over every process
+involved (workers, plus the sidecar when used).
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from screening import embedding_backends, sidecar  # noqa: E402
+
+VOCAB = (
+    "developed designed implemented maintained led managed delivered built migrated optimized "
+    "backend frontend services platform pipeline python java django postgresql docker aws "
+    "the a and of to with for"
+).split()
+
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def load(args):
+    return embedding_backends.load_backend(args.backend, args.model, onnx_dir=args.onnx_dir,
+                                           quantized=args.quantized, threads=1)
+
+
+def worker(args, socket_path, start, results):
+    rng = random.Random(os.getpid())
+    texts = [[" ".join(rng.choice(VOCAB) for _ in range(args.words)) for _ in range(args.texts)]
+             for _ in range(args.requests)]
+    encode = sidecar.SidecarClient(socket_path).encode if socket_path else load(args).encode
+    start.wait()
+    started = time.perf_counter()
+    for batch in texts:
+        encode(batch)
+    results.put((time.perf_counter() - started, rss_mb()))
+
+
+def serve(args, socket_path, ready, stop, results):
+    model = load(args)
+    server = sidecar.SidecarServer(socket_path, lambda texts: model.encode(texts), max_batch=args.max_batch)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    ready.set()
+    stop.wait()
+    results.put((server.stats(), rss_mb()))
+    server.shutdown()
+    server.close()
+
+
+def run(args, use_sidecar):
+    ctx = multiprocessing.get_context("spawn")
+    results, server_results = ctx.Queue(), ctx.Queue()
+    start, ready, stop = ctx.Event(), ctx.Event(), ctx.Event()
+    socket_path = os.path.join(tempfile.mkdtemp(), "sidecar.sock") if use_sidecar else None
+    server = None
+    if use_sidecar:
+        server = ctx.Process(target=serve, args=(args, socket_path, ready, stop, server_results))
+        server.start()
+        ready.wait()
+    workers = [ctx.Process(target=worker, args=(args, socket_path, start, results)) for _ in range(args.workers)]
+    for p in workers:
+        p.start()
+    time.sleep(args.settle)  # let every worker finish loading before the clock starts
+    started = time.perf_counter()
+    start.set()
+    measured = [results.get() for _ in workers]
+    wall = time.perf_counter() - started
+    for p in workers:
+        p.join()
+    total_rss = sum(rss for _, rss in measured)
+    stats = None
+    if server is not None:
+        stop.set()
+        stats, server_rss = server_results.get()
+        total_rss += server_rss
+        server.join()
+    calls = args.workers * args.requests
+    return {"wall": wall, "calls_per_s": calls / wall, "rss_mb": total_rss, "stats": stats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--texts", type=int, default=2, help="Texts per encode call.")
+    parser.add_argument("--words", type=int, default=150)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--backend", choices=embedding_backends.BACKENDS, default="torch")
+    parser.add_argument("--model", default=embedding_backends.DEFAULT_MODEL)
+    parser.add_argument("--onnx-dir", default=None)
+    parser.add_argument("--quantized", action="store_true")
+    parser.add_argument("--settle", type=float, default=15.0, help="Seconds allowed for model loading.")
+    args = parser.parse_args()
+
+    print(f"workers={args.workers} requests={args.requests}x{args.texts} texts backend={args.backend}")
+    for name, use_sidecar in (("in-process", False), ("sidecar", True)):
+        r = run(args, use_sidecar)
+        extra = f"  mean batch {r['stats']['mean_batch']}" if r["stats"] else ""
+        print(f"{name:>11}: {r['calls_per_s']:7.1f} calls/s  total RSS {r['rss_mb']:7.1f} MB{extra}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark screening.matching.SkillMatcher against the original per-skill
+`fuzz.partial_ratio` loop on synthetic 1-10 page resumes.
+
+    python benchmarks/bench_skill_matching.py [--repeat 5] [--seed 0]
+
+Every run also asserts that both implementations agree on present/missing.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+from rapidfuzz import fuzz
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from screening.matching import SkillMatcher  # noqa: E402
+
+CHARS_PER_PAGE = 3000
+
+VOCAB = (
+    "developed designed implemented maintained led managed delivered built migrated "
+    "optimized automated reduced improved collaborated mentored owned shipped scaled "
+    "backend frontend services platform pipeline dashboards reporting customers team "
+    "python java django flask fastapi postgresql mysql docker aws linux git rest api "
+    "testing microservices latency throughput reliability data analytics stakeholders "
+    "the a and of to in with for on by across using over from within into"
+).split()
+
+JD_SKILLS = [
+    "python", "django", "postgresql", "docker", "aws", "rest api",
+    "kubernetes", "terraform", "graphql", "apache kafka", "machine learning",
+    "ci/cd pipelines", "typescript", "react native", "redis", "elasticsearch",
+    "microservice", "postgres", "data analytic", "go lang", "c++", "node.js",
+    "k8s", "ci/cd", "python", "docker",
+]
+
+
+def make_resume(pages, rng):
+    words, size = [], 0
+    while size < pages * CHARS_PER_PAGE:
+        word = rng.choice(VOCAB)
+        if rng.random() < 0.02:
+            word = word.capitalize() + "."
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)
+
+
+def brute_force(skills, resume_text):
+    resume = (resume_text or "").lower()
+    present, missing = [], []
+    for s in skills:
+        s_norm = s.lower().strip()
+        if s_norm in resume or fuzz.partial_ratio(s_norm, resume) > 75:
+            present.append(s)
+        else:
+            missing.append(s)
+    return present, missing
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    serial = SkillMatcher(JD_SKILLS)
+    threaded = SkillMatcher(JD_SKILLS, workers=-1)
+    print(f"{len(JD_SKILLS)} JD skills, {os.cpu_count()} CPUs, best of {args.repeat} runs")
+    print(f"{'pages':>5} {'chars':>7} {'brute ms':>9} {'matcher ms':>11} {'workers=-1 ms':>14} {'speedup':>8}")
+    for pages in (1, 2, 4, 6, 8, 10):
+        resume = make_resume(pages, rng)
+        t_old, expected = timed(lambda: brute_force(JD_SKILLS, resume), args.repeat)
+        t_new, actual = timed(lambda: serial.match(resume), args.repeat)
+        t_par, actual_par = timed(lambda: threaded.match(resume), args.repeat)
+        assert actual == expected == actual_par, (pages, expected, actual, actual_par)
+        print(
+            f"{pages:>5} {len(resume):>7} {t_old * 1e3:>9.2f} {t_new * 1e3:>11.2f} "
+            f"{t_par * 1e3:>14.2f} {t_old / min(t_new, t_par):>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Latency and recall of screening.vector_index on synthetic embeddings:
+an exact scan against IVF search at several nprobe values, plus the cost
+of journal (not yet compacted) writes and of a compaction.
+
+    python benchmarks/bench_vector_index.py [--docs 100000] [--dim 384] [--queries 200]
+
+Vectors are drawn around random topic centres, so they cluster the way
+sentence embeddings of resumes and JDs do; uniformly random vectors have
+no structure for any ANN index to exploit.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+settings.configure(BASE_DIR=tempfile.gettempdir(), VECTOR_INDEX_IVF_MIN_SIZE=1, VECTOR_INDEX_NPROBE=8)
+django.setup()
+
+from screening import vector_index  # noqa: E402
+
+
+def synthetic(rng, n, dim, topics, noise=1.5):
+    centres = vector_index.normalize(rng.standard_normal((topics, dim)))
+    vectors = centres[rng.integers(0, topics, n)] + noise * rng.standard_normal((n, dim)) / np.sqrt(dim)
+    return vector_index.normalize(vectors)
+
+
+def timed_search(index, queries, k):
+    results, started = [], time.perf_counter()
+    for query in queries:
+        results.append([doc_id for doc_id, _ in index.search(query, k)])
+    return results, (time.perf_counter() - started) / len(queries) * 1000
+
+
+def recall(results, truth):
+    return np.mean([len(set(r) & set(t)) / len(t) for r, t in zip(results, truth)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--topics", type=int, default=1000)
+    parser.add_argument("--noise", type=float, default=1.5, help="Spread around each topic (higher is harder).")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=50, help="Shortlist size (the views use max(4k, 50)).")
+    parser.add_argument("--journal", type=int, default=5000, help="Writes left in the journal.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = synthetic(rng, args.docs + args.queries, args.dim, args.topics, args.noise)
+    docs, queries = vectors[:args.docs], vectors[args.docs:]
+    ids = np.arange(1, args.docs + 1)
+    digests = np.zeros((args.docs, 32), dtype=np.uint8)
+    truth = [np.argsort(-(docs @ q))[:args.k] + 1 for q in queries]
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = vector_index.VectorIndex("bench", directory)
+        started = time.perf_counter()
+        index.replace_all(ids, docs, digests)
+        print(f"docs={args.docs} dim={args.dim} lists={len(index.centroids)} "
+              f"build {time.perf_counter() - started:.1f}s, k={args.k}")
+
+        settings.VECTOR_INDEX_IVF_MIN_SIZE = args.docs + 1
+        results, ms = timed_search(index, queries, args.k)
+        print(f"{'exact scan':>16}: {ms:7.2f} ms/query  recall {recall(results, truth):.3f}")
+        settings.VECTOR_INDEX_IVF_MIN_SIZE = 1
+        for probe in (1, 4, 8, 16, 32):
+            settings.VECTOR_INDEX_NPROBE = probe
+            results, ms = timed_search(index, queries, args.k)
+            print(f"{f'ivf nprobe={probe}':>16}: {ms:7.2f} ms/query  recall {recall(results, truth):.3f}")
+
+        settings.VECTOR_INDEX_NPROBE = 8
+        extra = synthetic(rng, args.journal, args.dim, args.topics, args.noise)
+        started = time.perf_counter()
+        for i, vector in enumerate(extra):
+            index.upsert(args.docs + 1 + i, bytes(32), vector)
+        print(f"{args.journal} journal writes: {(time.perf_counter() - started) / args.journal * 1000:.3f} ms each")
+        _, ms = timed_search(index, queries, args.k)
+        print(f"{'with journal':>16}: {ms:7.2f} ms/query")
+        started = time.perf_counter()
+        index.compact()
+        print(f"compaction: {time.perf_counter() - started:.1f}s")
+        _, ms = timed_search(index, queries, args.k)
+        print(f"{'compacted':>16}: {ms:7.2f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Measure how long `import screening.views` takes in a fresh interpreter and
+which modules account for it, using `python -X importtime`.
+
+    python benchmarks/import_time.py [--top 15] [--repeat 3]
+
+DJANGO_SETTINGS_MODULE defaults to mcras.settings. Nothing in the report
+should include torch, sentence_transformers, vosk or nltk: models load on
+first use (see screening/registry.py).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPET = "import django; django.setup(); import screening.views"
+
+
+def run_once():
+    env = dict(os.environ)
+    env.setdefault("DJANGO_SETTINGS_MODULE", "mcras.settings")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SNIPPET],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - started
+
+    modules = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Nesting is shown as two extra spaces per level after "| ".
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append((int(cumulative_us), int(self_us), name.strip(), depth))
+    return wall, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    walls, modules = [], []
+    for _ in range(args.repeat):
+        wall, modules = run_once()
+        walls.append(wall)
+
+    print(f"`{SNIPPET}`")
+    print(f"wall clock: median {statistics.median(walls):.2f}s over {args.repeat} runs "
+          f"(min {min(walls):.2f}s, max {max(walls):.2f}s)")
+    top_level = [m for m in modules if m[3] == 0]
+    print(f"\ntop-level imports by cumulative time (last run, {len(modules)} modules):")
+    for cumulative, _, name, _ in sorted(top_level, reverse=True)[: args.top]:
+        print(f"  {cumulative / 1e6:7.3f}s  {name}")
+
+    heavy = sorted({m[2].split(".")[0] for m in modules} & {"torch", "sentence_transformers", "vosk", "nltk"})
+    print("\nheavy packages imported:", ", ".join(heavy) if heavy else "none")
+
+
+if __name__ == "__main__":
+    main()
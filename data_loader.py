@@ -0,0 +1,118 @@
+"""
+Upload helpers for streamlit_app.py, without Django.
+
+Text extraction is the same code the Django app uses
+(screening/extraction.py); skill tokenisation and keyword ranking mirror
+screening/scoring.py and screening/profiles.py, which import Django
+models and can't be used standalone. Training data for the MCRAS model
+lives in mcras/data_loader.py.
+"""
+import importlib.util
+import json
+import logging
+import os
+import re
+import tempfile
+from collections import Counter
+from functools import lru_cache
+
+from screening.extraction import extract_text
+from screening.sidecar import SidecarClient, SidecarError, SidecarTimeout, SidecarUnavailable
+from screening.stopwords import ENGLISH_STOPWORDS
+
+logger = logging.getLogger(__name__)
+
+VOSK_MODEL_PATH = os.getenv("VOSK_MODEL_PATH", "models/vosk-model-small-en-us-0.15")
+VOSK_AVAILABLE = importlib.util.find_spec("vosk") is not None and os.path.exists(VOSK_MODEL_PATH)
+SAMPLE_RATE = 16000
+AUDIO_CHUNK_BYTES = SAMPLE_RATE * 2 * 2
+# Same sidecar as the Django app (screening/sidecar.py), when running.
+SIDECAR_SOCKET = os.getenv("SIDECAR_SOCKET", "")
+SIDECAR = SidecarClient(SIDECAR_SOCKET) if SIDECAR_SOCKET else None
+
+
+def tokenize_skills(text: str):
+    if not text:
+        return []
+    tokens = re.split(r"[\n,;•\-\|]+", text.lower())
+    return [t.strip() for t in tokens if 1 <= len(t.split()) <= 4 and t.strip()]
+
+
+def extract_important_keywords(jd_text, top_n=20):
+    skills = tokenize_skills(jd_text)
+    freq = Counter(s for s in skills if all(w not in ENGLISH_STOPWORDS for w in s.split()))
+    return [kw for kw, _ in freq.most_common(top_n)]
+
+
+def extract_text_from_upload(upload) -> str:
+    """
+    Text of a Streamlit UploadedFile (PDF, DOCX or plain text).
+    """
+    if upload is None:
+        return ""
+    try:
+        return extract_text(upload, upload.name)
+    except Exception as e:
+        logger.exception("Error extracting text from %s: %s", getattr(upload, "name", "upload"), e)
+        return ""
+
+
+@lru_cache(maxsize=1)
+def _vosk_model():
+    from vosk import Model
+    return Model(VOSK_MODEL_PATH)
+
+
+def transcribe_video_upload(upload) -> str:
+    """
+    Transcript of an uploaded video, or "" when Vosk or ffmpeg isn't usable.
+    """
+    if upload is None or not (VOSK_AVAILABLE or SIDECAR):
+        return ""
+
+    suffix = os.path.splitext(upload.name)[1]
+    with tempfile.NamedTemporaryFile(suffix=suffix) as tmp:
+        tmp.write(upload.getbuffer())
+        tmp.flush()
+        if SIDECAR is not None:
+            try:
+                return SIDECAR.transcribe(tmp.name)
+            except SidecarUnavailable:
+                pass
+            except SidecarTimeout as e:
+                logger.warning("Sidecar transcription timed out: %s", e)
+                return ""
+            except SidecarError as e:
+                logger.warning("Sidecar transcription failed, transcribing in-process: %s", e)
+        if not VOSK_AVAILABLE:
+            return ""
+        import ffmpeg
+        from vosk import KaldiRecognizer
+        try:
+            proc = (
+                ffmpeg.input(tmp.name)
+                .output("pipe:", format="s16le", acodec="pcm_s16le", ac=1, ar=SAMPLE_RATE)
+                .global_args("-nostdin", "-loglevel", "error")
+                .run_async(pipe_stdout=True)
+            )
+        except Exception as e:
+            logger.exception("ffmpeg extraction failed: %s", e)
+            return ""
+        try:
+            rec = KaldiRecognizer(_vosk_model(), SAMPLE_RATE)
+            chunks = []
+            while True:
+                data = proc.stdout.read(AUDIO_CHUNK_BYTES)
+                if not data:
+                    break
+                if rec.AcceptWaveform(data):
+                    chunks.append(json.loads(rec.Result()).get("text", ""))
+            chunks.append(json.loads(rec.FinalResult()).get("text", ""))
+            return " ".join(t for t in chunks if t)
+        except Exception as e:
+            logger.exception("Vosk transcription error: %s", e)
+            return ""
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
@@ -0,0 +1,40 @@
+"""
+Gunicorn settings for the `web` process (picked up automatically from the
+working directory).
+
+The app is imported once in the master (`preload_app`) and the sentence
+model is loaded there before any worker forks, so every worker shares the
+weights copy-on-write instead of loading its own copy. With SIDECAR_SOCKET
+set the model lives in `manage.py run_sidecar` instead and isn't loaded
+here at all.
+"""
+import os
+import sys
+
+preload_app = True
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+# Threads per worker; the MCRAS micro-batcher only has something to batch
+# when a worker handles several requests at once.
+threads = int(os.getenv("GUNICORN_THREADS", "1"))
+
+PRELOAD_MODELS = os.getenv("MCRAS_PRELOAD_MODELS", "1") == "1"
+
+
+def when_ready(server):
+    if PRELOAD_MODELS:
+        from screening.registry import MCRAS_MODEL, SENTENCE_MODEL, preload
+        names = [] if os.getenv("SIDECAR_SOCKET") else [SENTENCE_MODEL]
+        if os.getenv("MCRAS_CHECKPOINT"):
+            names.append(MCRAS_MODEL)
+        if names:
+            preload(*names)
+
+
+def post_fork(server, worker):
+    # Don't let every worker spin up one torch thread per core.
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(int(os.getenv("TORCH_NUM_THREADS", "1")))
+    # Connections opened by the master must not be shared across processes.
+    from django.db import connections
+    connections.close_all()
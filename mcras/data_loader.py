@@ -0,0 +1,188 @@
+"""
+Memory-mapped MCRAS datasets.
+
+A dataset is a directory of NumPy arrays that are never loaded whole:
+
+* inputs.npy: float32, (num_samples, num_channels, seq_len, input_size),
+  shorter series zero-padded at the end;
+* labels.npy: int64, (num_samples,);
+* lengths.npy: int64, (num_samples,), the unpadded length of each series;
+* meta.json: the shapes and num_classes.
+
+`MemmapDataset` opens the arrays with `mmap_mode='r'` in each process that
+reads them (DataLoader workers included), so only the pages a batch
+touches are read and the OS page cache is shared between workers.
+Batches are read with one fancy-indexing call per array and cropped to the
+longest series in the batch; `LengthBucketSampler` groups similar lengths
+so that crop removes most of the padding. The RNNs still run over what
+is left; the lengths passed to MCRAS mask those steps out of attention.
+"""
+import json
+import os
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Dataset, Sampler
+
+WRITE_CHUNK = 1024
+
+
+def create_dataset(path, num_samples, num_channels, seq_len, input_size, num_classes):
+    """
+    Create an empty dataset at `path` and return writable memmaps
+    (inputs, labels, lengths) to fill in chunks. Lengths default to seq_len.
+    Call `.flush()` on each when done.
+    """
+    os.makedirs(path, exist_ok=True)
+    inputs = np.lib.format.open_memmap(os.path.join(path, 'inputs.npy'), mode='w+', dtype=np.float32,
+                                       shape=(num_samples, num_channels, seq_len, input_size))
+    labels = np.lib.format.open_memmap(os.path.join(path, 'labels.npy'), mode='w+', dtype=np.int64,
+                                       shape=(num_samples,))
+    lengths = np.lib.format.open_memmap(os.path.join(path, 'lengths.npy'), mode='w+', dtype=np.int64,
+                                        shape=(num_samples,))
+    lengths[:] = seq_len
+    meta = {'num_samples': num_samples, 'num_channels': num_channels, 'seq_len': seq_len,
+            'input_size': input_size, 'num_classes': num_classes}
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+    return inputs, labels, lengths
+
+
+def write_dataset(path, inputs, labels, lengths=None, num_classes=None):
+    """
+    Write in-memory (or memmapped) arrays to `path`, chunk by chunk.
+    """
+    num_samples, num_channels, seq_len, input_size = inputs.shape
+    if num_classes is None:
+        num_classes = int(np.max(labels)) + 1
+    out_inputs, out_labels, out_lengths = create_dataset(path, num_samples, num_channels, seq_len,
+                                                         input_size, num_classes)
+    for start in range(0, num_samples, WRITE_CHUNK):
+        stop = min(start + WRITE_CHUNK, num_samples)
+        out_inputs[start:stop] = inputs[start:stop]
+        out_labels[start:stop] = labels[start:stop]
+        if lengths is not None:
+            out_lengths[start:stop] = lengths[start:stop]
+    for array in (out_inputs, out_labels, out_lengths):
+        array.flush()
+
+
+class MemmapDataset(Dataset):
+    """
+    Items are (x, label, length); batches fetched through `__getitems__`
+    are (x, labels, lengths) with x cropped to the batch's longest series.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self._arrays = None
+
+    def __getstate__(self):
+        # Workers reopen the memmaps instead of receiving a pickled copy.
+        state = self.__dict__.copy()
+        state['_arrays'] = None
+        return state
+
+    def arrays(self):
+        if self._arrays is None:
+            self._arrays = tuple(np.load(os.path.join(self.path, name), mmap_mode='r')
+                                 for name in ('inputs.npy', 'labels.npy', 'lengths.npy'))
+        return self._arrays
+
+    @property
+    def lengths(self):
+        return self.arrays()[2]
+
+    def __len__(self):
+        return self.meta['num_samples']
+
+    def __getitem__(self, index):
+        inputs, labels, lengths = self.arrays()
+        length = int(lengths[index])
+        return torch.from_numpy(np.array(inputs[index, :, :length])), int(labels[index]), length
+
+    def __getitems__(self, indices):
+        inputs, labels, lengths = self.arrays()
+        # Ascending indices keep the reads sequential within the file.
+        indices = np.sort(np.asarray(indices))
+        batch_lengths = lengths[indices]
+        longest = int(batch_lengths.max())
+        x = torch.from_numpy(np.ascontiguousarray(inputs[indices, :, :longest]))
+        return x, torch.from_numpy(labels[indices].copy()), torch.from_numpy(batch_lengths.copy())
+
+
+class LengthBucketSampler(Sampler):
+    """
+    Batches of indices with similar lengths, in random order.
+
+    Each epoch the indices are shuffled, split into pools of
+    batch_size * bucket_multiplier, each pool is sorted by length and cut
+    into batches, and the batches are shuffled. `set_epoch` makes the order
+    reproducible, so resumed training sees the same batches.
+    """
+    def __init__(self, lengths, batch_size, shuffle=True, bucket_multiplier=50, drop_last=False, seed=0):
+        self.lengths = np.asarray(lengths)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.bucket_multiplier = bucket_multiplier
+        self.drop_last = drop_last
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def _batches(self):
+        rng = np.random.default_rng(self.seed + self.epoch)
+        n = len(self.lengths)
+        order = rng.permutation(n) if self.shuffle else np.arange(n)
+        pool_size = self.batch_size * self.bucket_multiplier
+        batches = []
+        for start in range(0, n, pool_size):
+            pool = order[start:start + pool_size]
+            pool = pool[np.argsort(self.lengths[pool], kind='stable')]
+            for i in range(0, len(pool), self.batch_size):
+                batch = pool[i:i + self.batch_size]
+                if len(batch) == self.batch_size or not self.drop_last:
+                    batches.append(batch.tolist())
+        if self.shuffle:
+            batches = [batches[i] for i in rng.permutation(len(batches))]
+        return batches
+
+    def __iter__(self):
+        return iter(self._batches())
+
+    def __len__(self):
+        n = len(self.lengths)
+        return n // self.batch_size if self.drop_last else -(-n // self.batch_size)
+
+
+def _as_batch(batch):
+    return batch
+
+
+def make_loader(dataset, batch_size=32, shuffle=True, num_workers=None, pin_memory=None,
+                bucket_multiplier=50, drop_last=False, seed=0):
+    """
+    DataLoader over a MemmapDataset (or its path) yielding (x, labels,
+    lengths). Workers default to min(4, cpu count - 1); pinned memory
+    defaults to on when CUDA is available, where it speeds up the copy.
+    """
+    if not isinstance(dataset, MemmapDataset):
+        dataset = MemmapDataset(dataset)
+    if num_workers is None:
+        num_workers = min(4, max((os.cpu_count() or 1) - 1, 0))
+    if pin_memory is None:
+        pin_memory = torch.cuda.is_available()
+    sampler = LengthBucketSampler(dataset.lengths, batch_size, shuffle=shuffle,
+                                  bucket_multiplier=bucket_multiplier if shuffle else 1,
+                                  drop_last=drop_last, seed=seed)
+    return DataLoader(
+        dataset,
+        batch_sampler=sampler,
+        collate_fn=_as_batch,
+        num_workers=num_workers,
+        pin_memory=pin_memory,
+        persistent_workers=num_workers > 0,
+    )
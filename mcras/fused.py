@@ -0,0 +1,151 @@
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from .models import AttentionLayer, MCRAS, length_mask
+
+
+class FusedMCRAS(nn.Module):
+    """
+    Drop-in variant of MCRAS that runs every channel in a single RNN call.
+
+    The per-channel LSTMs/GRUs are packed into one RNN whose input and hidden
+    state are the channels side by side (num_channels * input_size in,
+    num_channels * hidden_size out) and whose weights are block-diagonal, so
+    channel c only ever sees its own inputs and state. Gradient hooks keep the
+    off-diagonal blocks at zero during training.
+
+    The block-diagonal matmuls do num_channels times the FLOPs of the
+    per-channel ones, in exchange for one kernel call per time step instead of
+    num_channels. That pays off while the model is launch-bound: on one CPU
+    core roughly num_channels * hidden_size <= 128 (e.g. 8 channels of 16).
+    Larger models should keep MCRAS; see benchmarks/bench_mcras_fused.py.
+    """
+    def __init__(self, input_size, hidden_size, num_channels, num_classes, rnn_type='LSTM'):
+        super(FusedMCRAS, self).__init__()
+        self.input_size = input_size
+        self.hidden_size = hidden_size
+        self.num_channels = num_channels
+        self.rnn_type = rnn_type
+        self.num_gates = 4 if rnn_type == 'LSTM' else 3
+
+        rnn_cls = nn.LSTM if rnn_type == 'LSTM' else nn.GRU
+        self.rnn = rnn_cls(input_size=num_channels * input_size,
+                           hidden_size=num_channels * hidden_size, batch_first=True)
+
+        # Attention layer
+        self.attention = AttentionLayer(hidden_size, num_channels)
+
+        # Fully connected output layer
+        self.fc = nn.Linear(num_channels * hidden_size, num_classes)
+
+        self.register_buffer('mask_ih', self._block_mask(input_size), persistent=False)
+        self.register_buffer('mask_hh', self._block_mask(hidden_size), persistent=False)
+        with torch.no_grad():
+            self.rnn.weight_ih_l0.mul_(self.mask_ih)
+            self.rnn.weight_hh_l0.mul_(self.mask_hh)
+        self.rnn.weight_ih_l0.register_hook(lambda grad: grad * self.mask_ih)
+        self.rnn.weight_hh_l0.register_hook(lambda grad: grad * self.mask_hh)
+
+    def _block_mask(self, cols_per_channel):
+        # Rows are laid out gate-major: [gate][channel][hidden].
+        C, H, G = self.num_channels, self.hidden_size, self.num_gates
+        eye = torch.eye(C)
+        mask = eye.repeat_interleave(H, dim=0).repeat_interleave(cols_per_channel, dim=1)
+        return mask.repeat(G, 1)
+
+    def _pack(self, per_channel, cols_per_channel):
+        """
+        Per-channel (G*H, cols) matrices -> one (G*C*H, C*cols) block matrix.
+        """
+        C, H, G = self.num_channels, self.hidden_size, self.num_gates
+        packed = per_channel[0].new_zeros(G * C * H, C * cols_per_channel)
+        for c, w in enumerate(per_channel):
+            for g in range(G):
+                rows = slice(g * C * H + c * H, g * C * H + (c + 1) * H)
+                cols = slice(c * cols_per_channel, (c + 1) * cols_per_channel)
+                packed[rows, cols] = w[g * H:(g + 1) * H]
+        return packed
+
+    def _pack_bias(self, per_channel):
+        C, H, G = self.num_channels, self.hidden_size, self.num_gates
+        stacked = torch.stack(per_channel).view(C, G, H)  # (channel, gate, hidden)
+        return stacked.transpose(0, 1).reshape(G * C * H)
+
+    def _unpack(self, packed, cols_per_channel, c):
+        C, H, G = self.num_channels, self.hidden_size, self.num_gates
+        cols = slice(c * cols_per_channel, (c + 1) * cols_per_channel)
+        return torch.cat([packed[g * C * H + c * H:g * C * H + (c + 1) * H, cols] for g in range(G)])
+
+    def _unpack_bias(self, packed, c):
+        C, H, G = self.num_channels, self.hidden_size, self.num_gates
+        return packed.view(G, C, H)[:, c].reshape(G * H)
+
+    def load_mcras_state_dict(self, state_dict):
+        """
+        Load weights saved from a per-channel MCRAS.
+        """
+        C = self.num_channels
+        suffixes = ('weight_ih_l0', 'weight_hh_l0', 'bias_ih_l0', 'bias_hh_l0')
+        per_channel = {s: [state_dict[f'rnns.{c}.{s}'] for c in range(C)] for s in suffixes}
+        fused = {
+            'rnn.weight_ih_l0': self._pack(per_channel['weight_ih_l0'], self.input_size),
+            'rnn.weight_hh_l0': self._pack(per_channel['weight_hh_l0'], self.hidden_size),
+            'rnn.bias_ih_l0': self._pack_bias(per_channel['bias_ih_l0']),
+            'rnn.bias_hh_l0': self._pack_bias(per_channel['bias_hh_l0']),
+        }
+        for key, value in state_dict.items():
+            if not key.startswith('rnns.'):
+                fused[key] = value
+        return self.load_state_dict(fused)
+
+    def mcras_state_dict(self):
+        """
+        Weights in the per-channel MCRAS layout.
+        """
+        sd = self.state_dict()
+        out = {}
+        for c in range(self.num_channels):
+            out[f'rnns.{c}.weight_ih_l0'] = self._unpack(sd['rnn.weight_ih_l0'], self.input_size, c)
+            out[f'rnns.{c}.weight_hh_l0'] = self._unpack(sd['rnn.weight_hh_l0'], self.hidden_size, c)
+            out[f'rnns.{c}.bias_ih_l0'] = self._unpack_bias(sd['rnn.bias_ih_l0'], c)
+            out[f'rnns.{c}.bias_hh_l0'] = self._unpack_bias(sd['rnn.bias_hh_l0'], c)
+        for key, value in sd.items():
+            if not key.startswith('rnn.'):
+                out[key] = value
+        return out
+
+    @classmethod
+    def from_mcras(cls, model: MCRAS):
+        rnn = model.rnns[0]
+        fused = cls(rnn.input_size, model.hidden_size, model.num_channels,
+                    model.fc.out_features, 'LSTM' if isinstance(rnn, nn.LSTM) else 'GRU')
+        fused.load_mcras_state_dict(model.state_dict())
+        return fused.to(model.fc.weight.device)
+
+    def forward(self, x, lengths=None):
+        """
+        x shape: (batch_size, num_channels, seq_len, input_size)
+        lengths: optional (batch_size,) valid time steps, as in MCRAS.forward
+        """
+        batch_size, num_channels, seq_len, input_size = x.size()
+
+        # Channels side by side on the feature axis
+        packed = x.permute(0, 2, 1, 3).reshape(batch_size, seq_len, num_channels * input_size)
+        rnn_out, _ = self.rnn(packed)  # shape: (batch_size, seq_len, num_channels*hidden_size)
+        rnn_out = rnn_out.view(batch_size, seq_len, num_channels, self.hidden_size)
+
+        # Same attention as AttentionLayer, with time on dim 1 instead of dim 2
+        attn_weights = torch.tanh(self.attention.attn(rnn_out))  # shape: (batch_size, seq_len, num_channels, 1)
+        if lengths is not None:
+            mask = length_mask(torch.as_tensor(lengths, device=x.device), seq_len).view(batch_size, seq_len, 1, 1)
+            attn_weights = attn_weights.masked_fill(~mask, float('-inf'))
+        attn_weights = F.softmax(attn_weights, dim=1)
+        attn_out = (rnn_out * attn_weights).sum(dim=1)  # shape: (batch_size, num_channels, hidden_size)
+
+        # Flatten channels
+        attn_out = attn_out.reshape(batch_size, -1)  # shape: (batch_size, num_channels*hidden_size)
+
+        # Final output
+        out = self.fc(attn_out)  # shape: (batch_size, num_classes)
+        return out
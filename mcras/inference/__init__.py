@@ -0,0 +1,22 @@
+"""
+CPU inference for trained MCRAS models: checkpoint loading, TorchScript or
+torch.compile export, dynamic int8 quantization and a thread-safe
+`predict(batch)`.
+
+    from mcras.inference import InferenceEngine
+
+    engine = InferenceEngine.from_checkpoint("mcras.pt", quantize=True)
+    logits = engine.predict(batch)  # (batch, num_channels, seq_len, input_size)
+    print(engine.report)            # size and accuracy vs the float model
+
+`MicroBatcher` puts concurrent single-sample calls through one batched
+forward; the Django endpoints under /api/mcras/ serve an engine through it.
+"""
+from .batcher import BatchMetrics, MicroBatcher
+from .checkpoint import infer_config, load_checkpoint, model_config, save_checkpoint
+from .engine import BACKENDS, InferenceEngine, accuracy_report, quantize_model
+
+__all__ = [
+    'BACKENDS', 'BatchMetrics', 'InferenceEngine', 'MicroBatcher', 'accuracy_report', 'infer_config',
+    'load_checkpoint', 'model_config', 'quantize_model', 'save_checkpoint',
+]
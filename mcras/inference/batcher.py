@@ -0,0 +1,177 @@
+import collections
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+METRICS_WINDOW = 4096
+THROUGHPUT_WINDOW_SECONDS = 60.0
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(int(round(q / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class BatchMetrics:
+    """
+    Latency and throughput over the most recent requests.
+
+    Latency runs from `submit` to the result being set, so it includes the
+    time spent waiting for the batch to fill.
+    """
+    def __init__(self, window: int = METRICS_WINDOW):
+        self._lock = threading.Lock()
+        self._latencies = collections.deque(maxlen=window)
+        self._batches = collections.deque(maxlen=window)  # (finished_at, size, forward seconds)
+        self.started = time.monotonic()
+        self.requests = self.batches = self.errors = self.rejected = 0
+
+    def record_batch(self, latencies, forward_seconds: float):
+        with self._lock:
+            self._latencies.extend(latencies)
+            self._batches.append((time.monotonic(), len(latencies), forward_seconds))
+            self.requests += len(latencies)
+            self.batches += 1
+
+    def record_error(self, n: int):
+        with self._lock:
+            self.errors += n
+
+    def record_rejected(self):
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            batches = list(self._batches)
+            counters = {"requests": self.requests, "batches": self.batches,
+                        "errors": self.errors, "rejected": self.rejected}
+        now = time.monotonic()
+        window = min(THROUGHPUT_WINDOW_SECONDS, now - self.started) or 1.0
+        recent = [(size, seconds) for finished, size, seconds in batches if now - finished <= window]
+        p50, p99 = _percentile(latencies, 50), _percentile(latencies, 99)
+        return {
+            **counters,
+            "latency_p50_ms": p50 * 1e3 if p50 is not None else None,
+            "latency_p99_ms": p99 * 1e3 if p99 is not None else None,
+            "mean_batch_size": sum(size for size, _ in recent) / len(recent) if recent else None,
+            "forward_ms_per_sample": (sum(s for _, s in recent) * 1e3 / sum(n for n, _ in recent)) if recent else None,
+            "throughput_per_second": sum(size for size, _ in recent) / window,
+        }
+
+
+class MicroBatcher:
+    """
+    Collects single-sample requests from many threads into batched forwards.
+
+    A background thread takes the first queued sample, then keeps collecting
+    until it has `max_batch_size` samples or `max_delay_ms` has passed since
+    that first sample was submitted. Samples of different lengths are
+    zero-padded to the longest and passed with their lengths, so the whole
+    batch runs through `predict(x, lengths)` once (the RNNs run over the
+    padding, attention masks it out) and every caller's Future gets its own
+    row back.
+    """
+    def __init__(self, predict, max_batch_size: int = 32, max_delay_ms: float = 5.0, max_queue: int = 1024):
+        self.predict_batch = predict
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay_ms / 1e3
+        self.metrics = BatchMetrics()
+        self._queue = queue.Queue(max_queue)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="mcras-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, sample) -> Future:
+        """
+        Queue one (num_channels, seq_len, input_size) sample. Raises
+        queue.Full when the backlog is at `max_queue`.
+        """
+        if self._stopped.is_set():
+            raise RuntimeError("MicroBatcher is closed")
+        sample = torch.as_tensor(sample, dtype=torch.float32)
+        if sample.dim() != 3:
+            raise ValueError(f"Expected one (num_channels, seq_len, input_size) sample, got {tuple(sample.shape)}")
+        future = Future()
+        try:
+            self._queue.put_nowait((sample, future, time.perf_counter()))
+        except queue.Full:
+            self.metrics.record_rejected()
+            raise
+        return future
+
+    def predict(self, sample, timeout: float = None):
+        return self.submit(sample).result(timeout)
+
+    def close(self, timeout: float = 5.0):
+        self._stopped.set()
+        self._queue.put(None, timeout=timeout)
+        self._thread.join(timeout)
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = first[2] + self.max_delay
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Serve what was collected, then stop.
+                self._closing = True
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        self._closing = False
+        while not self._closing:
+            batch = self._collect()
+            if batch is None:
+                return
+            # Only lengths are padded; a malformed sample fails on its own.
+            groups = collections.defaultdict(list)
+            for item in batch:
+                groups[(item[0].size(0), item[0].size(2))].append(item)
+            for items in groups.values():
+                self._run_batch(items)
+
+    def _run_batch(self, items):
+        live = [item for item in items if item[1].set_running_or_notify_cancel()]
+        if not live:
+            return
+        try:
+            started = time.perf_counter()
+            samples = [sample for sample, _, _ in live]
+            lengths = [sample.size(1) for sample in samples]
+            if min(lengths) == max(lengths):
+                outputs = self.predict_batch(torch.stack(samples))
+            else:
+                x = samples[0].new_zeros(len(samples), samples[0].size(0), max(lengths), samples[0].size(2))
+                for i, sample in enumerate(samples):
+                    x[i, :, :sample.size(1)] = sample
+                outputs = self.predict_batch(x, torch.tensor(lengths))
+            forward_seconds = time.perf_counter() - started
+        except Exception as e:
+            logger.exception("MCRAS batch of %d failed", len(live))
+            self.metrics.record_error(len(live))
+            for _, future, _ in live:
+                future.set_exception(e)
+            return
+        finished = time.perf_counter()
+        for row, (_, future, submitted) in zip(outputs, live):
+            future.set_result(row)
+        self.metrics.record_batch([finished - submitted for _, _, submitted in live], forward_seconds)
@@ -0,0 +1,75 @@
+import os
+
+import torch
+
+from ..models import MCRAS
+
+CONFIG_KEYS = ('input_size', 'hidden_size', 'num_channels', 'num_classes', 'rnn_type')
+
+
+def model_config(model):
+    """
+    Constructor arguments of an MCRAS (or FusedMCRAS) instance.
+    """
+    if hasattr(model, 'rnns'):
+        rnn = model.rnns[0]
+        input_size = rnn.input_size
+    else:
+        rnn = model.rnn
+        input_size = model.input_size
+    return {
+        'input_size': input_size,
+        'hidden_size': model.hidden_size,
+        'num_channels': model.num_channels,
+        'num_classes': model.fc.out_features,
+        'rnn_type': rnn.mode,
+    }
+
+
+def infer_config(state_dict):
+    """
+    Recover the MCRAS constructor arguments from a bare per-channel state dict
+    (what `torch.save(model.state_dict(), path)` writes).
+    """
+    num_channels = sum(1 for key in state_dict if key.startswith('rnns.') and key.endswith('.weight_ih_l0'))
+    if not num_channels:
+        raise ValueError("State dict has no 'rnns.<n>.weight_ih_l0' entries; not an MCRAS checkpoint")
+    w_ih = state_dict['rnns.0.weight_ih_l0']
+    w_hh = state_dict['rnns.0.weight_hh_l0']
+    hidden_size = w_hh.shape[1]
+    gates = w_hh.shape[0] // hidden_size
+    return {
+        'input_size': w_ih.shape[1],
+        'hidden_size': hidden_size,
+        'num_channels': num_channels,
+        'num_classes': state_dict['fc.weight'].shape[0],
+        'rnn_type': 'LSTM' if gates == 4 else 'GRU',
+    }
+
+
+def save_checkpoint(path, model, **extra):
+    """
+    Write `{"config": ..., "model_state": ...}` so the model can be rebuilt
+    without knowing its sizes. FusedMCRAS weights are stored in the
+    per-channel layout. `extra` (epoch, optimizer state, metrics...) is
+    saved alongside.
+    """
+    state = model.mcras_state_dict() if hasattr(model, 'mcras_state_dict') else model.state_dict()
+    # Write then rename so an interrupted save never clobbers the last good checkpoint.
+    tmp = f'{path}.tmp'
+    torch.save({'config': model_config(model), 'model_state': state, **extra}, tmp)
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path, map_location='cpu'):
+    """
+    Return (MCRAS in eval mode, checkpoint dict). Accepts files written by
+    `save_checkpoint` and bare state dicts.
+    """
+    checkpoint = torch.load(path, map_location=map_location, weights_only=True)
+    if 'model_state' not in checkpoint:
+        checkpoint = {'config': infer_config(checkpoint), 'model_state': checkpoint}
+    config = {key: checkpoint['config'][key] for key in CONFIG_KEYS}
+    model = MCRAS(**config)
+    model.load_state_dict(checkpoint['model_state'])
+    return model.eval(), checkpoint
@@ -0,0 +1,196 @@
+import copy
+import io
+import logging
+import threading
+import time
+import warnings
+
+import torch
+import torch.nn as nn
+
+from ..fused import FusedMCRAS
+from .checkpoint import load_checkpoint, model_config
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('eager', 'torchscript', 'compile')
+# Sequence length of the example input used for tracing and warm-up; traced
+# MCRAS graphs accept any batch size and sequence length.
+EXAMPLE_SEQ_LEN = 32
+REPORT_SAMPLES = 64
+
+
+def quantize_model(model):
+    """
+    Copy of `model` with the LSTM/GRU weights and `fc` dynamically quantized
+    to int8. The attention scorer (Linear(hidden, 1)) stays float: it is a
+    handful of weights and quantizing it only adds error.
+    """
+    from torch.ao.quantization import default_dynamic_qconfig, quantize_dynamic
+
+    spec = {nn.LSTM: default_dynamic_qconfig, nn.GRU: default_dynamic_qconfig, 'fc': default_dynamic_qconfig}
+    with warnings.catch_warnings():
+        # torch.ao.quantization warns that it is moving to torchao; it still
+        # ships and works, and the engine should not spam every process boot.
+        warnings.simplefilter('ignore', DeprecationWarning)
+        warnings.filterwarnings('ignore', message='torch.quantize_per_tensor')
+        return quantize_dynamic(model, spec, dtype=torch.qint8)
+
+
+def state_bytes(model) -> int:
+    """
+    Serialized size of the model's weights (packed int8 weights included).
+    """
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell()
+
+
+def accuracy_report(reference, candidate, inputs) -> dict:
+    """
+    How far `candidate` drifts from `reference` on `inputs`.
+    """
+    with torch.inference_mode():
+        expected = reference(inputs)
+        actual = candidate(inputs)
+    diff = (actual - expected).abs()
+    return {
+        'samples': inputs.size(0),
+        'max_abs_diff': diff.max().item(),
+        'mean_abs_diff': diff.mean().item(),
+        'argmax_agreement': (actual.argmax(dim=1) == expected.argmax(dim=1)).float().mean().item(),
+    }
+
+
+class InferenceEngine:
+    """
+    CPU serving wrapper around a trained MCRAS.
+
+    The float model is optionally swapped for FusedMCRAS (`fused=True`, for
+    small hidden sizes), dynamically quantized (`quantize=True`) and then
+    exported with the chosen backend:
+
+    * 'torchscript': traced (and frozen when not quantized), no Python in
+      the forward pass; `save_torchscript` writes it out for other hosts;
+    * 'compile': `torch.compile(dynamic=True)`, warmed up at build time since
+      the first call compiles;
+    * 'eager': the module as is.
+
+    At build time the exported model is compared with the float model on
+    `reference_inputs` (random inputs if none are given) and the result is
+    kept in `self.report` and logged; the float copy is dropped afterwards.
+
+    int8 cuts the weights roughly 4x, but each RNN step also quantizes its
+    activations: on one CPU core it only lowers latency from a hidden size of
+    about 256, and is 2-4x slower at 64. See
+    benchmarks/bench_mcras_inference.py before turning it on for latency.
+
+    `predict` takes optional per-sample `lengths` for zero-padded batches;
+    TorchScript traces a second graph for them.
+
+    `predict` may be called from any thread. Calls are serialized: torch
+    already spreads one forward over every intra-op thread, so concurrent
+    forwards only oversubscribe the cores, and a compiled module may
+    recompile on a new input shape.
+    """
+    def __init__(self, model, backend='torchscript', quantize=False, fused=False, reference_inputs=None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}; expected one of {BACKENDS}")
+        float_model = model.eval()
+        self.config = model_config(float_model)
+        self.backend = backend
+        self.quantized = quantize
+        self._lock = threading.Lock()
+
+        started = time.perf_counter()
+        module = FusedMCRAS.from_mcras(float_model).eval() if fused else copy.deepcopy(float_model)
+        if quantize:
+            module = quantize_model(module)
+        engine_bytes = state_bytes(module)
+        self._module, self._module_lengths = self._export(module)
+
+        if reference_inputs is None:
+            reference_inputs = torch.randn(REPORT_SAMPLES, self.config['num_channels'], EXAMPLE_SEQ_LEN,
+                                           self.config['input_size'])
+        self.report = {
+            'backend': backend,
+            'quantized': quantize,
+            'fused': fused,
+            'float_bytes': state_bytes(float_model),
+            'engine_bytes': engine_bytes,
+            **accuracy_report(float_model, self._module, self.as_batch(reference_inputs)),
+            'build_seconds': time.perf_counter() - started,
+        }
+        logger.info("MCRAS inference engine ready: %s", self.report)
+
+    @classmethod
+    def from_checkpoint(cls, path, **kwargs):
+        model, _ = load_checkpoint(path)
+        return cls(model, **kwargs)
+
+    def _example(self, batch_size=1):
+        return torch.randn(batch_size, self.config['num_channels'], EXAMPLE_SEQ_LEN, self.config['input_size'])
+
+    def _export(self, module):
+        """
+        Return (forward, forward with lengths).
+        """
+        if self.backend == 'eager':
+            return module, module
+        example = self._example(batch_size=2)
+        if self.backend == 'compile':
+            compiled = torch.compile(module, dynamic=True)
+            with torch.inference_mode():
+                compiled(example)
+            return compiled, compiled
+        example_lengths = torch.tensor([EXAMPLE_SEQ_LEN, EXAMPLE_SEQ_LEN // 2])
+        with warnings.catch_warnings():
+            # The tracer flags RNN input-size checks, which are constant for
+            # a given model, and the TorchScript deprecation notice.
+            warnings.simplefilter('ignore', torch.jit.TracerWarning)
+            warnings.simplefilter('ignore', FutureWarning)
+            with torch.no_grad():
+                traced = torch.jit.trace(module, example)
+                traced_lengths = torch.jit.trace(module, (example, example_lengths))
+            if self.quantized:
+                return traced, traced_lengths
+            return torch.jit.freeze(traced), torch.jit.freeze(traced_lengths)
+
+    def as_batch(self, batch):
+        x = torch.as_tensor(batch, dtype=torch.float32)
+        if x.dim() == 3:
+            x = x.unsqueeze(0)
+        C, I = self.config['num_channels'], self.config['input_size']
+        if x.dim() != 4 or x.size(1) != C or x.size(3) != I:
+            raise ValueError(f"Expected input of shape (batch, {C}, seq_len, {I}), got {tuple(x.shape)}")
+        return x
+
+    def as_lengths(self, lengths, x):
+        lengths = torch.as_tensor(lengths, dtype=torch.int64).reshape(-1)
+        if lengths.numel() != x.size(0):
+            raise ValueError(f"Expected {x.size(0)} lengths, got {lengths.numel()}")
+        if lengths.numel() and (lengths.min() < 1 or lengths.max() > x.size(2)):
+            raise ValueError(f"Lengths must be between 1 and seq_len ({x.size(2)})")
+        return lengths
+
+    def predict(self, batch, lengths=None):
+        """
+        Logits for `batch`, shaped (batch_size, num_channels, seq_len,
+        input_size); a single (num_channels, seq_len, input_size) sample is
+        treated as a batch of one. Accepts tensors, arrays and nested lists.
+        `lengths` gives the unpadded length of each sample.
+        """
+        x = self.as_batch(batch)
+        if lengths is not None:
+            lengths = self.as_lengths(lengths, x)
+        with self._lock, torch.inference_mode():
+            if lengths is None:
+                return self._module(x)
+            return self._module_lengths(x, lengths)
+
+    def save_torchscript(self, path):
+        if self.backend != 'torchscript':
+            raise ValueError("save_torchscript needs backend='torchscript'")
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', FutureWarning)
+            torch.jit.save(self._module, path)
@@ -2,6 +2,14 @@ import torch
 import torch.nn as nn
 import torch.nn.functional as F
 
+
+def length_mask(lengths, seq_len):
+    """
+    (batch_size, seq_len) bool mask, True for time steps inside each length.
+    """
+    return torch.arange(seq_len, device=lengths.device).unsqueeze(0) < lengths.unsqueeze(1)
+
+
 class AttentionLayer(nn.Module):
     """
     Attention mechanism to weight the importance of time steps and channels.
@@ -11,11 +19,15 @@ class AttentionLayer(nn.Module):
         self.attn = nn.Linear(hidden_size, 1)
         self.num_channels = num_channels
 
-    def forward(self, x):
+    def forward(self, x, lengths=None):
         # x shape: (batch_size, num_channels, seq_len, hidden_size)
+        # lengths: optional (batch_size,) valid time steps; padding gets zero weight
         # Compute attention scores for each time step
         batch_size, num_channels, seq_len, hidden_size = x.size()
         attn_weights = torch.tanh(self.attn(x))  # shape: (batch_size, num_channels, seq_len, 1)
+        if lengths is not None:
+            mask = length_mask(lengths, seq_len).view(batch_size, 1, seq_len, 1)
+            attn_weights = attn_weights.masked_fill(~mask, float('-inf'))
         attn_weights = F.softmax(attn_weights, dim=2)  # Softmax over time dimension
         weighted = x * attn_weights  # Apply attention weights
         out = weighted.sum(dim=2)  # Sum over time dimension
@@ -44,12 +56,20 @@ class MCRAS(nn.Module):
         # Fully connected output layer
         self.fc = nn.Linear(num_channels * hidden_size, num_classes)
 
-    def forward(self, x):
+    def forward(self, x, lengths=None):
         """
         x shape: (batch_size, num_channels, seq_len, input_size)
+        lengths: optional (batch_size,) number of valid time steps per sample,
+        for batches zero-padded at the end. Attention ignores the padding, so
+        the output matches running each sample unpadded: the RNNs are
+        unidirectional and only their per-step outputs are used, so the
+        steps before a sample's length never see its padding.
         """
         channel_outputs = []
 
+        if lengths is not None:
+            lengths = torch.as_tensor(lengths, device=x.device)
+
         for i in range(self.num_channels):
             rnn_out, _ = self.rnns[i](x[:, i, :, :])  # shape: (batch_size, seq_len, hidden_size)
             rnn_out = rnn_out.unsqueeze(1)  # shape: (batch_size, 1, seq_len, hidden_size)
@@ -59,7 +79,7 @@ class MCRAS(nn.Module):
         combined = torch.cat(channel_outputs, dim=1)  # shape: (batch_size, num_channels, seq_len, hidden_size)
 
         # Apply attention
-        attn_out = self.attention(combined)  # shape: (batch_size, num_channels, hidden_size)
+        attn_out = self.attention(combined, lengths)  # shape: (batch_size, num_channels, hidden_size)
 
         # Flatten channels
         attn_out = attn_out.view(attn_out.size(0), -1)  # shape: (batch_size, num_channels*hidden_size)
@@ -135,3 +135,105 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # Default Auto Field
 # -------------------------
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# -------------------------
+# Scoring Queue
+# -------------------------
+# Per-stage process counts for `manage.py run_scoring_worker`; keep
+# transcription low so long videos can't starve text scoring.
+SCORING_STAGE_CONCURRENCY = {
+    "extract": int(os.environ.get('SCORING_EXTRACT_WORKERS', 2)),
+    "transcribe": int(os.environ.get('SCORING_TRANSCRIBE_WORKERS', 1)),
+    "score": int(os.environ.get('SCORING_SCORE_WORKERS', 4)),
+}
+SCORING_MAX_ATTEMPTS = int(os.environ.get('SCORING_MAX_ATTEMPTS', 3))
+SCORING_RETRY_BACKOFF_SECONDS = 10
+SCORING_RETRY_BACKOFF_MAX_SECONDS = 600
+SCORING_STALE_AFTER_SECONDS = 1800
+
+# -------------------------
+# Embeddings
+# -------------------------
+# In-process LRU in front of the `Embedding` table (entries per process).
+EMBEDDING_LRU_SIZE = int(os.environ.get('EMBEDDING_LRU_SIZE', 2048))
+# Sentence model runtime: 'torch' (sentence-transformers) or 'onnx'
+# (onnxruntime, from files written by `manage.py export_embedding_model`;
+# falls back to torch when they're missing). EMBEDDING_ONNX_QUANTIZE picks
+# the int8 weights; its vectors are cached apart from the float32 ones.
+# EMBEDDING_THREADS = 0 keeps the runtime's default thread count.
+EMBEDDING_BACKEND = os.environ.get('EMBEDDING_BACKEND', 'torch')
+EMBEDDING_ONNX_DIR = os.environ.get('EMBEDDING_ONNX_DIR', str(BASE_DIR / 'models' / 'onnx' / 'all-MiniLM-L6-v2'))
+EMBEDDING_ONNX_QUANTIZE = os.environ.get('EMBEDDING_ONNX_QUANTIZE', 'False') == 'True'
+EMBEDDING_THREADS = int(os.environ.get('EMBEDDING_THREADS', 0))
+# Long documents: off | mean | max | best (see screening/chunking.py).
+# Windows of EMBEDDING_CHUNK_WORDS words stay under the model's 256 word
+# pieces; only the first EMBEDDING_MAX_CHUNKS windows are used.
+EMBEDDING_CHUNKING = os.environ.get('EMBEDDING_CHUNKING', 'off')
+EMBEDDING_CHUNK_WORDS = int(os.environ.get('EMBEDDING_CHUNK_WORDS', 150))
+EMBEDDING_CHUNK_OVERLAP = int(os.environ.get('EMBEDDING_CHUNK_OVERLAP', 25))
+EMBEDDING_MAX_CHUNKS = int(os.environ.get('EMBEDDING_MAX_CHUNKS', 32))
+
+# -------------------------
+# Model Sidecar
+# -------------------------
+# Unix socket of `manage.py run_sidecar`, which holds the sentence and
+# Vosk models for every process on the box. Unset: each process loads its
+# own. If the sidecar is unreachable, callers load in-process and retry it
+# after SIDECAR_RETRY_SECONDS; a request that times out just fails.
+# SIDECAR_MAX_BATCH caps both the server's batches and each client request.
+SIDECAR_SOCKET = os.environ.get('SIDECAR_SOCKET', '')
+SIDECAR_TIMEOUT_SECONDS = float(os.environ.get('SIDECAR_TIMEOUT_SECONDS', 30))
+SIDECAR_TRANSCRIBE_TIMEOUT_SECONDS = float(os.environ.get('SIDECAR_TRANSCRIBE_TIMEOUT_SECONDS', 900))
+SIDECAR_RETRY_SECONDS = float(os.environ.get('SIDECAR_RETRY_SECONDS', 30))
+SIDECAR_MAX_BATCH = int(os.environ.get('SIDECAR_MAX_BATCH', 64))
+SIDECAR_MAX_DELAY_MS = float(os.environ.get('SIDECAR_MAX_DELAY_MS', 5))
+SIDECAR_TRANSCRIBE_WORKERS = int(os.environ.get('SIDECAR_TRANSCRIBE_WORKERS', 1))
+
+# -------------------------
+# Bulk Import
+# -------------------------
+# ZIP-of-resumes imports (see screening/bulk_import.py): text extraction
+# processes, entries per bulk_create transaction, and limits per archive.
+BULK_IMPORT_WORKERS = int(os.environ.get('BULK_IMPORT_WORKERS', min(os.cpu_count() or 1, 4)))
+BULK_IMPORT_BATCH_SIZE = int(os.environ.get('BULK_IMPORT_BATCH_SIZE', 200))
+BULK_IMPORT_MAX_ENTRIES = int(os.environ.get('BULK_IMPORT_MAX_ENTRIES', 20000))
+BULK_IMPORT_MAX_ENTRY_BYTES = int(os.environ.get('BULK_IMPORT_MAX_ENTRY_BYTES', 20 * 1024 * 1024))
+BULK_IMPORT_MANIFEST_NAME = os.environ.get('BULK_IMPORT_MANIFEST_NAME', 'manifest.csv')
+
+# -------------------------
+# Content Cache
+# -------------------------
+# Extracted resume text + embedding keyed by sha256 of the uploaded file.
+CONTENT_CACHE_DIR = os.environ.get('CONTENT_CACHE_DIR', str(BASE_DIR / 'cache' / 'content'))
+CONTENT_CACHE_MAX_BYTES = int(os.environ.get('CONTENT_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
+# -------------------------
+# MCRAS Inference
+# -------------------------
+# Checkpoint served by /api/mcras/predict/ (see mcras.inference); the
+# endpoints answer 503 while it is unset. Requests are micro-batched per
+# process, so run gunicorn with GUNICORN_THREADS > 1 to have concurrent
+# requests to batch.
+MCRAS_CHECKPOINT = os.environ.get('MCRAS_CHECKPOINT', '')
+MCRAS_BACKEND = os.environ.get('MCRAS_BACKEND', 'torchscript')
+MCRAS_QUANTIZE = os.environ.get('MCRAS_QUANTIZE', 'False') == 'True'
+MCRAS_MAX_BATCH_SIZE = int(os.environ.get('MCRAS_MAX_BATCH_SIZE', 32))
+MCRAS_MAX_BATCH_DELAY_MS = float(os.environ.get('MCRAS_MAX_BATCH_DELAY_MS', 5))
+MCRAS_BATCH_QUEUE_SIZE = int(os.environ.get('MCRAS_BATCH_QUEUE_SIZE', 1024))
+MCRAS_PREDICT_TIMEOUT_SECONDS = float(os.environ.get('MCRAS_PREDICT_TIMEOUT_SECONDS', 10))
+
+# -------------------------
+# Vector Index
+# -------------------------
+# ANN indexes behind /api/jobs/<id>/top-candidates/ and
+# /api/candidates/<id>/top-jobs/ (see screening/vector_index.py). Below
+# VECTOR_INDEX_IVF_MIN_SIZE documents search is an exact scan; above it
+# VECTOR_INDEX_NPROBE of ~sqrt(n) lists are read per query (raise it for
+# recall, lower it for latency). Saved rows are indexed by the scoring
+# worker, VECTOR_INDEX_BATCH at a time, and it compacts the journal once it
+# holds VECTOR_INDEX_MAX_JOURNAL writes.
+VECTOR_INDEX_DIR = os.environ.get('VECTOR_INDEX_DIR', str(BASE_DIR / 'cache' / 'vectors'))
+VECTOR_INDEX_NPROBE = int(os.environ.get('VECTOR_INDEX_NPROBE', 8))
+VECTOR_INDEX_IVF_MIN_SIZE = int(os.environ.get('VECTOR_INDEX_IVF_MIN_SIZE', 20000))
+VECTOR_INDEX_MAX_JOURNAL = int(os.environ.get('VECTOR_INDEX_MAX_JOURNAL', 5000))
+VECTOR_INDEX_BATCH = int(os.environ.get('VECTOR_INDEX_BATCH', 64))
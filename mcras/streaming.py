@@ -0,0 +1,87 @@
+from typing import NamedTuple
+
+import torch
+
+from .fused import FusedMCRAS
+
+
+class StreamState(NamedTuple):
+    """
+    Everything needed to continue a stream: the RNN hidden state(s) and the
+    running softmax-attention accumulators, per sample and channel.
+    """
+    hidden: object          # per-channel list of hx for MCRAS, one hx for FusedMCRAS
+    running_max: torch.Tensor   # (batch_size, num_channels, 1)
+    denominator: torch.Tensor   # (batch_size, num_channels, 1)
+    weighted_sum: torch.Tensor  # (batch_size, num_channels, hidden_size)
+    steps: int
+
+
+class StreamingMCRAS:
+    """
+    Incremental inference for MCRAS (or FusedMCRAS) on growing series.
+
+    Each call to `step` feeds only the new time steps: the RNNs continue
+    from the carried hidden state, and the attention softmax over time is
+    kept as a running max, denominator and weighted sum (online softmax),
+    so a tick costs O(1) in the length of the history. The logits equal
+    `model(x)` over everything fed since `init_state`, up to float rounding.
+
+    The window only grows; for a sliding window, start a new state and
+    replay the window.
+    """
+    def __init__(self, model):
+        self.model = model.eval()
+        self.fused = isinstance(model, FusedMCRAS)
+        self.num_channels = model.num_channels
+        self.hidden_size = model.hidden_size
+
+    def init_state(self, batch_size=1):
+        device = self.model.fc.weight.device
+        shape = (batch_size, self.num_channels, 1)
+        return StreamState(
+            hidden=None if self.fused else [None] * self.num_channels,
+            running_max=torch.full(shape, float('-inf'), device=device),
+            denominator=torch.zeros(shape, device=device),
+            weighted_sum=torch.zeros(batch_size, self.num_channels, self.hidden_size, device=device),
+            steps=0,
+        )
+
+    def _rnn(self, x, hidden):
+        # x: (batch_size, num_channels, k, input_size) -> (batch_size, num_channels, k, hidden_size)
+        batch_size, num_channels, k, input_size = x.size()
+        if self.fused:
+            packed = x.permute(0, 2, 1, 3).reshape(batch_size, k, num_channels * input_size)
+            rnn_out, hidden = self.model.rnn(packed, hidden)
+            return rnn_out.view(batch_size, k, num_channels, self.hidden_size).transpose(1, 2), hidden
+        outputs, new_hidden = [], []
+        for i in range(num_channels):
+            rnn_out, hx = self.model.rnns[i](x[:, i, :, :], hidden[i])
+            outputs.append(rnn_out.unsqueeze(1))
+            new_hidden.append(hx)
+        return torch.cat(outputs, dim=1), new_hidden
+
+    @torch.inference_mode()
+    def step(self, x, state=None):
+        """
+        Feed new time steps and return (logits, new state).
+
+        x: (batch_size, num_channels, input_size) for one tick or
+        (batch_size, num_channels, k, input_size) for k ticks at once.
+        """
+        if x.dim() == 3:
+            x = x.unsqueeze(2)
+        if state is None:
+            state = self.init_state(x.size(0))
+        rnn_out, hidden = self._rnn(x, state.hidden)
+
+        scores = torch.tanh(self.model.attention.attn(rnn_out))  # (batch_size, num_channels, k, 1)
+        running_max = torch.maximum(state.running_max, scores.amax(dim=2))
+        rescale = torch.exp(state.running_max - running_max)
+        weights = torch.exp(scores - running_max.unsqueeze(2))
+        denominator = state.denominator * rescale + weights.sum(dim=2)
+        weighted_sum = state.weighted_sum * rescale + (rnn_out * weights).sum(dim=2)
+
+        attn_out = (weighted_sum / denominator).reshape(x.size(0), -1)
+        logits = self.model.fc(attn_out)
+        return logits, StreamState(hidden, running_max, denominator, weighted_sum, state.steps + x.size(2))
@@ -0,0 +1,116 @@
+"""
+Training loop for MCRAS: Adam with cosine learning-rate decay,
+cross-entropy, gradient accumulation and per-epoch checkpoints that
+`train(..., resume=True)` continues from.
+
+Batches are (x, labels, lengths) as yielded by `mcras.data_loader`, or
+plain (x, labels); lengths are passed to the model so padding is skipped.
+"""
+import logging
+import os
+import time
+
+import torch
+import torch.nn as nn
+
+from .inference.checkpoint import save_checkpoint
+
+logger = logging.getLogger(__name__)
+
+
+def _set_epoch(loader, epoch):
+    sampler = getattr(loader, 'batch_sampler', None)
+    if hasattr(sampler, 'set_epoch'):
+        sampler.set_epoch(epoch)
+
+
+def _forward(model, batch, device):
+    x = batch[0].to(device, non_blocking=True)
+    lengths = batch[2] if len(batch) > 2 else None
+    return model(x, lengths)
+
+
+def evaluate(model, loader, device='cpu'):
+    """
+    Accuracy of `model` over `loader`.
+    """
+    model.eval()
+    correct = total = 0
+    with torch.inference_mode():
+        for batch in loader:
+            y = batch[1].to(device)
+            correct += (_forward(model, batch, device).argmax(dim=1) == y).sum().item()
+            total += y.size(0)
+    return correct / total if total else 0.0
+
+
+def load_training_state(path, model, optimizer, scheduler):
+    """
+    Restore a checkpoint written by `train`; returns (next epoch, history).
+    """
+    checkpoint = torch.load(path, map_location='cpu', weights_only=True)
+    if hasattr(model, 'load_mcras_state_dict'):
+        model.load_mcras_state_dict(checkpoint['model_state'])
+    else:
+        model.load_state_dict(checkpoint['model_state'])
+    optimizer.load_state_dict(checkpoint['optimizer_state'])
+    scheduler.load_state_dict(checkpoint['scheduler_state'])
+    return checkpoint['epoch'], checkpoint.get('history', [])
+
+
+def train(model, train_loader, val_loader=None, epochs=50, lr=0.001, accumulation_steps=1,
+          checkpoint_path=None, resume=False, grad_clip=None, device='cpu'):
+    """
+    Train `model` in place and return the per-epoch history.
+
+    Gradients are summed over `accumulation_steps` batches before each
+    optimizer step, so the effective batch is batch_size * accumulation_steps
+    while memory stays at one batch. With `checkpoint_path` the model,
+    optimizer and scheduler are saved after every epoch; `resume=True`
+    continues from that file when it exists.
+    """
+    model.to(device)
+    optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+    scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(optimizer, T_max=epochs)
+    criterion = nn.CrossEntropyLoss()
+
+    start_epoch, history = 0, []
+    if resume and checkpoint_path and os.path.exists(checkpoint_path):
+        start_epoch, history = load_training_state(checkpoint_path, model, optimizer, scheduler)
+        logger.info("Resuming from %s at epoch %d", checkpoint_path, start_epoch + 1)
+
+    for epoch in range(start_epoch, epochs):
+        _set_epoch(train_loader, epoch)
+        model.train()
+        started = time.perf_counter()
+        total_loss = samples = 0
+        optimizer.zero_grad(set_to_none=True)
+        num_batches = len(train_loader)
+        for step, batch in enumerate(train_loader):
+            y = batch[1].to(device, non_blocking=True)
+            loss = criterion(_forward(model, batch, device), y)
+            (loss / accumulation_steps).backward()
+            if (step + 1) % accumulation_steps == 0 or step + 1 == num_batches:
+                if grad_clip:
+                    nn.utils.clip_grad_norm_(model.parameters(), grad_clip)
+                optimizer.step()
+                optimizer.zero_grad(set_to_none=True)
+            total_loss += loss.item() * y.size(0)
+            samples += y.size(0)
+        scheduler.step()
+
+        record = {
+            'epoch': epoch + 1,
+            'train_loss': total_loss / samples if samples else 0.0,
+            'lr': optimizer.param_groups[0]['lr'],
+            'seconds': time.perf_counter() - started,
+        }
+        if val_loader is not None:
+            record['val_accuracy'] = evaluate(model, val_loader, device)
+        history.append(record)
+        logger.info("Epoch %d/%d: %s", epoch + 1, epochs, record)
+
+        if checkpoint_path:
+            save_checkpoint(checkpoint_path, model, optimizer_state=optimizer.state_dict(),
+                            scheduler_state=scheduler.state_dict(), epoch=epoch + 1, history=history)
+    return history
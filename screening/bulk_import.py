@@ -0,0 +1,555 @@
+# bulk_import.py
+"""
+Bulk candidate import from a ZIP archive of resumes, with an optional CSV
+manifest of names and emails.
+
+The archive is read member by member through its central directory and
+never unpacked: each resume is streamed (and hashed on the way) straight
+into storage under resumes/import-<id>/, text is extracted by a process pool of
+BULK_IMPORT_WORKERS, and results are consumed in archive order. Every
+BULK_IMPORT_BATCH_SIZE entries the batch's embeddings are computed in one
+call, its candidates and their `ScoringJob`s are written with
+`bulk_create` in one transaction together with the import's progress, and
+the new rows are added to the vector index after commit. Files in the
+import's directory that no candidate points at (partial copies of corrupt
+members, or entries a run that died mid-batch never committed) are
+deleted when the run starts and when it ends.
+
+Extracted candidates are queued straight at the score stage. An entry the
+pool can't extract still becomes a candidate, queued at the extract stage
+so the scoring worker retries it (counted as `failed`). Entries that are
+not imported at all (email already applied to the job, unsupported type,
+over BULK_IMPORT_MAX_ENTRY_BYTES, corrupt member) are counted as
+`skipped`; re-upload through /api/candidates/create/ to replace a resume.
+
+The manifest is the uploaded CSV, or BULK_IMPORT_MANIFEST_NAME at the top
+of the archive. It needs a `file` column naming the member (full path or
+bare file name) and may have `first_name`, `last_name`, `name` and `email`.
+
+Imports created through the API are claimed and run by
+`run_scoring_worker`; `manage.py import_candidates` runs one in the
+foreground.
+"""
+import csv
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import posixpath
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.validators import validate_email
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+from . import chunking, content_cache, vector_index
+from .embeddings import get_embeddings, seed as seed_embedding
+from .extraction import extract_bytes, extract_text
+from .models import Candidate, CandidateImport, ScoringJob
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+MANIFEST_FILE_COLUMNS = ("file", "filename", "resume")
+MAX_RECORDED_ERRORS = 200
+# Entries read ahead of the one being committed, per extraction process.
+READ_AHEAD_PER_WORKER = 4
+
+
+class ArchiveError(ValueError):
+    """The archive or manifest can't be imported at all."""
+
+
+def default_batch_size() -> int:
+    return max(1, int(getattr(settings, "BULK_IMPORT_BATCH_SIZE", 200)))
+
+
+def default_workers() -> int:
+    return max(1, int(getattr(settings, "BULK_IMPORT_WORKERS", min(os.cpu_count() or 1, 4))))
+
+
+def max_entry_bytes() -> int:
+    return int(getattr(settings, "BULK_IMPORT_MAX_ENTRY_BYTES", 20 * 1024 * 1024))
+
+
+def max_entries() -> int:
+    return int(getattr(settings, "BULK_IMPORT_MAX_ENTRIES", 20000))
+
+
+def manifest_name() -> str:
+    return str(getattr(settings, "BULK_IMPORT_MANIFEST_NAME", "manifest.csv"))
+
+
+# -- archive and manifest --------------------------------------------------
+
+def read_manifest(data: bytes) -> dict:
+    """
+    {lower-cased member path or file name: {"first_name", "last_name",
+    "email"}} from manifest CSV bytes.
+    """
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        raise ArchiveError(f"manifest is not UTF-8: {e}") from e
+    reader = csv.DictReader(io.StringIO(text, newline=""))
+    columns = {(c or "").strip().lower(): c for c in reader.fieldnames or []}
+    file_column = next((columns[c] for c in MANIFEST_FILE_COLUMNS if c in columns), None)
+    if file_column is None:
+        raise ArchiveError(f"manifest needs one of the columns {', '.join(MANIFEST_FILE_COLUMNS)}")
+
+    def value(row, column):
+        return (row.get(columns[column]) or "").strip() if column in columns else ""
+
+    rows = {}
+    for row in reader:
+        key = (row.get(file_column) or "").strip().replace("\\", "/").lower()
+        if not key:
+            continue
+        first_name, last_name = value(row, "first_name"), value(row, "last_name")
+        if not (first_name or last_name) and value(row, "name"):
+            first_name, _, last_name = value(row, "name").partition(" ")
+        rows[key] = {"first_name": first_name, "last_name": last_name.strip(), "email": value(row, "email")}
+    return rows
+
+
+def archive_entries(archive: zipfile.ZipFile):
+    """
+    Members to import, in archive order: files only, without macOS resource
+    forks, hidden files or the manifest itself.
+    """
+    entries = []
+    for info in archive.infolist():
+        base = posixpath.basename(info.filename)
+        if info.is_dir() or info.filename.startswith("__MACOSX/") or base.startswith("."):
+            continue
+        if info.filename.lower() == manifest_name().lower():
+            continue
+        entries.append(info)
+    return entries
+
+
+class _HashingReader:
+    """
+    Read-only file wrapper computing the sha256 of what passes through it,
+    so a member is hashed while it is copied into storage.
+    """
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.sha256 = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = self.fileobj.read(size)
+        self.sha256.update(data)
+        return data
+
+
+class _InlineExecutor:
+    """
+    `ProcessPoolExecutor` stand-in that runs tasks on submit, for
+    BULK_IMPORT_WORKERS = 1.
+    """
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+class _Entry:
+    def __init__(self, position, info, identity):
+        self.position = position
+        self.name = info.filename
+        self.first_name = identity.get("first_name", "")[:120]
+        self.last_name = identity.get("last_name", "")[:120]
+        self.email = identity.get("email", "")
+        self.stored = None
+        self.digest = None
+        self.text = None
+        self.vector = None
+        self.cached = False
+        self.future = None
+        self.error = None
+        self.skipped = None
+
+
+# -- import ----------------------------------------------------------------
+
+class BulkImporter:
+    """
+    Runs one `CandidateImport` from `archive` (path or seekable binary file)
+    and optional `manifest` bytes. `progress(record)` is called after each
+    committed batch; a true `stop()` ends the run after the current batch,
+    leaving the import pending to resume.
+    """
+    def __init__(self, record: CandidateImport, archive, manifest: bytes = None, batch_size: int = None,
+                 workers: int = None, progress=None, stop=None):
+        self.record = record
+        self.archive = archive
+        self.manifest = manifest
+        self.batch_size = batch_size or default_batch_size()
+        self.workers = workers or default_workers()
+        self.progress = progress
+        self.stop = stop
+        self.resume_field = Candidate._meta.get_field("resume")
+        self.max_attempts = getattr(settings, "SCORING_MAX_ATTEMPTS", 3)
+        self.batch = []
+        self.pool = None
+
+    def run(self) -> CandidateImport:
+        record = self.record
+        with zipfile.ZipFile(self.archive) as archive:
+            self.zip = archive
+            manifest = self.manifest if self.manifest is not None else self._inner_manifest()
+            self.rows = read_manifest(manifest) if manifest else {}
+            entries = archive_entries(archive)
+            if len(entries) > max_entries():
+                raise ArchiveError(f"archive has {len(entries)} files; the limit is {max_entries()}")
+            record.total = len(entries)
+            record.save(update_fields=["total", "updated_at"])
+            self.emails = set(
+                Candidate.objects.filter(applied_to_id=record.job_id).exclude(email="")
+                .values_list("email", flat=True)
+            )
+            self._discard_uncommitted()
+            self.pool = self._make_pool()
+            try:
+                self._run(entries)
+            finally:
+                self.pool.shutdown(wait=True, cancel_futures=True)
+            self._discard_uncommitted()
+        return record
+
+    def _run(self, entries):
+        read_ahead = self.workers * READ_AHEAD_PER_WORKER
+        pending = deque()
+        for position in range(self.record.processed, len(entries)):
+            if self.stop is not None and not self.batch and self.stop():
+                break
+            pending.append(self._start(position, entries[position]))
+            while len(pending) > read_ahead:
+                self._finish(pending.popleft())
+        while pending:
+            self._finish(pending.popleft())
+        self._flush()
+
+    def _directory(self) -> str:
+        return self.resume_field.generate_filename(None, f"import-{self.record.pk}")
+
+    def _discard_uncommitted(self):
+        """
+        Delete the files in this import's directory that no candidate
+        points at.
+        """
+        directory = self._directory()
+        try:
+            _, files = default_storage.listdir(directory)
+        except (FileNotFoundError, NotImplementedError):
+            return
+        committed = set(Candidate.objects.filter(resume__startswith=directory + "/")
+                        .values_list("resume", flat=True))
+        orphans = [name for name in (posixpath.join(directory, f) for f in files) if name not in committed]
+        for name in orphans:
+            default_storage.delete(name)
+        if orphans:
+            logger.info("Import %s: deleted %s files left by an interrupted run", self.record.pk, len(orphans))
+
+    def _inner_manifest(self) -> bytes:
+        wanted = manifest_name().lower()
+        for info in self.zip.infolist():
+            if info.filename.lower() == wanted:
+                with self.zip.open(info) as f:
+                    return f.read()
+        return b""
+
+    def _make_pool(self):
+        if self.workers <= 1:
+            return _InlineExecutor()
+        return ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def _submit(self, fn, *args):
+        try:
+            return self.pool.submit(fn, *args)
+        except BrokenProcessPool:
+            # A pathological file took a child down; start over with a fresh pool.
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = self._make_pool()
+            return self.pool.submit(fn, *args)
+
+    def _start(self, position, info) -> _Entry:
+        """
+        Copy the member into storage and hand it to the extraction pool
+        (or take its text from the content cache).
+        """
+        base = posixpath.basename(info.filename)
+        identity = self.rows.get(info.filename.lower()) or self.rows.get(base.lower()) or {}
+        entry = _Entry(position, info, identity)
+        email = entry.email.lower()
+        if email:
+            try:
+                validate_email(email)
+            except ValidationError:
+                self._note(entry.name, f"invalid email {entry.email!r}; imported without one")
+                email = ""
+        entry.email = email
+
+        if not base.lower().endswith(SUPPORTED_EXTENSIONS):
+            entry.skipped = "unsupported file type"
+        elif info.file_size > max_entry_bytes():
+            entry.skipped = f"larger than {max_entry_bytes()} bytes"
+        elif email and email in self.emails:
+            entry.skipped = f"{email} has already applied to this job"
+        if entry.skipped:
+            return entry
+
+        try:
+            with self.zip.open(info) as member:
+                reader = _HashingReader(member)
+                name = posixpath.join(self._directory(), default_storage.get_valid_name(base))
+                entry.stored = default_storage.save(name, File(reader, name=base),
+                                                    max_length=self.resume_field.max_length)
+        except (zipfile.BadZipFile, OSError, ValueError, NotImplementedError) as e:
+            # Storage may keep a partial copy; `_discard_uncommitted` removes it.
+            entry.skipped = f"unreadable: {type(e).__name__}: {e}"
+            return entry
+        entry.digest = reader.sha256.hexdigest()
+        if email:
+            self.emails.add(email)
+
+        cached = content_cache.get(entry.digest)
+        if cached is not None:
+            entry.text, entry.vector = cached
+            entry.cached = True
+            return entry
+        try:
+            path = default_storage.path(entry.stored)
+        except NotImplementedError:
+            path = None
+        if path:
+            entry.future = self._submit(extract_text, path)
+        else:
+            with default_storage.open(entry.stored, "rb") as f:
+                entry.future = self._submit(extract_bytes, f.read(), entry.stored)
+        return entry
+
+    def _finish(self, entry: _Entry):
+        if entry.future is not None:
+            try:
+                entry.text = entry.future.result() or ""
+            except BrokenProcessPool as e:
+                entry.error = f"extraction process died: {e}"
+            except Exception as e:
+                entry.error = f"{type(e).__name__}: {e}"
+            entry.future = None
+        self.batch.append(entry)
+        if len(self.batch) >= self.batch_size:
+            self._flush()
+
+    def _embed(self, entries):
+        """
+        Encode the batch's new texts in one call and remember text and
+        vector by file hash, as `tasks.run_extract` does for single uploads.
+        With EMBEDDING_CHUNKING on only the windows are used, and `_index`
+        encodes those.
+        """
+        extracted = [e for e in entries if e.stored and e.error is None]
+        texts = [e for e in extracted if not e.cached and e.text] if chunking.mode() == "off" else []
+        if texts:
+            try:
+                for entry, vector in zip(texts, get_embeddings([e.text for e in texts])):
+                    entry.vector = vector
+            except Exception as e:
+                logger.warning("Embedding %s imported resumes failed: %s", len(texts), e)
+        for entry in extracted:
+            if not entry.cached and entry.text:
+                content_cache.put(entry.digest, entry.text, entry.vector)
+            elif entry.text and entry.vector is not None:
+                seed_embedding(entry.text, entry.vector)
+
+    def _flush(self):
+        entries, self.batch = self.batch, []
+        if not entries:
+            return
+        self._embed(entries)
+        record = self.record
+        try:
+            with transaction.atomic():
+                created = self._create([e for e in entries if e.stored])
+                ScoringJob.objects.bulk_create([
+                    ScoringJob(
+                        candidate=candidate,
+                        stage=ScoringJob.STAGE_SCORE if entry.error is None else ScoringJob.STAGE_EXTRACT,
+                        max_attempts=self.max_attempts,
+                    )
+                    for entry, candidate in created
+                ])
+                for entry in entries:
+                    if entry.skipped:
+                        record.skipped += 1
+                        self._note(entry.name, entry.skipped)
+                    elif entry.error:
+                        record.failed += 1
+                        self._note(entry.name, f"extraction failed, queued for retry: {entry.error}")
+                record.created += len(created)
+                record.processed = entries[-1].position + 1
+                record.save(update_fields=["processed", "created", "skipped", "failed", "errors", "updated_at"])
+                docs = [(candidate.pk, candidate.parsed_text) for _, candidate in created]
+                transaction.on_commit(lambda: self._index(docs))
+        except Exception:
+            for entry in entries:
+                if entry.stored:
+                    default_storage.delete(entry.stored)
+            raise
+        logger.info("Import %s: %s/%s entries, %s created, %s skipped, %s failed", record.pk,
+                    record.processed, record.total, record.created, record.skipped, record.failed)
+        if self.progress is not None:
+            self.progress(record)
+
+    def _create(self, entries):
+        """
+        `bulk_create` the batch's candidates; returns [(entry, candidate)].
+        """
+        rows = [
+            (entry, Candidate(
+                first_name=entry.first_name,
+                last_name=entry.last_name,
+                email=entry.email,
+                resume=entry.stored,
+                applied_to_id=self.record.job_id,
+                parsed_text=entry.text or "",
+                verdict="Pending",
+            ))
+            for entry in entries
+        ]
+        try:
+            with transaction.atomic():
+                Candidate.objects.bulk_create([candidate for _, candidate in rows])
+        except IntegrityError:
+            # A single upload for one of these emails landed mid-import;
+            # insert one by one so only that entry is dropped.
+            kept = []
+            for entry, candidate in rows:
+                try:
+                    with transaction.atomic():
+                        Candidate.objects.bulk_create([candidate])
+                    kept.append((entry, candidate))
+                except IntegrityError:
+                    entry.skipped = f"{entry.email} has already applied to this job"
+                    default_storage.delete(entry.stored)
+                    entry.stored = None
+            rows = kept
+        if rows and rows[0][1].pk is None:
+            # Backends that can't return ids from a bulk insert (MySQL).
+            ids = dict(Candidate.objects.filter(
+                applied_to_id=self.record.job_id, resume__in=[entry.stored for entry, _ in rows]
+            ).values_list("resume", "pk"))
+            for entry, candidate in rows:
+                candidate.pk = ids[entry.stored]
+        return rows
+
+    def _index(self, docs):
+        # `bulk_create` sends no post_save, so the signals never see these rows.
+        try:
+            vector_index.index_documents(vector_index.CANDIDATES, docs)
+        except Exception as e:
+            logger.exception("Could not index %s imported candidates: %s", len(docs), e)
+
+    def _note(self, name, message):
+        errors = self.record.errors
+        if len(errors) < MAX_RECORDED_ERRORS:
+            errors.append({"file": name, "error": message})
+
+
+def run_import(record: CandidateImport, archive=None, manifest: bytes = None, batch_size: int = None,
+               workers: int = None, progress=None, stop=None) -> CandidateImport:
+    """
+    Run (or resume) `record`, reading `archive` or else `record.archive`,
+    and `manifest` or else `record.manifest`. Failures are recorded on
+    the import and re-raised.
+    """
+    record.status = CandidateImport.STATUS_RUNNING
+    record.last_error = ""
+    record.save(update_fields=["status", "last_error", "updated_at"])
+    opened = None
+    try:
+        if archive is None:
+            opened = archive = record.archive.open("rb")
+        if manifest is None and record.manifest:
+            with record.manifest.open("rb") as f:
+                manifest = f.read()
+        BulkImporter(record, archive, manifest, batch_size=batch_size, workers=workers,
+                     progress=progress, stop=stop).run()
+    except Exception as e:
+        record.status = CandidateImport.STATUS_FAILED
+        record.last_error = f"{type(e).__name__}: {e}"[:2000]
+        record.finished_at = timezone.now()
+        record.save(update_fields=["status", "last_error", "finished_at", "updated_at"])
+        raise
+    finally:
+        if opened is not None:
+            opened.close()
+    if record.processed < record.total:
+        record.status = CandidateImport.STATUS_PENDING
+    else:
+        record.status = CandidateImport.STATUS_DONE
+        record.finished_at = timezone.now()
+    record.save(update_fields=["status", "finished_at", "updated_at"])
+    return record
+
+
+# -- queue (run_scoring_worker) --------------------------------------------
+
+def claim_next():
+    """
+    Atomically move the oldest pending import to running; returns its id.
+    Imports started by `manage.py import_candidates` have no stored archive
+    and can only be resumed from the command line, so they are left alone.
+    """
+    for import_id in (CandidateImport.objects.filter(status=CandidateImport.STATUS_PENDING).exclude(archive="")
+                      .order_by("created_at", "id").values_list("id", flat=True)[:5]):
+        claimed = CandidateImport.objects.filter(id=import_id, status=CandidateImport.STATUS_PENDING).update(
+            status=CandidateImport.STATUS_RUNNING, updated_at=timezone.now()
+        )
+        if claimed:
+            return import_id
+    return None
+
+
+def requeue_stale(timeout_seconds: int) -> int:
+    """
+    Return imports left in `running` by a crashed worker to the queue;
+    they resume after their last committed batch.
+    """
+    cutoff = timezone.now() - timedelta(seconds=timeout_seconds)
+    return CandidateImport.objects.filter(status=CandidateImport.STATUS_RUNNING, updated_at__lt=cutoff).update(
+        status=CandidateImport.STATUS_PENDING
+    )
+
+
+def run_claimed(import_id: int, stop=None):
+    """
+    Thread target for the scoring worker: run a claimed import, logging
+    instead of raising.
+    """
+    close_old_connections()
+    try:
+        record = CandidateImport.objects.get(id=import_id)
+        run_import(record, stop=stop)
+        logger.info("Import %s -> %s", import_id, record.status)
+    except Exception as e:
+        logger.exception("Import %s failed: %s", import_id, e)
+    finally:
+        close_old_connections()
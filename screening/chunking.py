@@ -0,0 +1,162 @@
+# chunking.py
+"""
+Section-aware chunked embeddings for documents longer than the sentence
+model's window (all-MiniLM-L6-v2 stops reading after 256 word pieces,
+roughly the first page of a resume).
+
+Text is split at section headings ("Experience", "SKILLS", "Requirements:"),
+long sections are cut into overlapping word windows, and each window is
+embedded through `embeddings.get_embeddings`, which caches by content:
+editing one section only re-encodes that section's windows. Windows from
+many documents go to the model in one batched call.
+
+EMBEDDING_CHUNKING picks how windows become a similarity:
+
+* "off": one embedding of the whole (truncated) text, as before;
+* "mean" / "max": mean- or max-pooled window vectors, compared by cosine;
+* "best": every JD window is matched to its closest resume window and the
+  matches are averaged, so a resume scores on its most relevant sections.
+
+Changing the mode changes every semantic score; rescore affected jobs and
+run `manage.py vector_index --rebuild` afterwards.
+"""
+import re
+
+import numpy as np
+from django.conf import settings
+
+MODES = ("off", "mean", "max", "best")
+
+SECTION_HEADINGS = {
+    "summary", "profile", "objective", "about", "about me", "experience", "work experience",
+    "professional experience", "employment", "employment history", "education", "skills",
+    "technical skills", "core skills", "projects", "certifications", "publications", "awards",
+    "languages", "interests", "references", "volunteering", "responsibilities", "requirements",
+    "qualifications", "preferred qualifications", "nice to have", "what you'll do", "benefits",
+    "about the role", "about you", "about us",
+}
+HEADING_MAX_WORDS = 5
+MIN_CHUNK_WORDS = 40
+
+_BULLET = re.compile(r"^[\s\-\*•·▪●◦]+")
+
+
+def mode() -> str:
+    value = str(getattr(settings, "EMBEDDING_CHUNKING", "off")).lower()
+    return value if value in MODES else "off"
+
+
+def _is_heading(line: str) -> bool:
+    words = line.split()
+    if not words or len(words) > HEADING_MAX_WORDS or _BULLET.match(line):
+        return False
+    bare = line.rstrip(":").strip().lower()
+    if bare in SECTION_HEADINGS:
+        return True
+    letters = [c for c in line if c.isalpha()]
+    return len(letters) >= 3 and (line.isupper() or line.endswith(":"))
+
+
+def split_sections(text: str):
+    """
+    [(heading, body)] in document order; text before the first heading has
+    an empty heading.
+    """
+    sections, heading, body = [], "", []
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if _is_heading(line):
+            if body or heading:
+                sections.append((heading, " ".join(body)))
+            heading, body = line.rstrip(":").strip(), []
+        elif line:
+            body.append(line)
+    if body or heading:
+        sections.append((heading, " ".join(body)))
+    return sections
+
+
+def chunk_text(text: str, max_words: int = None, overlap: int = None, max_chunks: int = None):
+    """
+    Windows of at most `max_words` words, never spanning two sections
+    (small neighbouring sections are merged). Each window starts with its
+    section heading.
+    """
+    max_words = max_words or getattr(settings, "EMBEDDING_CHUNK_WORDS", 150)
+    overlap = min(overlap if overlap is not None else getattr(settings, "EMBEDDING_CHUNK_OVERLAP", 25),
+                  max_words // 2)
+    max_chunks = max_chunks or getattr(settings, "EMBEDDING_MAX_CHUNKS", 32)
+
+    merged = []
+    for heading, body in split_sections(text):
+        words = (heading.split() + body.split()) if heading else body.split()
+        if merged and len(merged[-1]) < MIN_CHUNK_WORDS and len(merged[-1]) + len(words) <= max_words:
+            merged[-1].extend(words)
+        elif words:
+            merged.append(words)
+
+    chunks = []
+    stride = max_words - overlap
+    for words in merged:
+        for start in range(0, max(len(words) - overlap, 1), stride):
+            chunks.append(" ".join(words[start:start + max_words]))
+    return chunks[:max_chunks] or [(text or "").strip()]
+
+
+def _unit(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / (np.linalg.norm(vectors, axis=-1, keepdims=True) + 1e-12)
+
+
+def pool(vectors, how: str = "mean"):
+    """
+    One unit vector from a document's (num_chunks, dim) window vectors.
+    """
+    vectors = _unit(vectors)
+    pooled = vectors.max(axis=0) if how == "max" else vectors.mean(axis=0)
+    return _unit(pooled)
+
+
+def chunk_embeddings(texts):
+    """
+    [(num_chunks, dim) array] per text, all windows encoded in one call.
+    """
+    from .embeddings import get_embeddings
+    chunked = [chunk_text(text) for text in texts]
+    flat = [chunk for chunks in chunked for chunk in chunks]
+    vectors = get_embeddings(flat)
+    bounds = np.cumsum([0] + [len(chunks) for chunks in chunked])
+    return [vectors[bounds[i]:bounds[i + 1]] for i in range(len(texts))]
+
+
+def document_vectors(texts) -> np.ndarray:
+    """
+    One vector per text under the current mode ("best" pools by mean),
+    for places that need a single vector such as the ANN index.
+    """
+    from .embeddings import get_embeddings
+    how = mode()
+    if how == "off":
+        return get_embeddings(texts)
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.stack([pool(vectors, "max" if how == "max" else "mean") for vectors in chunk_embeddings(texts)])
+
+
+def cosine_similarities(jd_text: str, texts) -> np.ndarray:
+    """
+    Cosine similarity in [-1, 1] of `jd_text` to each of `texts` under the
+    current mode, with every window of every text encoded in one call.
+    """
+    how = mode()
+    if how == "off":
+        from .embeddings import get_embeddings
+        vectors = _unit(get_embeddings([jd_text, *texts]))
+        return vectors[1:] @ vectors[0]
+    jd_chunks, *doc_chunks = chunk_embeddings([jd_text, *texts])
+    if how == "best":
+        jd_chunks = _unit(jd_chunks)
+        return np.array([(jd_chunks @ _unit(chunks).T).max(axis=1).mean() for chunks in doc_chunks],
+                        dtype=np.float32)
+    jd_vector = pool(jd_chunks, how)
+    return np.array([pool(chunks, how) @ jd_vector for chunks in doc_chunks], dtype=np.float32)
@@ -0,0 +1,202 @@
+# content_cache.py
+"""
+On-disk cache of what a resume file yields, keyed by sha256 of its bytes.
+
+A re-upload of the same file (the email+job upsert) or the same file sent to
+several jobs skips extraction and encoding: `run_extract` gets the text back
+from here and the embedding is put straight into the embedding store.
+
+Each entry is a single `.npz` under CONTENT_CACHE_DIR. The embedding is
+tagged with the `embeddings.store_name()` it was made under and dropped on
+read when the backend has changed since, so old vectors never reach the
+new store. Reading an entry
+bumps its mtime, and when the directory grows past CONTENT_CACHE_MAX_BYTES
+the least recently used entries are deleted. Hit/miss/store/eviction
+counters are kept per process (`stats()`) and logged on every lookup.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+
+import numpy as np
+from django.conf import settings
+
+from . import embeddings
+
+logger = logging.getLogger(__name__)
+
+# Bump when extraction changes so stale text isn't served.
+EXTRACTOR_VERSION = 1
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.stores = self.evictions = 0
+
+    def incr(self, name: str, n: int = 1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "stores": self.stores, "evictions": self.evictions}
+
+
+STATS = CacheStats()
+
+# Running estimate of the directory size in this process, so `put` only
+# rescans the directory when it might actually be over budget.
+_approx_bytes = None
+_approx_lock = threading.Lock()
+
+
+def cache_dir() -> str:
+    return str(getattr(settings, "CONTENT_CACHE_DIR", os.path.join(settings.BASE_DIR, "cache", "content")))
+
+
+def max_bytes() -> int:
+    return int(getattr(settings, "CONTENT_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+
+def file_digest(file_field) -> str:
+    """
+    sha256 of a Django file, read in chunks.
+    """
+    file_field.open("rb")
+    try:
+        file_field.seek(0)
+    except Exception:
+        pass
+    digest = hashlib.sha256()
+    for chunk in file_field.chunks(HASH_CHUNK_BYTES):
+        digest.update(chunk)
+    try:
+        file_field.seek(0)
+    except Exception:
+        pass
+    return digest.hexdigest()
+
+
+def _entry_path(digest: str) -> str:
+    return os.path.join(cache_dir(), digest[:2], f"{digest}.npz")
+
+
+def get(digest: str):
+    """
+    Return (text, embedding or None) for `digest`, or None on a miss. The
+    embedding is None when it was made by another embedding backend.
+    """
+    path = _entry_path(digest)
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != EXTRACTOR_VERSION:
+                raise KeyError("version")
+            text = data["text"].tobytes().decode("utf-8")
+            if not text:
+                # Written before empty results stopped being cached.
+                raise KeyError("text")
+            embedding = data["embedding"] if data["embedding"].size else None
+            if "store" not in data.files or str(data["store"]) != embeddings.store_name():
+                embedding = None
+        os.utime(path)
+    except (OSError, KeyError, ValueError):
+        STATS.incr("misses")
+        logger.info("Content cache miss for %s (%s)", digest[:12], STATS.as_dict())
+        return None
+    STATS.incr("hits")
+    logger.info("Content cache hit for %s (%s)", digest[:12], STATS.as_dict())
+    return text, embedding
+
+
+def put(digest: str, text: str, embedding=None):
+    """
+    Remember what the file `digest` yielded. Empty text isn't stored: it
+    may come from a transient extraction failure.
+    """
+    global _approx_bytes
+    if not text:
+        return
+    path = _entry_path(digest)
+    tmp = None
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so concurrent readers never see half an entry.
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez_compressed(
+                f,
+                version=np.array(EXTRACTOR_VERSION),
+                text=np.frombuffer(text.encode("utf-8"), dtype=np.uint8),
+                embedding=np.asarray(embedding if embedding is not None else [], dtype=np.float32),
+                store=np.array(embeddings.store_name()),
+            )
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning("Could not write content cache entry %s: %s", digest[:12], e)
+        if tmp and os.path.exists(tmp):
+            os.remove(tmp)
+        return
+    STATS.incr("stores")
+    with _approx_lock:
+        if _approx_bytes is None:
+            _approx_bytes = usage()["bytes"]
+        else:
+            _approx_bytes += os.path.getsize(path)
+        over = _approx_bytes > max_bytes()
+    if over:
+        # Trim to 90% so the next few stores don't rescan straight away.
+        evict(int(max_bytes() * 0.9))
+
+
+def _entries():
+    root = cache_dir()
+    if not os.path.isdir(root):
+        return []
+    entries = []
+    for shard in os.scandir(root):
+        if not shard.is_dir():
+            continue
+        for entry in os.scandir(shard.path):
+            if entry.name.endswith(".npz"):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+    return entries
+
+
+def usage() -> dict:
+    entries = _entries()
+    return {"entries": len(entries), "bytes": sum(size for _, size, _ in entries), "max_bytes": max_bytes()}
+
+
+def evict(limit: int = None) -> int:
+    """
+    Delete least recently used entries until the cache fits in `limit`
+    bytes (default CONTENT_CACHE_MAX_BYTES). Returns the number removed.
+    """
+    global _approx_bytes
+    limit = max_bytes() if limit is None else limit
+    entries = _entries()
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= limit:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    if removed:
+        STATS.incr("evictions", removed)
+    with _approx_lock:
+        _approx_bytes = total
+    return removed
+
+
+def stats() -> dict:
+    return {**STATS.as_dict(), **usage()}
@@ -0,0 +1,248 @@
+# embedding_backends.py
+"""
+Sentence-embedding backends behind the `SentenceTransformer.encode`
+contract: `encode(texts, batch_size=32, convert_to_numpy=True,
+normalize_embeddings=False)` returns float32 (len(texts), dim), or (dim,)
+for a single string.
+
+* "torch": sentence-transformers in float32, the reference;
+* "onnx": the same transformer exported to ONNX and run by ONNX Runtime,
+  optionally with int8 weights, with tokenisation by `tokenizers` and the
+  pooling/normalisation done in numpy. No torch import at run time, so a
+  worker's resident memory is the runtime plus the weights.
+
+`export_onnx` writes the files the ONNX backend loads (it needs torch,
+sentence-transformers and the `onnx` package; serving needs only
+`onnxruntime` and `tokenizers`). `parity_report` compares two backends on
+cosine similarity, the quantity `semantic_score` is built on.
+
+No Django imports, so streamlit_app.py can use this module too.
+"""
+import json
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "onnx")
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+
+ONNX_FILE = "model.onnx"
+ONNX_INT8_FILE = "model.int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+CONFIG_FILE = "embedding_config.json"
+ONNX_OPSET = 17
+# Hugging Face model_type -> onnxruntime.transformers optimizer model_type.
+FUSABLE_MODEL_TYPES = {"bert": "bert", "roberta": "bert"}
+
+PARITY_TEXTS = [
+    "Senior Python developer with Django, PostgreSQL and AWS experience.",
+    "Built data pipelines in Spark and Airflow; led a team of five engineers.",
+    "Registered nurse with ICU experience and BLS certification.",
+    "Frontend engineer: React, TypeScript, accessibility and design systems.",
+    "Looking for a backend engineer to own our payments APIs.",
+    "Accountant familiar with IFRS, month-end close and SAP.",
+    "Machine learning engineer, PyTorch, model serving and MLOps.",
+    "Retail store manager responsible for staffing and inventory.",
+]
+
+
+class SentenceTransformerBackend:
+    name = "torch"
+    # Appended to the model name vectors are stored under (embeddings.py).
+    store_suffix = ""
+
+    def __init__(self, model_name: str = DEFAULT_MODEL, threads: int = None):
+        import torch
+        from sentence_transformers import SentenceTransformer
+        if threads:
+            torch.set_num_threads(threads)
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, normalize_embeddings=False):
+        return np.asarray(self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True,
+                                            normalize_embeddings=normalize_embeddings), dtype=np.float32)
+
+
+class OnnxBackend:
+    name = "onnx"
+
+    def __init__(self, model_dir: str, quantized: bool = False, threads: int = None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, CONFIG_FILE)) as f:
+            self.config = json.load(f)
+        path = os.path.join(model_dir, ONNX_INT8_FILE if quantized else ONNX_FILE)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found; run `manage.py export_embedding_model`")
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.quantized = quantized
+        self.store_suffix = "-int8" if quantized else ""
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.config["pad_id"], pad_token=self.config["pad_token"])
+
+    def _pool(self, token_embeddings, mask):
+        pooling = self.config["pooling"]
+        if pooling == "cls":
+            return token_embeddings[:, 0]
+        mask = mask[:, :, None].astype(np.float32)
+        if pooling == "max":
+            return np.where(mask > 0, token_embeddings, -1e9).max(axis=1)
+        return (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+    def _encode_batch(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        columns = {
+            "input_ids": [e.ids for e in encodings],
+            "attention_mask": [e.attention_mask for e in encodings],
+            "token_type_ids": [e.type_ids for e in encodings],
+        }
+        feeds = {name: np.asarray(columns[name], dtype=np.int64) for name in self.input_names}
+        token_embeddings = self.session.run(None, feeds)[0]
+        return self._pool(token_embeddings, np.asarray(columns["attention_mask"]))
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, normalize_embeddings=False):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        if not texts:
+            return np.zeros((0, self.config["dim"]), dtype=np.float32)
+        # Longest first, like sentence-transformers, so batches pad little.
+        order = np.argsort([-len(t) for t in texts], kind="stable")
+        out = np.empty((len(texts), self.config["dim"]), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            rows = order[start:start + batch_size]
+            out[rows] = self._encode_batch([texts[i] for i in rows])
+        if self.config["normalize"] or normalize_embeddings:
+            out /= np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-12)
+        return out[0] if single else out
+
+
+def load_backend(name: str = "torch", model_name: str = DEFAULT_MODEL, onnx_dir: str = None,
+                 quantized: bool = False, threads: int = None):
+    if name == "torch":
+        return SentenceTransformerBackend(model_name, threads=threads)
+    if name == "onnx":
+        return OnnxBackend(onnx_dir or os.path.join("models", "onnx", model_name), quantized=quantized,
+                           threads=threads)
+    raise ValueError(f"Unknown embedding backend {name!r}; expected one of {BACKENDS}")
+
+
+def _pooling_mode(model) -> str:
+    for module in model:
+        if type(module).__name__ != "Pooling":
+            continue
+        config = module.get_config_dict()
+        mode = config.get("pooling_mode")
+        if isinstance(mode, str):
+            return mode.replace("_tokens", "").replace("_token", "")
+        for name in ("cls", "max", "mean"):
+            if config.get(f"pooling_mode_{name}_token") or config.get(f"pooling_mode_{name}_tokens"):
+                return name
+    return "mean"
+
+
+def export_onnx(model_name: str = DEFAULT_MODEL, out_dir: str = None, quantize: bool = True) -> str:
+    """
+    Export `model_name`'s transformer to `out_dir` (fp32, plus int8 with
+    `quantize`), with its tokenizer and pooling config. Returns out_dir.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    out_dir = out_dir or os.path.join("models", "onnx", os.path.basename(model_name.rstrip("/")))
+    os.makedirs(out_dir, exist_ok=True)
+    model = SentenceTransformer(model_name, device="cpu")
+    extra = [type(m).__name__ for m in model if type(m).__name__ not in ("Transformer", "Pooling", "Normalize")]
+    if extra:
+        raise ValueError(f"Can't export {model_name}: modules {extra} have no ONNX counterpart here")
+    transformer = model[0].auto_model.eval()
+    if hasattr(transformer, "set_attn_implementation"):
+        # Eager attention exports as MatMul/Softmax, which onnxruntime fuses
+        # into its Attention kernel; the SDPA graph is left unfused.
+        transformer.set_attn_implementation("eager")
+    tokenizer = model.tokenizer
+    names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in tokenizer.model_input_names]
+
+    class TokenEmbeddings(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.transformer = transformer
+
+        def forward(self, *inputs):
+            return self.transformer(**dict(zip(names, inputs))).last_hidden_state
+
+    sample = tokenizer(["an example sentence", "another one"], padding=True, return_tensors="pt")
+    dynamic = {name: {0: "batch", 1: "sequence"} for name in [*names, "token_embeddings"]}
+    with torch.inference_mode():
+        torch.onnx.export(TokenEmbeddings(), tuple(sample[n] for n in names), os.path.join(out_dir, ONNX_FILE),
+                          input_names=names, output_names=["token_embeddings"], dynamic_axes=dynamic,
+                          opset_version=ONNX_OPSET, dynamo=False)
+    _optimize(os.path.join(out_dir, ONNX_FILE), transformer.config)
+    tokenizer.backend_tokenizer.save(os.path.join(out_dir, TOKENIZER_FILE))
+    config = {
+        "model_name": model_name,
+        "dim": int(transformer.config.hidden_size),
+        "max_seq_length": model.max_seq_length,
+        "pooling": _pooling_mode(model),
+        "normalize": any(type(module).__name__ == "Normalize" for module in model),
+        "pad_id": tokenizer.pad_token_id,
+        "pad_token": tokenizer.pad_token,
+    }
+    with open(os.path.join(out_dir, CONFIG_FILE), "w") as f:
+        json.dump(config, f, indent=2)
+
+    if quantize:
+        import onnx
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(os.path.join(out_dir, ONNX_FILE), os.path.join(out_dir, ONNX_INT8_FILE),
+                         weight_type=QuantType.QInt8,
+                         # Shape inference can't type the fused ops' outputs.
+                         extra_options={"DefaultTensorType": onnx.TensorProto.FLOAT})
+    return out_dir
+
+
+def _optimize(path, config):
+    """
+    Fuse attention, GELU and layer norms in place (BERT-family models).
+    """
+    if config.model_type not in FUSABLE_MODEL_TYPES:
+        return
+    try:
+        from onnxruntime.transformers import optimizer
+        optimized = optimizer.optimize_model(path, model_type=FUSABLE_MODEL_TYPES[config.model_type],
+                                             num_heads=config.num_attention_heads,
+                                             hidden_size=config.hidden_size)
+        optimized.save_model_to_file(path)
+    except Exception as e:
+        logger.warning("Could not apply onnxruntime fusions to %s, keeping the plain graph: %s", path, e)
+
+
+def parity_report(reference, candidate, texts=PARITY_TEXTS) -> dict:
+    """
+    How far `candidate` strays from `reference` on `texts`: cosine of each
+    pair of vectors for the same text, and the largest change in any
+    pairwise cosine similarity (and in the 0-100 semantic score).
+    """
+    def unit(v):
+        return v / np.maximum(np.linalg.norm(v, axis=1, keepdims=True), 1e-12)
+
+    ref = unit(np.asarray(reference.encode(list(texts)), dtype=np.float32))
+    cand = unit(np.asarray(candidate.encode(list(texts)), dtype=np.float32))
+    self_cosine = (ref * cand).sum(axis=1)
+    drift = np.abs(ref @ ref.T - cand @ cand.T).max()
+    return {
+        "texts": len(texts),
+        "min_vector_cosine": float(self_cosine.min()),
+        "max_similarity_drift": float(drift),
+        "max_semantic_score_drift": float(drift / 2 * 100),
+    }
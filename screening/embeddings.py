@@ -0,0 +1,176 @@
+# embeddings.py
+"""
+Content-addressed embedding store used by `semantic_score`.
+
+Vectors are keyed by sha256(model name + text). Lookups go through an
+in-process LRU first, then the `Embedding` table, and only texts missing
+from both are sent to the sentence model, in a single batched call.
+
+The model runs on the backend picked by EMBEDDING_BACKEND (see
+embedding_backends.py), in the shared sidecar process when SIDECAR_SOCKET
+is set and it is reachable (see sidecar.py). int8 ONNX vectors differ slightly from float32
+ones, so they are stored under their own model name (`store_name()`),
+taken from the backend that actually encoded them: an int8 setup that fell
+back to sentence-transformers stores float32 vectors as float32 ones.
+"""
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from django.conf import settings
+from django.db import DatabaseError
+
+from . import sidecar
+from .models import Embedding
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+# What the configured backend stores under, assumed until something encodes.
+STORE_NAME = MODEL_NAME + (
+    "-int8" if getattr(settings, "EMBEDDING_BACKEND", "torch") == "onnx"
+    and getattr(settings, "EMBEDDING_ONNX_QUANTIZE", False) else ""
+)
+_encoded_as = None
+
+
+class EmbeddingLRU:
+    """
+    Small thread-safe LRU of key -> float32 vector.
+    """
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            vec = self._data.get(key)
+            if vec is not None:
+                self._data.move_to_end(key)
+            return vec
+
+    def put(self, key, vec):
+        with self._lock:
+            self._data[key] = vec
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+LRU = EmbeddingLRU(getattr(settings, "EMBEDDING_LRU_SIZE", 2048))
+
+
+def store_name() -> str:
+    """
+    Model name vectors are stored under: that of the backend which last
+    encoded in this process (in-process or sidecar), else STORE_NAME.
+    """
+    return _encoded_as or STORE_NAME
+
+
+def content_key(text: str, model_name: str = None) -> str:
+    return hashlib.sha256(f"{model_name or store_name()}\0{text}".encode("utf-8")).hexdigest()
+
+
+def _encode(texts):
+    """
+    (vectors, store name of the backend that produced them).
+    """
+    client = sidecar.get_client()
+    if client is not None:
+        try:
+            vectors = client.encode(texts)
+            # Sidecars that don't report their backend run the configured one.
+            return vectors, MODEL_NAME + client.store_suffix if client.store_suffix is not None else STORE_NAME
+        except sidecar.SidecarUnavailable:
+            pass
+    from .registry import SENTENCE_MODEL, get_model
+    model = get_model(SENTENCE_MODEL)
+    vectors = np.asarray(model.encode(texts, convert_to_numpy=True), dtype=np.float32)
+    return vectors, MODEL_NAME + getattr(model, "store_suffix", "")
+
+
+def _load(keys, model_name):
+    try:
+        rows = Embedding.objects.filter(key__in=keys, model_name=model_name).values_list("key", "vector")
+        return {key: np.frombuffer(bytes(blob), dtype=np.float32) for key, blob in rows}
+    except DatabaseError as e:
+        logger.warning("Embedding store unavailable, encoding without it: %s", e)
+        return {}
+
+
+def _store(vectors, model_name):
+    try:
+        Embedding.objects.bulk_create(
+            [
+                Embedding(key=key, model_name=model_name, dim=vec.shape[0], vector=vec.tobytes())
+                for key, vec in vectors.items()
+            ],
+            ignore_conflicts=True,
+        )
+    except DatabaseError as e:
+        logger.warning("Could not persist %s embeddings: %s", len(vectors), e)
+
+
+def get_embeddings(texts) -> np.ndarray:
+    """
+    Return a (len(texts), dim) float32 array, encoding only texts that have
+    never been seen before.
+    """
+    global _encoded_as
+    texts = [t or "" for t in texts]
+    name = store_name()
+    keys = [content_key(t, name) for t in texts]
+    found = {}
+    for key in keys:
+        vec = LRU.get(key)
+        if vec is not None:
+            found[key] = vec
+
+    missing = [k for k in dict.fromkeys(keys) if k not in found]
+    if missing:
+        stored = _load(missing, name)
+        found.update(stored)
+        for key, vec in stored.items():
+            LRU.put(key, vec)
+
+    to_encode = {}
+    for key, text in zip(keys, texts):
+        if key not in found:
+            to_encode.setdefault(key, text)
+    if to_encode:
+        encoded, _encoded_as = _encode(list(to_encode.values()))
+        found.update(zip(to_encode.keys(), encoded))
+        if _encoded_as != name:
+            logger.warning("Embeddings come from %s, not %s; storing them under that name", _encoded_as, name)
+        fresh = {content_key(text, _encoded_as): vec for text, vec in zip(to_encode.values(), encoded)}
+        _store(fresh, _encoded_as)
+        for key, vec in fresh.items():
+            LRU.put(key, vec)
+
+    return np.stack([found[k] for k in keys]) if keys else np.zeros((0, 0), dtype=np.float32)
+
+
+def get_embedding(text: str) -> np.ndarray:
+    return get_embeddings([text])[0]
+
+
+def seed(text: str, vec):
+    """
+    Register a vector computed elsewhere (e.g. the content cache) for
+    `text`, so it is never encoded again.
+    """
+    name = store_name()
+    key = content_key(text or "", name)
+    vec = np.asarray(vec, dtype=np.float32)
+    if LRU.get(key) is None:
+        LRU.put(key, vec)
+        _store({key: vec}, name)
+
@@ -0,0 +1,218 @@
+# extraction.py
+"""
+Text extraction for every upload path (resumes and JD PDFs).
+
+PDFs go through PDFium (`pypdfium2`, already installed with pdfplumber),
+which only extracts text and skips pdfplumber's layout analysis. Sources
+are read in place: files with a path on disk are opened by path, anything
+else is streamed from its file object, so nothing is copied into memory or
+a temp file first.
+
+Large PDFs with a path are split into page ranges and extracted by a small
+process pool (PDFium itself is single-threaded). Limits bound the work a
+pathological file can cause:
+
+* PDF_MAX_PAGES: pages beyond this are ignored;
+* PDF_MAX_PAGE_CHARS: text kept per page;
+* PDF_PAGE_TIMEOUT: seconds allowed per page. In the pool a range that
+  overruns is abandoned and the pool is restarted, a hard limit.
+  In-process (PDFs under PDF_PARALLEL_MIN_PAGES, uploads without a path,
+  PDF_WORKERS = 1) it is only checked between pages: a page whose own
+  extraction never returns blocks the caller, since PDFium can't be
+  interrupted mid-page. Run untrusted single uploads through the scoring
+  worker (as resumes are) rather than in a request.
+
+Anything PDFium can't open falls back to pdfplumber.
+"""
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import time
+
+import pdfplumber
+from docx import Document
+
+logger = logging.getLogger(__name__)
+
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "200"))
+PDF_MAX_PAGE_CHARS = int(os.getenv("PDF_MAX_PAGE_CHARS", "100000"))
+# Hard limit in the pool; in-process only checked between pages (see above).
+PDF_PAGE_TIMEOUT = float(os.getenv("PDF_PAGE_TIMEOUT", "5"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(os.cpu_count() or 1, 4))))
+# Below this many pages the pool's overhead outweighs the parallelism.
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "24"))
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def _page_text(pdf, index: int) -> str:
+    page = pdf[index]
+    textpage = page.get_textpage()
+    try:
+        text = textpage.get_text_range()
+    finally:
+        textpage.close()
+        page.close()
+    return text.replace("\r\n", "\n")[:PDF_MAX_PAGE_CHARS]
+
+
+def _extract_range(path: str, start: int, stop: int):
+    """
+    Pool task: text of pages [start, stop) of the PDF at `path`.
+    """
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(path)
+    try:
+        return [_page_text(pdf, i) for i in range(start, stop)]
+    finally:
+        pdf.close()
+
+
+def _get_pool():
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = multiprocessing.get_context("spawn").Pool(PDF_WORKERS)
+        return _POOL
+
+
+def _reset_pool():
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.terminate()
+            _POOL = None
+
+
+def _extract_parallel(path: str, n_pages: int):
+    step = max(n_pages // (PDF_WORKERS * 2), 1)
+    ranges = [(start, min(start + step, n_pages)) for start in range(0, n_pages, step)]
+    pool = _get_pool()
+    pending = [(start, stop, pool.apply_async(_extract_range, (path, start, stop))) for start, stop in ranges]
+    pages = []
+    try:
+        for start, stop, result in pending:
+            # Earlier ranges ran concurrently with this one, so waiting its
+            # own budget from here is never stricter than the limit.
+            budget = (stop - start) * PDF_PAGE_TIMEOUT
+            pages.extend(result.get(timeout=budget))
+    except multiprocessing.TimeoutError:
+        logger.warning("PDF %s: pages %d-%d exceeded %.0fs; keeping %d pages",
+                       path, start + 1, stop, budget, len(pages))
+        # The stuck process can't be interrupted, only killed.
+        _reset_pool()
+    return pages
+
+
+def _extract_sequential(pdf, n_pages: int, label: str):
+    pages = []
+    started = time.monotonic()
+    for i in range(n_pages):
+        if time.monotonic() - started > (i + 1) * PDF_PAGE_TIMEOUT:
+            logger.warning("PDF %s: extraction over budget after %d pages; stopping", label, i)
+            break
+        pages.append(_page_text(pdf, i))
+    return pages
+
+
+def _open_source(source):
+    """
+    A path when the file lives on local disk (enables the pool), otherwise
+    the open binary file object, rewound.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source), None
+    path = None
+    if hasattr(source, "temporary_file_path"):
+        path = source.temporary_file_path()
+    else:
+        try:
+            path = source.path
+        except (AttributeError, NotImplementedError, ValueError):
+            path = None
+    if path and os.path.exists(path):
+        return path, None
+    fileobj = getattr(source, "file", None) or source
+    try:
+        fileobj.seek(0)
+    except Exception:
+        pass
+    return None, fileobj
+
+
+def extract_pdf_text(source) -> str:
+    import pypdfium2 as pdfium
+
+    path, fileobj = _open_source(source)
+    label = path or getattr(source, "name", "upload")
+    try:
+        pdf = pdfium.PdfDocument(path or fileobj)
+    except Exception as e:
+        logger.warning("PDFium could not open %s (%s); falling back to pdfplumber", label, e)
+        return _extract_pdfplumber(path or fileobj)
+    try:
+        n_pages = len(pdf)
+        if n_pages > PDF_MAX_PAGES:
+            logger.warning("PDF %s has %d pages; extracting the first %d", label, n_pages, PDF_MAX_PAGES)
+            n_pages = PDF_MAX_PAGES
+        if path and PDF_WORKERS > 1 and n_pages >= PDF_PARALLEL_MIN_PAGES:
+            pdf.close()
+            pdf = None
+            pages = _extract_parallel(path, n_pages)
+        else:
+            pages = _extract_sequential(pdf, n_pages, label)
+    finally:
+        if pdf is not None:
+            pdf.close()
+    return "\n".join(p for p in pages if p.strip())
+
+
+def _extract_pdfplumber(source) -> str:
+    if hasattr(source, "seek"):
+        source.seek(0)
+    text_pages = []
+    with pdfplumber.open(source) as pdf:
+        for page in pdf.pages[:PDF_MAX_PAGES]:
+            page_text = page.extract_text()
+            if page_text:
+                text_pages.append(page_text[:PDF_MAX_PAGE_CHARS])
+    return "\n".join(text_pages)
+
+
+def extract_docx_text(source) -> str:
+    path, fileobj = _open_source(source)
+    doc = Document(path or fileobj)
+    return "\n".join(p.text for p in doc.paragraphs)
+
+
+def extract_text(source, name: str = None) -> str:
+    """
+    Text of an uploaded or stored file (Django File, path or file object),
+    chosen by extension: PDF, DOCX, anything else decoded as UTF-8.
+    """
+    name = (name or getattr(source, "name", None) or str(source)).lower()
+    if name.endswith(".pdf"):
+        return extract_pdf_text(source)
+    if name.endswith(".docx"):
+        return extract_docx_text(source)
+    path, fileobj = _open_source(source)
+    if path:
+        with open(path, "rb") as f:
+            content = f.read()
+    else:
+        content = fileobj.read()
+    if isinstance(content, str):
+        return content
+    return content.decode("utf8", errors="ignore")
+
+
+def extract_bytes(data: bytes, name: str) -> str:
+    """
+    `extract_text` of file contents already in memory; picklable, for
+    process pools reading from storage that has no local path.
+    """
+    return extract_text(io.BytesIO(data), name)
@@ -0,0 +1,200 @@
+# gemini.py
+"""
+Shared Gemini client used by `analyze_resume_with_gemini`.
+
+One pooled `requests.Session` per API key keeps connections warm between
+candidates, a token bucket keeps each process under GEMINI_RATE_PER_SECOND,
+429/5xx responses and connection errors are retried with jittered
+exponential backoff (honouring Retry-After), and successful responses are
+cached by sha256(model + prompt) with a TTL and LRU eviction so re-scoring
+the same resume against the same job doesn't pay for the call again.
+
+The limits are per process; size them with the number of score workers in
+mind.
+"""
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+GEMINI_API_BASE = os.getenv("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta")
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "30"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "4"))
+GEMINI_RATE_PER_SECOND = float(os.getenv("GEMINI_RATE_PER_SECOND", "2"))
+GEMINI_BURST = int(os.getenv("GEMINI_BURST", "4"))
+GEMINI_CACHE_SIZE = int(os.getenv("GEMINI_CACHE_SIZE", "512"))
+GEMINI_CACHE_TTL = float(os.getenv("GEMINI_CACHE_TTL", "86400"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+
+
+class GeminiError(Exception):
+    pass
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, at most `burst` saved.
+    """
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU of key -> response with a per-entry TTL.
+    """
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def prompt_key(model: str, prompt: str) -> str:
+    return hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+def response_text(data: dict) -> str:
+    return (
+        data.get("candidates", [{}])[0]
+        .get("content", {})
+        .get("parts", [{}])[0]
+        .get("text", "")
+    )
+
+
+class GeminiClient:
+    def __init__(self, api_key: str, model: str = None, base_url: str = None,
+                 timeout: float = None, max_retries: int = None,
+                 limiter: TokenBucket = None, cache: ResponseCache = None):
+        self.api_key = api_key
+        self.model = model or GEMINI_MODEL
+        self.base_url = (base_url or GEMINI_API_BASE).rstrip("/")
+        self.timeout = GEMINI_TIMEOUT if timeout is None else timeout
+        self.max_retries = GEMINI_MAX_RETRIES if max_retries is None else max_retries
+        self.limiter = limiter or TokenBucket(GEMINI_RATE_PER_SECOND, GEMINI_BURST)
+        self.cache = cache or ResponseCache(GEMINI_CACHE_SIZE, GEMINI_CACHE_TTL)
+
+        self.session = requests.Session()
+        # Retries are handled below so they go through the rate limiter.
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Content-Type": "application/json", "x-goog-api-key": api_key})
+
+    def generate(self, prompt: str) -> dict:
+        """
+        Raw generateContent response for `prompt`, served from the cache when
+        possible. Raises GeminiError once retries are exhausted.
+        """
+        key = prompt_key(self.model, prompt)
+        data = self.cache.get(key)
+        if data is not None:
+            return data
+        data = self._post({"contents": [{"parts": [{"text": prompt}]}]})
+        self.cache.put(key, data)
+        return data
+
+    def _post(self, payload: dict) -> dict:
+        url = f"{self.base_url}/models/{self.model}:generateContent"
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            retry_after = None
+            try:
+                resp = self.session.post(url, json=payload, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            else:
+                if resp.status_code not in RETRY_STATUSES:
+                    resp.raise_for_status()
+                    return resp.json()
+                error = GeminiError(f"HTTP {resp.status_code} from Gemini")
+                retry_after = resp.headers.get("Retry-After")
+            if attempt == self.max_retries:
+                break
+            delay = self._backoff(attempt, retry_after)
+            logger.warning("Gemini request failed (%s), retrying in %.1fs", error, delay)
+            time.sleep(delay)
+        raise GeminiError(f"Gemini request failed after {self.max_retries + 1} attempts: {error}")
+
+    @staticmethod
+    def _backoff(attempt: int, retry_after=None) -> float:
+        try:
+            if retry_after is not None:
+                return min(float(retry_after), BACKOFF_MAX_SECONDS)
+        except ValueError:
+            pass
+        # Full jitter so workers that were throttled together spread out.
+        return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_client(api_key: str = None) -> GeminiClient:
+    """
+    Process-wide client for `api_key` (defaults to GEMINI_API_KEY).
+    """
+    api_key = api_key or GEMINI_API_KEY
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(api_key)
+        if client is None:
+            client = _CLIENTS[api_key] = GeminiClient(api_key)
+        return client
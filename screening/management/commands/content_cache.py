@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from screening import content_cache
+
+
+class Command(BaseCommand):
+    help = "Show disk usage of the resume content cache, or trim/clear it."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--evict", action="store_true", help="Trim to CONTENT_CACHE_MAX_BYTES now.")
+        parser.add_argument("--clear", action="store_true", help="Delete every entry.")
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            removed = content_cache.evict(limit=0)
+            self.stdout.write(f"Removed {removed} entries.")
+        elif options["evict"]:
+            removed = content_cache.evict()
+            self.stdout.write(f"Evicted {removed} entries.")
+        usage = content_cache.usage()
+        self.stdout.write(
+            f"{content_cache.cache_dir()}: {usage['entries']} entries, "
+            f"{usage['bytes'] / 1e6:.1f} MB of {usage['max_bytes'] / 1e6:.1f} MB"
+        )
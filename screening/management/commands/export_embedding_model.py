@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from screening import embedding_backends
+from screening.embeddings import MODEL_NAME
+
+
+class Command(BaseCommand):
+    help = "Export the sentence model to ONNX (float32 and int8) and check it against sentence-transformers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model", default=MODEL_NAME, help="sentence-transformers name or path.")
+        parser.add_argument("--out", default=None, help="Output directory (default: EMBEDDING_ONNX_DIR).")
+        parser.add_argument("--no-quantize", action="store_true", help="Skip the int8 model.")
+
+    def handle(self, *args, **options):
+        out = options["out"] or getattr(settings, "EMBEDDING_ONNX_DIR", None)
+        quantize = not options["no_quantize"]
+        out = embedding_backends.export_onnx(options["model"], out, quantize=quantize)
+        self.stdout.write(f"Exported {options['model']} to {out}")
+
+        reference = embedding_backends.load_backend("torch", options["model"])
+        for quantized in (False, True) if quantize else (False,):
+            candidate = embedding_backends.load_backend("onnx", onnx_dir=out, quantized=quantized)
+            report = embedding_backends.parity_report(reference, candidate)
+            self.stdout.write(
+                f"{'int8' if quantized else 'fp32'}: min vector cosine {report['min_vector_cosine']:.5f}, "
+                f"max semantic score drift {report['max_semantic_score_drift']:.3f} points"
+            )
@@ -0,0 +1,85 @@
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from screening import bulk_import
+from screening.models import CandidateImport, JobDescription
+
+
+class Command(BaseCommand):
+    help = "Import a ZIP of resumes (plus an optional CSV manifest) as candidates for one job."
+
+    def add_arguments(self, parser):
+        parser.add_argument("archive", nargs="?", help="ZIP of PDF/DOCX/TXT resumes, read in place.")
+        parser.add_argument("--job", type=int, help="Id of the job the candidates apply to.")
+        parser.add_argument("--manifest", help="CSV with file, first_name, last_name, email columns.")
+        parser.add_argument("--run", type=int, metavar="IMPORT_ID",
+                            help="Run or resume an existing import; pass the archive again for "
+                                 "one started here.")
+        parser.add_argument("--batch-size", type=int, default=None,
+                            help="Entries per transaction (default BULK_IMPORT_BATCH_SIZE).")
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Extraction processes (default BULK_IMPORT_WORKERS).")
+
+    def handle(self, *args, **options):
+        archive = manifest = None
+        if options["run"]:
+            record = CandidateImport.objects.filter(pk=options["run"]).first()
+            if record is None:
+                raise CommandError(f"No import with id {options['run']}")
+            if record.status == CandidateImport.STATUS_DONE:
+                raise CommandError(f"Import {record.pk} has already finished")
+            stale_after = timedelta(seconds=getattr(settings, "SCORING_STALE_AFTER_SECONDS", 1800))
+            if record.status == CandidateImport.STATUS_RUNNING and record.updated_at > timezone.now() - stale_after:
+                raise CommandError(f"Import {record.pk} is running elsewhere")
+            if not record.archive:
+                archive = options["archive"]
+                if not archive or not os.path.isfile(archive):
+                    raise CommandError(f"Import {record.pk} was started from the command line; "
+                                       "pass its archive path to resume it")
+        else:
+            if not options["archive"] or not options["job"]:
+                raise CommandError("Pass an archive and --job, or --run IMPORT_ID")
+            job = JobDescription.objects.filter(pk=options["job"]).first()
+            if job is None:
+                raise CommandError(f"No job with id {options['job']}")
+            archive = options["archive"]
+            if not os.path.isfile(archive):
+                raise CommandError(f"{archive} does not exist")
+            # Created running so the import worker never claims it in between.
+            record = CandidateImport.objects.create(job=job, source_name=os.path.basename(archive)[:255],
+                                                    status=CandidateImport.STATUS_RUNNING)
+
+        if options["manifest"]:
+            with open(options["manifest"], "rb") as f:
+                manifest = f.read()
+
+        started = time.monotonic()
+        done_before = record.processed
+
+        def progress(record):
+            rate = (record.processed - done_before) / max(time.monotonic() - started, 1e-9)
+            self.stdout.write(
+                f"{record.processed}/{record.total} entries: {record.created} created, "
+                f"{record.skipped} skipped, {record.failed} failed ({rate:.1f}/s)"
+            )
+
+        try:
+            bulk_import.run_import(record, archive=archive, manifest=manifest, batch_size=options["batch_size"],
+                                   workers=options["workers"], progress=progress)
+        except bulk_import.ArchiveError as e:
+            raise CommandError(f"Import {record.pk} failed: {e}")
+        except KeyboardInterrupt:
+            record.status = CandidateImport.STATUS_PENDING
+            record.save(update_fields=["status", "updated_at"])
+            raise CommandError(f"Interrupted after {record.processed} entries; resume with --run {record.pk}")
+        self.stdout.write(
+            f"Import {record.pk} {record.status}: {record.created} created, {record.skipped} skipped, "
+            f"{record.failed} queued for extraction retry in {time.monotonic() - started:.1f}s"
+        )
+        for error in record.errors:
+            self.stdout.write(f"  {error['file']}: {error['error']}")
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from screening.models import JobDescription
+from screening.rescoring import DEFAULT_CHUNK_SIZE, rescore_job
+
+
+class Command(BaseCommand):
+    help = "Re-rank all applicants of one or more jobs from their stored resume text."
+
+    def add_arguments(self, parser):
+        parser.add_argument("job_ids", nargs="*", type=int)
+        parser.add_argument("--all", action="store_true", help="Rescore every job.")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--hard-weight", type=float, default=0.6)
+        parser.add_argument("--semantic-weight", type=float, default=0.4)
+
+    def handle(self, *args, **options):
+        if options["all"]:
+            jobs = JobDescription.objects.all()
+        elif options["job_ids"]:
+            jobs = JobDescription.objects.filter(pk__in=options["job_ids"])
+        else:
+            raise CommandError("Pass one or more job ids, or --all.")
+
+        for job in jobs:
+            count = rescore_job(
+                job,
+                chunk_size=options["chunk_size"],
+                hard_weight=options["hard_weight"],
+                semantic_weight=options["semantic_weight"],
+            )
+            self.stdout.write(f"Job #{job.pk} {job.title}: rescored {count} candidates")
@@ -0,0 +1,125 @@
+import logging
+import multiprocessing
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from screening import bulk_import, tasks, vector_index
+from screening.worker import init_worker
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Process queued candidate scoring jobs with a per-stage process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--poll-interval", type=float, default=1.0,
+                            help="Seconds to sleep when no job is due.")
+        parser.add_argument("--stale-after", type=int, default=None,
+                            help="Requeue jobs stuck in 'running' for this many seconds.")
+        for stage in tasks.STAGES:
+            parser.add_argument(f"--{stage}-workers", type=int, default=None,
+                                help=f"Concurrency limit for the {stage} stage.")
+
+    def handle(self, *args, **options):
+        limits = dict(getattr(settings, "SCORING_STAGE_CONCURRENCY", {}))
+        for stage in tasks.STAGES:
+            override = options.get(f"{stage}_workers")
+            if override is not None:
+                limits[stage] = override
+            limits[stage] = max(1, int(limits.get(stage, 1)))
+
+        stale_after = options["stale_after"] or getattr(settings, "SCORING_STALE_AFTER_SECONDS", 1800)
+        requeued = tasks.requeue_stale(stale_after)
+        if requeued:
+            logger.warning("Requeued %s stale scoring jobs", requeued)
+        requeued = bulk_import.requeue_stale(stale_after)
+        if requeued:
+            logger.warning("Requeued %s stale candidate imports", requeued)
+
+        ctx = multiprocessing.get_context("spawn")
+        pools = {stage: self._make_pool(ctx, stage, limits[stage]) for stage in tasks.STAGES}
+        in_flight = {stage: {} for stage in tasks.STAGES}
+        self.stdout.write(f"Scoring worker started with limits {limits}")
+
+        self.running = True
+        self.import_thread = None
+        signal.signal(signal.SIGTERM, self._stop)
+        try:
+            while self.running:
+                busy = False
+                for stage in tasks.STAGES:
+                    busy |= self._reap(stage, in_flight[stage])
+                    while len(in_flight[stage]) < limits[stage]:
+                        job_id = tasks.claim_next(stage)
+                        if job_id is None:
+                            break
+                        try:
+                            future = pools[stage].submit(tasks.execute_job, job_id)
+                        except BrokenProcessPool:
+                            pools[stage] = self._make_pool(ctx, stage, limits[stage])
+                            future = pools[stage].submit(tasks.execute_job, job_id)
+                        in_flight[stage][future] = job_id
+                        busy = True
+                busy |= self._start_import()
+                # Saved jobs and candidates are embedded here, not in the request.
+                busy |= bool(vector_index.index_pending())
+                close_old_connections()
+                if not busy:
+                    vector_index.maybe_compact()
+                    time.sleep(options["poll_interval"])
+        except KeyboardInterrupt:
+            self.stdout.write("Shutting down scoring worker...")
+        finally:
+            self.running = False
+            if self.import_thread is not None:
+                # Stops after its current batch and resumes on the next start.
+                self.import_thread.join()
+            for pool in pools.values():
+                pool.shutdown(wait=True, cancel_futures=True)
+
+    def _stop(self, signum, frame):
+        self.stdout.write("Received SIGTERM, finishing in-flight jobs...")
+        self.running = False
+
+    def _start_import(self):
+        """
+        Bulk imports run one at a time on a thread, next to the stage pools,
+        so the candidates they queue are scored while the import goes on.
+        """
+        if self.import_thread is not None and self.import_thread.is_alive():
+            return False
+        import_id = bulk_import.claim_next()
+        if import_id is None:
+            return False
+        self.import_thread = threading.Thread(
+            target=bulk_import.run_claimed, args=(import_id,), kwargs={"stop": lambda: not self.running},
+            name=f"candidate-import-{import_id}", daemon=True,
+        )
+        self.import_thread.start()
+        return True
+
+    def _make_pool(self, ctx, stage, workers):
+        return ProcessPoolExecutor(
+            max_workers=workers, mp_context=ctx, initializer=init_worker, initargs=(stage,)
+        )
+
+    def _reap(self, stage, futures):
+        finished = [f for f in futures if f.done()]
+        for future in finished:
+            job_id = futures.pop(future)
+            try:
+                status = future.result()
+                logger.info("Scoring job %s (%s) -> %s", job_id, stage, status)
+            except Exception as e:
+                # The child died before it could record the outcome itself.
+                logger.exception("Scoring job %s crashed in %s stage: %s", job_id, stage, e)
+                tasks.record_failure(job_id, f"{type(e).__name__}: {e}")
+        return bool(finished)
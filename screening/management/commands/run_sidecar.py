@@ -0,0 +1,50 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from screening import sidecar
+from screening.registry import SENTENCE_MODEL, get_model, preload
+
+
+class Command(BaseCommand):
+    help = "Serve the sentence (and Vosk) models to every process on this box over SIDECAR_SOCKET."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--socket", default=None, help="Socket path (default: SIDECAR_SOCKET).")
+        parser.add_argument("--no-transcribe", action="store_true", help="Serve embeddings only.")
+
+    def handle(self, *args, **options):
+        path = options["socket"] or getattr(settings, "SIDECAR_SOCKET", "")
+        if not path:
+            raise CommandError("Set SIDECAR_SOCKET or pass --socket.")
+        # Encodes in this process must run the model, not call the socket.
+        sidecar.disable_client()
+        preload(SENTENCE_MODEL)
+        model = get_model(SENTENCE_MODEL)
+        transcribe = None
+        if not options["no_transcribe"]:
+            from screening.utils import preload_vosk_model, transcribe_video
+            preload_vosk_model()
+            transcribe = transcribe_video
+
+        server = sidecar.SidecarServer(
+            path,
+            encode=lambda texts: model.encode(texts, convert_to_numpy=True),
+            transcribe=transcribe,
+            max_batch=getattr(settings, "SIDECAR_MAX_BATCH", 64),
+            max_delay_ms=getattr(settings, "SIDECAR_MAX_DELAY_MS", 5),
+            transcribe_workers=getattr(settings, "SIDECAR_TRANSCRIBE_WORKERS", 1),
+            store_suffix=getattr(model, "store_suffix", ""),
+        )
+        # serve_forever() only returns when shutdown() is called from another thread.
+        signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+        self.stdout.write(f"Sidecar listening on {path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stdout.write(f"Sidecar stopping: {server.stats()}")
+            server.close()
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from screening import vector_index
+
+INDEXES = (vector_index.JOBS, vector_index.CANDIDATES)
+
+
+class Command(BaseCommand):
+    help = "Show the job/candidate vector indexes, or compact/rebuild them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true", help="Re-embed every row from the database.")
+        parser.add_argument("--compact", action="store_true", help="Fold the journal into a new snapshot.")
+        parser.add_argument("--index", choices=INDEXES, help="Only this index (default: both).")
+
+    def handle(self, *args, **options):
+        names = [options["index"]] if options["index"] else INDEXES
+        for name in names:
+            if options["rebuild"]:
+                count = vector_index.rebuild(name)
+                self.stdout.write(f"Rebuilt {name}: {count} documents.")
+            elif options["compact"]:
+                vector_index.get_index(name).compact()
+                self.stdout.write(f"Compacted {name}.")
+            stats = vector_index.get_index(name).stats()
+            self.stdout.write(
+                f"{name}: {stats['documents']} documents ({stats['snapshot']} in snapshot, "
+                f"{stats['journal_records']} journal records), {stats['lists']} lists, dim {stats['dim']}"
+            )
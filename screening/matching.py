@@ -0,0 +1,59 @@
+# matching.py
+"""
+Hard-skill matching engine behind `scoring.hard_skill_score`.
+
+A skill counts as present when it occurs verbatim in the resume or when
+`fuzz.partial_ratio(skill, resume)` exceeds the threshold. The engine keeps
+that exact rule and only trims the work around it:
+
+* duplicate skills are resolved once and verbatim hits never reach rapidfuzz;
+* the remaining skills go into a single `process.cdist` call, which runs in
+  C++ without per-skill Python overhead and can use several threads.
+"""
+import numpy as np
+from rapidfuzz import fuzz, process
+
+DEFAULT_THRESHOLD = 75
+
+
+class SkillMatcher:
+    """
+    Precompiled matcher for one job's skill list; reuse it across resumes.
+    `workers` is passed to rapidfuzz (-1 uses every core).
+    """
+    def __init__(self, skills, threshold: float = DEFAULT_THRESHOLD, workers: int = 1):
+        self.skills = list(skills)
+        self.threshold = threshold
+        self.workers = workers
+        self._needles = [(s, s.lower().strip()) for s in self.skills]
+        self._unique = list(dict.fromkeys(norm for _, norm in self._needles))
+
+    def match(self, resume_text: str):
+        """
+        Split the skills into (present, missing), preserving input order.
+        """
+        text = (resume_text or "").lower()
+        found = {norm: True for norm in self._unique if norm in text}
+        found.update(self._fuzzy([norm for norm in self._unique if norm not in found], text))
+        present = [skill for skill, norm in self._needles if found[norm]]
+        missing = [skill for skill, norm in self._needles if not found[norm]]
+        return present, missing
+
+    def _fuzzy(self, needles, text: str) -> dict:
+        if not needles:
+            return {}
+        thr = self.threshold
+        try:
+            scores = process.cdist(
+                needles, [text], scorer=fuzz.partial_ratio,
+                score_cutoff=thr, workers=self.workers, dtype=np.float64,
+            )[:, 0]
+            return {norm: bool(score > thr) for norm, score in zip(needles, scores)}
+        except Exception:
+            found = {}
+            for norm in needles:
+                try:
+                    found[norm] = fuzz.partial_ratio(norm, text) > thr
+                except Exception:
+                    found[norm] = False
+            return found
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:42
+
+from django.db import migrations, models
+
+
+def normalize_candidate_emails(apps, schema_editor):
+    """
+    Normalise emails the way `Candidate.save` now does so the constraint
+    can be added. Refuses to run while several applications share an
+    (email, job): which one to keep is for an operator to decide, not a
+    migration, so they are listed instead of deleted.
+    """
+    Candidate = apps.get_model('screening', 'Candidate')
+    rows = {}
+    renames = []
+    for pk, email, job_id in Candidate.objects.order_by('id').values_list('id', 'email', 'applied_to_id'):
+        normalized = (email or '').strip().lower()
+        if normalized != email:
+            renames.append((pk, normalized))
+        if normalized:
+            rows.setdefault((normalized, job_id), []).append(pk)
+    duplicates = {key: pks for key, pks in rows.items() if len(pks) > 1}
+    if duplicates:
+        listing = "\n".join(
+            f"  {email} on job {job_id}: candidates {', '.join(map(str, pks))}"
+            for (email, job_id), pks in sorted(duplicates.items(), key=lambda item: item[1])
+        )
+        raise RuntimeError(
+            f"{len(duplicates)} (email, job) pairs have more than one candidate. Merge or delete the extra "
+            f"rows (emails compare case-insensitively), then run migrate again:\n{listing}"
+        )
+    for pk, normalized in renames:
+        Candidate.objects.filter(pk=pk).update(email=normalized)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('screening', '0004_candidate_job_score_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='candidate',
+            index=models.Index(fields=['-created_at'], name='candidate_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobdescription',
+            index=models.Index(fields=['-created_at'], name='job_created_idx'),
+        ),
+        migrations.RunPython(normalize_candidate_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='candidate',
+            constraint=models.UniqueConstraint(condition=models.Q(('email', ''), _negated=True), fields=('email', 'applied_to'), name='unique_candidate_email_per_job'),
+        ),
+    ]
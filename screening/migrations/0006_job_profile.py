@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('screening', '0005_candidate_indexes_and_unique_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobdescription',
+            name='profile',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='jobdescription',
+            name='profile_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('screening', '0007_candidate_import'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidate',
+            name='rescore',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='rescore_missing_skills',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='rescored_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
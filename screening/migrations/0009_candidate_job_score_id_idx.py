@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('screening', '0008_candidate_rescore'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='candidate',
+            name='candidate_job_score_idx',
+        ),
+        migrations.AddIndex(
+            model_name='candidate',
+            index=models.Index(fields=['applied_to', '-score', '-id'], name='candidate_job_score_idx'),
+        ),
+    ]
@@ -1,15 +1,29 @@
 # models.py 
 from django.db import models
+from django.utils import timezone
 
 class JobDescription(models.Model):
     title = models.CharField(max_length=255)
     raw_text = models.TextField()
     parsed_keywords = models.JSONField(default=list, blank=True)
+    # Compiled scoring profile, see `screening.profiles`.
+    profile = models.JSONField(default=dict, blank=True)
+    profile_version = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["-created_at"], name="job_created_idx")]
+
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        from .profiles import PROFILE_FIELDS, refresh_profile
+        update_fields = kwargs.get("update_fields")
+        if refresh_profile(self) and update_fields is not None:
+            kwargs["update_fields"] = list(dict.fromkeys([*update_fields, *PROFILE_FIELDS]))
+        super().save(*args, **kwargs)
+
 class Candidate(models.Model):
     first_name = models.CharField(max_length=120, blank=True)
     last_name = models.CharField(max_length=120, blank=True)
@@ -22,8 +36,146 @@ class Candidate(models.Model):
     verdict = models.CharField(max_length=20, blank=True)
     missing_skills = models.JSONField(default=list, blank=True)
     feedback = models.TextField(blank=True)
+    # Local re-rank from `rescoring.rescore_job` (skill match + embeddings),
+    # kept apart from `score`, which blends in Gemini's opinion.
+    rescore = models.FloatField(null=True, blank=True)
+    rescore_missing_skills = models.JSONField(default=list, blank=True)
+    rescored_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Per-job leaderboard: `jobs/<id>/candidates/?ordering=-score`.
+            models.Index(fields=["applied_to", "-score", "-id"], name="candidate_job_score_idx"),
+            models.Index(fields=["-created_at"], name="candidate_created_idx"),
+        ]
+        constraints = [
+            # One application per email and job; also serves the upsert
+            # lookup in `CandidateCreateView`. Blank emails are exempt.
+            models.UniqueConstraint(
+                fields=["email", "applied_to"],
+                condition=~models.Q(email=""),
+                name="unique_candidate_email_per_job",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.first_name} {self.last_name}".strip() or "Candidate"
 
+    def save(self, *args, **kwargs):
+        self.email = (self.email or "").strip().lower()
+        super().save(*args, **kwargs)
+
+
+class Embedding(models.Model):
+    """
+    Sentence embedding keyed by a hash of the model name and input text, so
+    the same JD or resume is only ever encoded once.
+    """
+    key = models.CharField(max_length=64, unique=True)
+    model_name = models.CharField(max_length=100)
+    dim = models.PositiveIntegerField()
+    vector = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.model_name}:{self.key[:12]}"
+
+
+class ScoringJob(models.Model):
+    """
+    Persistent queue entry that walks a candidate through extraction,
+    transcription and scoring outside the request/response cycle.
+    """
+    STAGE_EXTRACT = "extract"
+    STAGE_TRANSCRIBE = "transcribe"
+    STAGE_SCORE = "score"
+    STAGE_CHOICES = [
+        (STAGE_EXTRACT, "Extract"),
+        (STAGE_TRANSCRIBE, "Transcribe"),
+        (STAGE_SCORE, "Score"),
+    ]
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    candidate = models.ForeignKey(Candidate, on_delete=models.CASCADE, related_name="scoring_jobs")
+    stage = models.CharField(max_length=20, choices=STAGE_CHOICES, default=STAGE_EXTRACT)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    transcript = models.TextField(blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "stage", "run_after"])]
+
+    def __str__(self):
+        return f"ScoringJob #{self.pk} ({self.stage}/{self.status})"
+
+
+class IndexJob(models.Model):
+    """
+    A job or candidate whose indexed text may have changed (or that was
+    deleted); `run_scoring_worker` brings its vector up to date, see
+    `vector_index.index_pending`.
+    """
+    index = models.CharField(max_length=20)
+    document_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"IndexJob #{self.pk} ({self.index} {self.document_id})"
+
+
+class CandidateImport(models.Model):
+    """
+    Bulk import of resumes from a ZIP archive (see `screening.bulk_import`).
+    Archive entries are committed in order, so `processed` is also where a
+    restarted import resumes.
+    """
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    job = models.ForeignKey(JobDescription, on_delete=models.CASCADE, related_name="imports")
+    # Blank for `manage.py import_candidates`, which reads the archive in place.
+    archive = models.FileField(upload_to="imports/", blank=True)
+    manifest = models.FileField(upload_to="imports/", null=True, blank=True)
+    source_name = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    created = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    # [{"file": ..., "error": ...}] for skipped and failed entries, capped.
+    errors = models.JSONField(default=list, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "created_at"], name="import_status_idx")]
+
+    def __str__(self):
+        return f"CandidateImport #{self.pk} ({self.status} {self.processed}/{self.total})"
@@ -0,0 +1,71 @@
+# orchestrator.py
+"""
+Runs the independent scoring stages for one candidate side by side.
+
+The Gemini call spends its time waiting on the network and the embedding
+encode spends it in torch (which releases the GIL), so a shared thread pool
+lets a candidate take about as long as its slowest stage instead of the
+sum. Every stage has its own timeout and a default that is used when it
+times out or raises, so one slow or failing stage degrades the score
+instead of failing it.
+
+No Django imports: `streamlit_app.py` uses this module as well.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, NamedTuple, Tuple
+
+logger = logging.getLogger(__name__)
+
+ORCHESTRATOR_THREADS = int(os.getenv("ORCHESTRATOR_THREADS", "8"))
+
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+class Stage(NamedTuple):
+    name: str
+    func: Callable
+    args: Tuple = ()
+    timeout: float = 30.0
+    default: Any = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=ORCHESTRATOR_THREADS, thread_name_prefix="scoring")
+        return _EXECUTOR
+
+
+def run_stages(stages, degraded: list = None) -> dict:
+    """
+    Run `stages` concurrently and return {name: result}. A stage that raises
+    or runs past its timeout yields its `default`, and its name is appended
+    to `degraded` when a list is given. A timed-out stage keeps running in
+    the background; its result is discarded.
+    """
+    executor = _get_executor()
+    started = time.monotonic()
+    futures = [(stage, executor.submit(stage.func, *stage.args)) for stage in stages]
+    results = {}
+    for stage, future in futures:
+        remaining = max(stage.timeout - (time.monotonic() - started), 0)
+        try:
+            results[stage.name] = future.result(timeout=remaining)
+        except FutureTimeout:
+            future.cancel()
+            logger.warning("Scoring stage %s timed out after %.1fs; using default", stage.name, stage.timeout)
+            results[stage.name] = stage.default
+        except Exception as e:
+            logger.exception("Scoring stage %s failed: %s", stage.name, e)
+            results[stage.name] = stage.default
+        else:
+            continue
+        if degraded is not None:
+            degraded.append(stage.name)
+    return results
@@ -0,0 +1,28 @@
+# pagination.py
+from rest_framework.pagination import CursorPagination
+
+
+class CandidateCursorPagination(CursorPagination):
+    """
+    Keyset pagination for candidate lists: every page is an index range scan
+    instead of an OFFSET that grows with the applicant count.
+    """
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = "-created_at"
+
+
+class LeaderboardPagination(CandidateCursorPagination):
+    """
+    Scores tie, so `-id` breaks ties: the cursor skips rows sharing the last
+    score by offset, which only works when their order is the same on every
+    query. Also applied to `?ordering=` from the view's OrderingFilter.
+    """
+    ordering = ("-score", "-id")
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        if not any(field.lstrip("-") in ("id", "pk") for field in ordering):
+            ordering += ("-id" if ordering[0].startswith("-") else "id",)
+        return ordering
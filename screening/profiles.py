@@ -0,0 +1,140 @@
+# profiles.py
+"""
+Compiled per-job scoring profiles.
+
+Everything candidate scoring needs from a JD is derived once, when the job
+is saved, instead of once per candidate:
+
+* `JobDescription.parsed_keywords`: the normalised skill list;
+* `JobDescription.profile["keywords"]`: the weighted keywords used by
+  `keyword_boost_dynamic` (stopword-free skills ranked by frequency);
+* the `SkillMatcher`, built once per process and shared by every resume
+  scored against the job (rescoring included);
+* the JD embedding, encoded when the job is saved by the scoring worker's
+  `IndexJob` (see vector_index.py) rather than in the request, so here it
+  is normally a lookup in the embedding store.
+
+`profile_version` is bumped whenever the profile is recompiled, and
+compiled profiles are cached per process under (job id, profile_version),
+so an edited JD can never be scored with a stale profile.
+"""
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from functools import cached_property
+
+from django.conf import settings
+
+# Bump when the compiled format or tokenisation changes; stored profiles
+# with another format are recompiled on next use.
+PROFILE_FORMAT = 1
+TOP_KEYWORDS = 20
+PROFILE_FIELDS = ["parsed_keywords", "profile", "profile_version"]
+
+
+def _text_hash(raw_text: str) -> str:
+    return hashlib.sha256((raw_text or "").encode("utf-8")).hexdigest()
+
+
+def weighted_keywords(skills, top_n: int = TOP_KEYWORDS):
+    """
+    [(keyword, count)] for the most frequent stopword-free skills.
+    """
+    from .stopwords import ENGLISH_STOPWORDS
+    freq = Counter(s for s in skills if all(w not in ENGLISH_STOPWORDS for w in s.split()))
+    return freq.most_common(top_n)
+
+
+def compile_profile(raw_text: str):
+    """
+    Return (skills, profile) for a JD.
+    """
+    from .scoring import tokenize_skills
+    skills = tokenize_skills(raw_text)
+    profile = {
+        "format": PROFILE_FORMAT,
+        "text_hash": _text_hash(raw_text),
+        "keywords": [[kw, n] for kw, n in weighted_keywords(skills)],
+    }
+    return skills, profile
+
+
+def is_stale(job) -> bool:
+    profile = job.profile or {}
+    return profile.get("format") != PROFILE_FORMAT or profile.get("text_hash") != _text_hash(job.raw_text)
+
+
+def refresh_profile(job) -> bool:
+    """
+    Recompile `job`'s profile in place if its text or the format changed.
+    Returns True when the job needs saving.
+    """
+    if not is_stale(job):
+        return False
+    job.parsed_keywords, job.profile = compile_profile(job.raw_text)
+    job.profile_version = (job.profile_version or 0) + 1
+    return True
+
+
+class JobProfile:
+    def __init__(self, job):
+        self.job_id = job.pk
+        self.version = job.profile_version
+        self.raw_text = job.raw_text or ""
+        self.skills = list(job.parsed_keywords or [])
+        self.keywords = [kw for kw, _ in job.profile.get("keywords", [])]
+
+    @cached_property
+    def matcher(self):
+        from .matching import SkillMatcher
+        # Rescoring matches every applicant with it, so let rapidfuzz use all cores.
+        return SkillMatcher(self.skills, workers=-1)
+
+    @cached_property
+    def embedding(self):
+        if not self.raw_text:
+            return None
+        from .embeddings import get_embedding
+        return get_embedding(self.raw_text)
+
+
+class ProfileCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            profile = self._data.get(key)
+            if profile is not None:
+                self._data.move_to_end(key)
+            return profile
+
+    def put(self, key, profile):
+        with self._lock:
+            self._data[key] = profile
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+CACHE = ProfileCache(getattr(settings, "JOB_PROFILE_CACHE_SIZE", 256))
+
+
+def get_profile(job) -> JobProfile:
+    """
+    Compiled profile for `job`, recompiling (and saving) legacy rows first.
+    """
+    if refresh_profile(job):
+        job.save(update_fields=PROFILE_FIELDS)
+    key = (job.pk, job.profile_version)
+    profile = CACHE.get(key)
+    if profile is None:
+        profile = JobProfile(job)
+        CACHE.put(key, profile)
+    return profile
@@ -0,0 +1,105 @@
+# registry.py
+"""
+Lazily loaded, process-wide ML models.
+
+Nothing heavy is imported or loaded until a model is first used, so
+`manage.py` commands, migrations and a cold gunicorn boot stay fast.
+Servers that want the weights in memory before traffic arrives call
+`preload()`: `gunicorn.conf.py` does it in the master with `preload_app`,
+so forked workers share the pages copy-on-write, and the scoring worker
+does it in each pool process.
+"""
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SENTENCE_MODEL = "sentence"
+VOSK_MODEL = "vosk"
+MCRAS_MODEL = "mcras"
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._factories = {}
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory):
+        self._factories[name] = factory
+
+    def get(self, name: str):
+        model = self._models.get(name)
+        if model is None:
+            with self._lock:
+                model = self._models.get(name)
+                if model is None:
+                    started = time.perf_counter()
+                    model = self._models[name] = self._factories[name]()
+                    logger.info("Loaded %s model in %.2fs", name, time.perf_counter() - started)
+        return model
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def preload(self, *names):
+        """
+        Load `names` (default: every registered model). Failures are logged,
+        not raised, so a missing optional model can't stop a server booting.
+        """
+        for name in names or list(self._factories):
+            try:
+                self.get(name)
+            except Exception as e:
+                logger.warning("Could not preload %s model: %s", name, e)
+
+
+def _load_sentence_model():
+    from django.conf import settings
+    from .embedding_backends import load_backend
+    from .embeddings import MODEL_NAME
+    threads = getattr(settings, "EMBEDDING_THREADS", 0) or None
+    if getattr(settings, "EMBEDDING_BACKEND", "torch") == "onnx":
+        try:
+            return load_backend("onnx", MODEL_NAME, onnx_dir=getattr(settings, "EMBEDDING_ONNX_DIR", None),
+                                quantized=getattr(settings, "EMBEDDING_ONNX_QUANTIZE", False), threads=threads)
+        except (ImportError, FileNotFoundError) as e:
+            logger.warning("ONNX embedding backend unavailable, using sentence-transformers: %s", e)
+    return load_backend("torch", MODEL_NAME, threads=threads)
+
+
+def _load_vosk_model():
+    from vosk import Model
+    from .utils import VOSK_MODEL_PATH
+    if not os.path.exists(VOSK_MODEL_PATH):
+        raise FileNotFoundError(f"Vosk model not found at {VOSK_MODEL_PATH}")
+    return Model(VOSK_MODEL_PATH)
+
+
+def _load_mcras_engine():
+    from django.conf import settings
+    from mcras.inference import InferenceEngine
+    path = getattr(settings, "MCRAS_CHECKPOINT", "")
+    if not path:
+        raise FileNotFoundError("MCRAS_CHECKPOINT is not set")
+    return InferenceEngine.from_checkpoint(
+        path,
+        backend=getattr(settings, "MCRAS_BACKEND", "torchscript"),
+        quantize=getattr(settings, "MCRAS_QUANTIZE", False),
+    )
+
+
+registry = ModelRegistry()
+registry.register(SENTENCE_MODEL, _load_sentence_model)
+registry.register(VOSK_MODEL, _load_vosk_model)
+registry.register(MCRAS_MODEL, _load_mcras_engine)
+
+
+def get_model(name: str):
+    return registry.get(name)
+
+
+def preload(*names):
+    registry.preload(*names)
@@ -0,0 +1,90 @@
+# rescoring.py
+"""
+Re-rank every applicant of a job without re-uploading anything.
+
+The result goes to `rescore` / `rescore_missing_skills`, not `score`:
+upload scoring blends Gemini's match score into `score` (see
+`utils.analyze_resume_with_gemini`), which a local pass can't reproduce,
+so overwriting it would leave one leaderboard on two scales.
+
+Candidates are streamed in chunks; each chunk's resumes are embedded in one
+batched call (cache misses only) and scored against the JD with a single
+matrix product before being written back with `bulk_update`. With
+EMBEDDING_CHUNKING on, the batched call covers every section window of the
+chunk's resumes instead (see chunking.py).
+"""
+import logging
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from . import chunking
+from .embeddings import get_embeddings
+from .models import Candidate, JobDescription
+from .profiles import get_profile
+from .scoring import hard_skill_score, final_score
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / (norms + 1e-12)
+
+
+def semantic_scores(jd_vector: np.ndarray, resume_vectors: np.ndarray) -> np.ndarray:
+    """
+    Vectorised equivalent of `scoring.semantic_score` for one JD against many
+    resumes: cosine similarity mapped from [-1, 1] onto [0, 100].
+    """
+    sims = _unit(resume_vectors) @ _unit(jd_vector)
+    return np.round((sims + 1) / 2 * 100, 2)
+
+
+def rescore_job(job: JobDescription, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                hard_weight: float = 0.6, semantic_weight: float = 0.4) -> int:
+    """
+    Recompute `rescore` and `rescore_missing_skills` for all candidates of
+    `job` from their stored `parsed_text`. Returns the number of rows
+    updated.
+    """
+    profile = get_profile(job)
+    jd_vector = profile.embedding if chunking.mode() == "off" else None
+
+    queryset = job.candidates.only("id", "parsed_text").order_by("id")
+    chunk, total = [], 0
+    for candidate in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(candidate)
+        if len(chunk) >= chunk_size:
+            total += _rescore_chunk(chunk, profile, jd_vector, hard_weight, semantic_weight)
+            chunk = []
+    if chunk:
+        total += _rescore_chunk(chunk, profile, jd_vector, hard_weight, semantic_weight)
+
+    logger.info("Rescored %s candidates for job %s", total, job.pk)
+    return total
+
+
+def _rescore_chunk(chunk, profile, jd_vector, hard_weight, semantic_weight):
+    semantic = np.full(len(chunk), 50.0)
+    with_text = [i for i, c in enumerate(chunk) if c.parsed_text]
+    texts = [chunk[i].parsed_text for i in with_text]
+    if jd_vector is not None and with_text:
+        semantic[with_text] = semantic_scores(jd_vector, get_embeddings(texts))
+    elif profile.raw_text and with_text:
+        sims = chunking.cosine_similarities(profile.raw_text, texts)
+        semantic[with_text] = np.round((sims + 1) / 2 * 100, 2)
+
+    now = timezone.now()
+    for candidate, sem in zip(chunk, semantic):
+        hard, missing = hard_skill_score(profile.skills, candidate.parsed_text, profile.matcher)
+        candidate.rescore = final_score(hard, float(sem), hard_weight, semantic_weight)
+        candidate.rescore_missing_skills = missing
+        candidate.rescored_at = now
+
+    with transaction.atomic():
+        Candidate.objects.bulk_update(chunk, ["rescore", "rescore_missing_skills", "rescored_at"])
+    return len(chunk)
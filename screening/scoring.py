@@ -1,10 +1,15 @@
 import re
-import numpy as np
-from rapidfuzz import fuzz
-from sentence_transformers import SentenceTransformer
 
+from . import chunking
+from .matching import SkillMatcher
+from .registry import SENTENCE_MODEL, get_model
 
-MODEL = SentenceTransformer("all-MiniLM-L6-v2")
+
+def __getattr__(name):
+    # `scoring.MODEL` used to be built at import time; it now loads on first access.
+    if name == "MODEL":
+        return get_model(SENTENCE_MODEL)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def tokenize_skills(text: str):
     if not text:
@@ -13,24 +18,17 @@ def tokenize_skills(text: str):
     return [t.strip() for t in tokens if 1 <= len(t.split()) <= 4 and t.strip()]
 
 
-def hard_skill_score(jd_skills, resume_text: str):
-    resume = (resume_text or "").lower()
-    missing = []
-    present = []
-
+def hard_skill_score(jd_skills, resume_text: str, matcher=None):
+    """
+    Share of JD skills found in the resume, verbatim or via fuzzy match.
+    Pass a prebuilt `SkillMatcher` (`JobProfile.matcher`) when scoring many
+    resumes for one job.
+    """
     if not jd_skills:
         return 50.0, []
 
-    for s in jd_skills:
-        s_norm = s.lower().strip()
-        try:
-           
-            if s_norm in resume or fuzz.partial_ratio(s_norm, resume) > 75:
-                present.append(s)
-            else:
-                missing.append(s)
-        except Exception:
-            missing.append(s)
+    matcher = matcher or SkillMatcher(jd_skills)
+    present, missing = matcher.match(resume_text)
 
     score = (len(present) / len(jd_skills)) * 100
     return round(score, 2), missing
@@ -39,8 +37,7 @@ def semantic_score(jd_text: str, resume_text: str):
     if not jd_text or not resume_text:
         return 50.0
     try:
-        emb = MODEL.encode([jd_text, resume_text], convert_to_numpy=True)
-        sim = np.dot(emb[0], emb[1]) / (np.linalg.norm(emb[0]) * np.linalg.norm(emb[1]) + 1e-12)
+        sim = float(chunking.cosine_similarities(jd_text, [resume_text])[0])
         return round(((sim + 1) / 2) * 100, 2)
     except Exception:
         return 50.0
@@ -63,9 +60,13 @@ def verdict(score: float):
         return "Medium"
     return "Low"
 
-def analyze_resume(jd_text: str, resume_text: str, jd_skills=None):
+def analyze_resume(jd_text: str, resume_text: str, jd_skills=None, matcher=None):
+    """
+    Local score of one resume. Pass a job's `profiles.JobProfile` skills and
+    matcher to skip re-tokenising the JD and rebuilding the matcher.
+    """
     jd_skills = jd_skills or tokenize_skills(jd_text)
-    hard, missing = hard_skill_score(jd_skills, resume_text)
+    hard, missing = hard_skill_score(jd_skills, resume_text, matcher)
     semantic = semantic_score(jd_text, resume_text)
     final = final_score(hard, semantic)
     return {
@@ -1,10 +1,14 @@
 from rest_framework import serializers
-from .models import JobDescription, Candidate
+from .models import JobDescription, Candidate, CandidateImport, ScoringJob
 
 class JobDescriptionSerializer(serializers.ModelSerializer):
+    # Only present when the queryset is annotated (`JobListView`).
+    candidate_count = serializers.IntegerField(read_only=True)
+
     class Meta:
         model = JobDescription
         fields = "__all__"
+        read_only_fields = ("parsed_keywords", "profile", "profile_version")
 
 from rest_framework import serializers
 from .models import Candidate
@@ -29,6 +33,9 @@ class CandidateSerializer(serializers.ModelSerializer):
             "verdict",
             "missing_skills",
             "feedback",
+            "rescore",
+            "rescore_missing_skills",
+            "rescored_at",
             "final_score",
             "local_score",
             "gemini_score",
@@ -36,4 +43,84 @@ class CandidateSerializer(serializers.ModelSerializer):
             "matched_keywords",
             "applied_to_title",  # include new field in read-only
         )
+        # Re-uploads for the same email and job update the existing row in
+        # `CandidateCreateView`, so the unique constraint isn't a validation error.
+        validators = []
+
+
+class CandidateListSerializer(serializers.ModelSerializer):
+    """
+    Dashboard row: everything the list and modal show, without `parsed_text`.
+    """
+    applied_to_title = serializers.CharField(source="applied_to.title", read_only=True)
+
+    class Meta:
+        model = Candidate
+        fields = (
+            "id",
+            "first_name",
+            "last_name",
+            "email",
+            "resume",
+            "video",
+            "applied_to",
+            "applied_to_title",
+            "score",
+            "verdict",
+            "missing_skills",
+            "feedback",
+            "rescore",
+            "created_at",
+        )
+        read_only_fields = fields
+
+
+class ScoringJobSerializer(serializers.ModelSerializer):
+    score = serializers.FloatField(source="candidate.score", read_only=True)
+    verdict = serializers.CharField(source="candidate.verdict", read_only=True)
+
+    class Meta:
+        model = ScoringJob
+        fields = (
+            "id",
+            "candidate",
+            "stage",
+            "status",
+            "attempts",
+            "max_attempts",
+            "run_after",
+            "last_error",
+            "score",
+            "verdict",
+            "created_at",
+            "updated_at",
+        )
+        read_only_fields = fields
+
+
+class CandidateImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CandidateImport
+        fields = (
+            "id",
+            "job",
+            "source_name",
+            "status",
+            "total",
+            "processed",
+            "created",
+            "skipped",
+            "failed",
+            "errors",
+            "last_error",
+            "created_at",
+            "updated_at",
+            "finished_at",
+        )
+        read_only_fields = fields
+
 
+class RescoreSerializer(serializers.Serializer):
+    hard_weight = serializers.FloatField(min_value=0, default=0.6)
+    semantic_weight = serializers.FloatField(min_value=0, default=0.4)
+    chunk_size = serializers.IntegerField(min_value=1, max_value=5000, default=500)
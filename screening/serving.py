@@ -0,0 +1,54 @@
+# serving.py
+"""
+Per-process micro-batcher in front of the MCRAS inference engine.
+
+The engine comes from the model registry, so gunicorn can load it in the
+master and share it copy-on-write. The batcher owns a thread, which does
+not survive a fork: it is created on first use in each process (and again
+if the process id changes).
+"""
+import os
+import threading
+
+from django.conf import settings
+
+from .registry import MCRAS_MODEL, get_model, registry
+
+_batcher = None
+_batcher_pid = None
+_lock = threading.Lock()
+
+
+def get_engine():
+    return get_model(MCRAS_MODEL)
+
+
+def get_batcher():
+    global _batcher, _batcher_pid
+    with _lock:
+        if _batcher is None or _batcher_pid != os.getpid():
+            from mcras.inference import MicroBatcher
+            engine = get_engine()
+            _batcher = MicroBatcher(
+                engine.predict,
+                max_batch_size=getattr(settings, "MCRAS_MAX_BATCH_SIZE", 32),
+                max_delay_ms=getattr(settings, "MCRAS_MAX_BATCH_DELAY_MS", 5),
+                max_queue=getattr(settings, "MCRAS_BATCH_QUEUE_SIZE", 1024),
+            )
+            _batcher_pid = os.getpid()
+        return _batcher
+
+
+def metrics() -> dict:
+    """
+    Engine report and batcher metrics, without loading anything.
+    """
+    engine = get_engine() if registry.is_loaded(MCRAS_MODEL) else None
+    batcher = _batcher if _batcher_pid == os.getpid() else None
+    return {
+        "loaded": engine is not None,
+        "engine": engine.report if engine is not None else None,
+        "batcher": batcher.metrics.snapshot() if batcher is not None else None,
+        "max_batch_size": getattr(settings, "MCRAS_MAX_BATCH_SIZE", 32),
+        "max_batch_delay_ms": getattr(settings, "MCRAS_MAX_BATCH_DELAY_MS", 5),
+    }
@@ -0,0 +1,398 @@
+# sidecar.py
+"""
+Local model sidecar: one process holds the sentence model (and Vosk) and
+serves every gunicorn worker, scoring worker and the Streamlit app over a
+Unix socket, instead of each of them loading its own copy.
+
+`manage.py run_sidecar` runs the server. Encode requests from all clients
+are merged into batches of up to SIDECAR_MAX_BATCH texts (waiting at most
+SIDECAR_MAX_DELAY_MS for company); transcriptions run on a small thread
+pool and read the video from the shared filesystem.
+
+Clients (`embeddings._encode`, `utils.transcribe_video`) go through
+`get_client()`, which is None unless SIDECAR_SOCKET is set. When the
+sidecar can't be reached the client raises `SidecarUnavailable`, callers
+fall back to loading the model in-process, and the sidecar isn't tried
+again for SIDECAR_RETRY_SECONDS. A sidecar that is up but slow to answer
+raises `SidecarTimeout` instead: that request fails, nothing is loaded
+in-process and the next request goes to the sidecar again. Encodes are
+sent in requests of at most SIDECAR_MAX_BATCH texts, so one large call
+neither holds a connection past its timeout nor delays other clients'
+batches behind it.
+
+Wire format, both directions: a frame is struct "!II" (header length,
+payload length), a JSON header, then the payload (float32 vectors for
+encode responses, empty otherwise). Encode responses also carry the
+backend's `store_suffix`, so clients store the vectors under the model
+name of the backend that made them (`embeddings.store_name`).
+
+Only `get_client` touches Django, so streamlit_app.py can use the rest.
+"""
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_FRAME = struct.Struct("!II")
+MAX_HEADER_BYTES = 64 * 1024 * 1024
+CONNECT_ATTEMPTS = 5
+
+
+class SidecarUnavailable(ConnectionError):
+    """The sidecar isn't running or stopped answering; use the local model."""
+
+
+class SidecarError(RuntimeError):
+    """The sidecar answered with an error (e.g. the model failed)."""
+
+
+class SidecarTimeout(TimeoutError):
+    """The sidecar accepted the request but didn't answer in time."""
+
+
+def _recv_exactly(sock, n):
+    buf = bytearray(n)
+    view = memoryview(buf)
+    pos = 0
+    while pos < n:
+        read = sock.recv_into(view[pos:], n - pos)
+        if not read:
+            raise ConnectionError("sidecar connection closed")
+        pos += read
+    return bytes(buf)
+
+
+def send_frame(sock, header: dict, payload: bytes = b""):
+    data = json.dumps(header).encode("utf-8")
+    sock.sendall(_FRAME.pack(len(data), len(payload)) + data + payload)
+
+
+def recv_frame(sock):
+    header_len, payload_len = _FRAME.unpack(_recv_exactly(sock, _FRAME.size))
+    if header_len > MAX_HEADER_BYTES:
+        raise ConnectionError(f"sidecar frame header too large ({header_len} bytes)")
+    header = json.loads(_recv_exactly(sock, header_len))
+    return header, _recv_exactly(sock, payload_len) if payload_len else b""
+
+
+# -- client ----------------------------------------------------------------
+
+class SidecarClient:
+    """
+    Thread-safe client; each thread keeps its own connection open.
+    """
+    def __init__(self, path: str, timeout: float = 30.0, transcribe_timeout: float = 900.0,
+                 retry_after: float = 30.0, max_batch: int = 64):
+        self.path = path
+        # The sidecar backend's `store_suffix`, once an encode has reported it.
+        self.store_suffix = None
+        self.timeout = timeout
+        self.transcribe_timeout = transcribe_timeout
+        self.retry_after = retry_after
+        self.max_batch = max_batch
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self._down_until = 0.0
+
+    def _connect(self):
+        for attempt in range(CONNECT_ATTEMPTS):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+                return sock
+            except BlockingIOError:
+                # Unix sockets refuse with EAGAIN, not queue, when the
+                # listen backlog is full (e.g. every worker reconnecting).
+                sock.close()
+                if attempt == CONNECT_ATTEMPTS - 1:
+                    raise
+                time.sleep(0.01 * 2 ** attempt)
+            except BaseException:
+                sock.close()
+                raise
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            try:
+                sock.close()
+            finally:
+                self._local.sock = None
+
+    def request(self, header: dict, timeout: float = None):
+        if time.monotonic() < self._down_until:
+            raise SidecarUnavailable(f"sidecar at {self.path} marked down")
+        if self._pid != os.getpid():
+            # Forked (e.g. a gunicorn worker): never share the parent's sockets.
+            self._local, self._pid = threading.local(), os.getpid()
+        # A kept-alive connection may have been closed by a sidecar restart,
+        # so a failure on a reused socket gets one retry on a fresh one.
+        for attempt in range(2):
+            reused = getattr(self._local, "sock", None) is not None
+            try:
+                if not reused:
+                    self._local.sock = self._connect()
+                sock = self._local.sock
+                sock.settimeout(timeout or self.timeout)
+                send_frame(sock, header)
+                response, payload = recv_frame(sock)
+                break
+            except socket.timeout as e:
+                # The sidecar is busy, not gone: drop this connection (its
+                # late reply would desync the next request) but keep using it.
+                self._close()
+                raise SidecarTimeout(f"sidecar at {self.path} didn't answer in time: {e}") from e
+            except (OSError, ValueError) as e:
+                self._close()
+                if reused and attempt == 0:
+                    continue
+                self._down_until = time.monotonic() + self.retry_after
+                logger.warning("Sidecar at %s unreachable (%s); using in-process models for %ss",
+                               self.path, e, self.retry_after)
+                raise SidecarUnavailable(f"sidecar at {self.path}: {e}") from e
+        if not response.get("ok"):
+            raise SidecarError(response.get("error", "sidecar request failed"))
+        return response, payload
+
+    def encode(self, texts) -> np.ndarray:
+        texts = list(texts)
+        parts = []
+        for start in range(0, max(len(texts), 1), self.max_batch):
+            response, payload = self.request({"op": "encode", "texts": texts[start:start + self.max_batch]})
+            parts.append(np.frombuffer(payload, dtype=np.float32).reshape(response["shape"]))
+            self.store_suffix = response.get("store_suffix", self.store_suffix)
+        return np.concatenate(parts) if len(parts) > 1 else parts[0].copy()
+
+    def transcribe(self, path: str) -> str:
+        response, _ = self.request({"op": "transcribe", "path": os.path.abspath(path)},
+                                   timeout=self.transcribe_timeout)
+        return response["text"]
+
+    def stats(self) -> dict:
+        return self.request({"op": "stats"})[0]["stats"]
+
+
+class SidecarEncoder:
+    """
+    `encode` contract (see embedding_backends.py) served by the sidecar,
+    loading `fallback()` in-process only if the sidecar is unreachable.
+    """
+    def __init__(self, client: SidecarClient, fallback):
+        self.client = client
+        self._fallback = fallback
+        self._model = None
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, normalize_embeddings=False):
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        try:
+            vectors = self.client.encode(batch)
+        except SidecarUnavailable:
+            if self._model is None:
+                self._model = self._fallback()
+            return self._model.encode(texts, batch_size=batch_size, normalize_embeddings=normalize_embeddings)
+        if normalize_embeddings:
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors[0] if single else vectors
+
+
+_client = None
+_client_lock = threading.Lock()
+_client_disabled = False
+
+
+def disable_client():
+    """
+    Called by the sidecar itself so its own encodes never loop back to it.
+    """
+    global _client_disabled
+    _client_disabled = True
+
+
+def get_client():
+    """
+    The process-wide client for SIDECAR_SOCKET, or None when unset.
+    """
+    global _client
+    if _client_disabled:
+        return None
+    if _client is None:
+        from django.conf import settings
+        path = getattr(settings, "SIDECAR_SOCKET", "")
+        if not path:
+            return None
+        with _client_lock:
+            if _client is None:
+                _client = SidecarClient(
+                    path,
+                    timeout=getattr(settings, "SIDECAR_TIMEOUT_SECONDS", 30),
+                    transcribe_timeout=getattr(settings, "SIDECAR_TRANSCRIBE_TIMEOUT_SECONDS", 900),
+                    retry_after=getattr(settings, "SIDECAR_RETRY_SECONDS", 30),
+                    max_batch=getattr(settings, "SIDECAR_MAX_BATCH", 64),
+                )
+    return _client
+
+
+# -- server ----------------------------------------------------------------
+
+class EncodeBatcher:
+    """
+    Merges concurrent encode requests into model calls of at most
+    `max_batch` texts.
+    """
+    def __init__(self, encode, max_batch: int = 64, max_delay_ms: float = 5):
+        self.encode = encode
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self.requests = self.texts = self.batches = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="sidecar-encode", daemon=True)
+        self._thread.start()
+
+    def submit(self, texts) -> Future:
+        future = Future()
+        self._queue.put((texts, future))
+        return future
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            items, size = [item], len(item[0])
+            deadline = time.monotonic() + self.max_delay
+            stop = False
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                items.append(item)
+                size += len(item[0])
+            self._process(items)
+            if stop:
+                return
+
+    def _process(self, items):
+        texts = [text for batch, _ in items for text in batch]
+        try:
+            vectors = np.asarray(self.encode(texts), dtype=np.float32) if texts else None
+        except Exception as e:
+            logger.exception("Sidecar encode of %s texts failed: %s", len(texts), e)
+            for _, future in items:
+                future.set_exception(e)
+            return
+        self.requests += len(items)
+        self.texts += len(texts)
+        self.batches += 1
+        start = 0
+        for batch, future in items:
+            future.set_result(vectors[start:start + len(batch)] if batch else np.zeros((0, 0), np.float32))
+            start += len(batch)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server = self.server.sidecar
+        while True:
+            try:
+                header, _ = recv_frame(self.request)
+            except (ConnectionError, OSError, ValueError):
+                return
+            try:
+                response, payload = server.dispatch(header)
+            except Exception as e:
+                response, payload = {"ok": False, "error": f"{type(e).__name__}: {e}"}, b""
+            try:
+                send_frame(self.request, response, payload)
+            except OSError:
+                return
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = socket.SOMAXCONN
+
+
+class SidecarServer:
+    """
+    Serves `encode(texts)` (batched) and `transcribe(path)` on `path`.
+    """
+    def __init__(self, path: str, encode, transcribe=None, max_batch: int = 64, max_delay_ms: float = 5,
+                 transcribe_workers: int = 1, store_suffix: str = None):
+        self.path = path
+        self.store_suffix = store_suffix
+        self.batcher = EncodeBatcher(encode, max_batch=max_batch, max_delay_ms=max_delay_ms)
+        self.transcribe = transcribe
+        self.transcriptions = 0
+        self._transcribe_pool = ThreadPoolExecutor(max(1, transcribe_workers), thread_name_prefix="sidecar-asr")
+        self.started = time.time()
+        if os.path.exists(path):
+            os.unlink(path)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._server = _UnixServer(path, _Handler)
+        self._server.sidecar = self
+        os.chmod(path, 0o660)
+
+    def dispatch(self, header):
+        op = header.get("op")
+        if op == "encode":
+            vectors = self.batcher.submit(list(header["texts"])).result()
+            response = {"ok": True, "shape": list(vectors.shape)}
+            if self.store_suffix is not None:
+                response["store_suffix"] = self.store_suffix
+            return response, vectors.tobytes()
+        if op == "transcribe":
+            if self.transcribe is None:
+                return {"ok": False, "error": "transcription is not enabled on this sidecar"}, b""
+            text = self._transcribe_pool.submit(self.transcribe, header["path"]).result()
+            self.transcriptions += 1
+            return {"ok": True, "text": text}, b""
+        if op == "stats":
+            return {"ok": True, "stats": self.stats()}, b""
+        return {"ok": False, "error": f"unknown op {op!r}"}, b""
+
+    def stats(self) -> dict:
+        batcher = self.batcher
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "encode_requests": batcher.requests,
+            "encoded_texts": batcher.texts,
+            "encode_batches": batcher.batches,
+            "mean_batch": round(batcher.texts / batcher.batches, 2) if batcher.batches else 0.0,
+            "transcriptions": self.transcriptions,
+        }
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def shutdown(self):
+        self._server.shutdown()
+
+    def close(self):
+        self._server.server_close()
+        self.batcher.close()
+        self._transcribe_pool.shutdown(wait=False, cancel_futures=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
@@ -0,0 +1,42 @@
+# signals.py
+"""
+Keep the vector indexes (vector_index.py) in step with the models.
+
+Saves that may change the indexed text, and deletes, queue an `IndexJob`
+in the same transaction, so rolled-back rows are never indexed; the
+scoring worker embeds them (`vector_index.index_pending`) and skips rows
+whose text didn't change. Rows written with `bulk_create` or
+`QuerySet.update` send no signals; call `vector_index.index_documents`
+for them (or rebuild).
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import vector_index
+from .models import Candidate, IndexJob, JobDescription
+
+INDEXED_FIELDS = {
+    JobDescription: (vector_index.JOBS, "raw_text"),
+    Candidate: (vector_index.CANDIDATES, "parsed_text"),
+}
+
+
+@receiver(post_save, sender=JobDescription)
+@receiver(post_save, sender=Candidate)
+def index_on_save(sender, instance, created=False, update_fields=None, **kwargs):
+    name, field = INDEXED_FIELDS[sender]
+    if update_fields is not None and field not in update_fields:
+        return
+    if field in instance.get_deferred_fields():
+        return
+    if created and not (getattr(instance, field) or "").strip():
+        # Uploads start without text; extraction queues them once it is in.
+        return
+    IndexJob.objects.create(index=name, document_id=instance.pk)
+
+
+@receiver(post_delete, sender=JobDescription)
+@receiver(post_delete, sender=Candidate)
+def remove_on_delete(sender, instance, **kwargs):
+    name, _ = INDEXED_FIELDS[sender]
+    IndexJob.objects.create(index=name, document_id=instance.pk)
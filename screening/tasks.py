@@ -0,0 +1,196 @@
+# tasks.py
+"""
+Database-backed scoring queue.
+
+`CandidateCreateView` only stores the upload and enqueues a `ScoringJob`;
+the `run_scoring_worker` management command claims jobs stage by stage and
+runs the handlers below in per-stage process pools.
+"""
+import logging
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+
+from . import chunking, content_cache
+from .embeddings import get_embedding, seed as seed_embedding
+from .models import Candidate, ScoringJob
+from .profiles import get_profile
+from .scoring import verdict as score_verdict
+from .utils import extract_text, transcribe_video, analyze_resume_with_gemini
+
+logger = logging.getLogger(__name__)
+
+STAGES = [ScoringJob.STAGE_EXTRACT, ScoringJob.STAGE_TRANSCRIBE, ScoringJob.STAGE_SCORE]
+
+
+def enqueue_scoring(candidate: Candidate) -> ScoringJob:
+    """
+    Queue a fresh scoring run for `candidate`, cancelling any run that has
+    not been picked up yet so a re-upload doesn't get scored twice.
+    """
+    ScoringJob.objects.filter(
+        candidate=candidate, status=ScoringJob.STATUS_PENDING
+    ).update(status=ScoringJob.STATUS_FAILED, last_error="Superseded by a newer upload.")
+    return ScoringJob.objects.create(
+        candidate=candidate,
+        max_attempts=getattr(settings, "SCORING_MAX_ATTEMPTS", 3),
+    )
+
+
+def claim_next(stage: str):
+    """
+    Atomically move the oldest due job of `stage` from pending to running.
+    Returns the job id, or None when nothing is due.
+    """
+    now = timezone.now()
+    candidates = (
+        ScoringJob.objects.filter(status=ScoringJob.STATUS_PENDING, stage=stage, run_after__lte=now)
+        .order_by("run_after", "id")
+        .values_list("id", flat=True)[:5]
+    )
+    for job_id in candidates:
+        claimed = ScoringJob.objects.filter(id=job_id, status=ScoringJob.STATUS_PENDING).update(
+            status=ScoringJob.STATUS_RUNNING, attempts=F("attempts") + 1, updated_at=now
+        )
+        if claimed:
+            return job_id
+    return None
+
+
+def requeue_stale(timeout_seconds: int) -> int:
+    """
+    Return jobs left in `running` by a crashed worker to the queue.
+    """
+    cutoff = timezone.now() - timedelta(seconds=timeout_seconds)
+    return ScoringJob.objects.filter(status=ScoringJob.STATUS_RUNNING, updated_at__lt=cutoff).update(
+        status=ScoringJob.STATUS_PENDING, run_after=timezone.now()
+    )
+
+
+def retry_delay(attempts: int) -> float:
+    """
+    Exponential backoff with jitter: base, 2*base, 4*base ... capped.
+    """
+    base = getattr(settings, "SCORING_RETRY_BACKOFF_SECONDS", 10)
+    cap = getattr(settings, "SCORING_RETRY_BACKOFF_MAX_SECONDS", 600)
+    delay = min(cap, base * (2 ** max(attempts - 1, 0)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def record_failure(job_id: int, error: str):
+    job = ScoringJob.objects.filter(id=job_id).first()
+    if job is None:
+        return None
+    job.last_error = error[:2000]
+    if job.attempts >= job.max_attempts:
+        job.status = ScoringJob.STATUS_FAILED
+        Candidate.objects.filter(id=job.candidate_id).update(verdict="Failed")
+    else:
+        job.status = ScoringJob.STATUS_PENDING
+        job.run_after = timezone.now() + timedelta(seconds=retry_delay(job.attempts))
+    job.save(update_fields=["status", "last_error", "run_after", "updated_at"])
+    return job.status
+
+
+def _extract_resume(resume) -> str:
+    """
+    Resume text and embedding, served from the content cache when the same
+    file has been processed before. The whole-text embedding is only worth
+    computing with EMBEDDING_CHUNKING off; otherwise the candidate's
+    `IndexJob` embeds its windows once `parsed_text` is saved.
+    """
+    try:
+        digest = content_cache.file_digest(resume)
+    except Exception as e:
+        logger.warning("Could not hash %s, skipping the content cache: %s", resume.name, e)
+        digest = None
+    cached = content_cache.get(digest) if digest else None
+    if cached is not None:
+        text, vec = cached
+        if text and vec is not None:
+            seed_embedding(text, vec)
+        return text
+
+    text = extract_text(resume) or ""
+    vec = None
+    if text and chunking.mode() == "off":
+        try:
+            vec = get_embedding(text)
+        except Exception as e:
+            logger.warning("Embedding warm-up failed: %s", e)
+    if digest and text:
+        # An empty result may be a transient failure; retry it next time.
+        content_cache.put(digest, text, vec)
+    return text
+
+
+def run_extract(job: ScoringJob) -> str:
+    candidate = job.candidate
+    candidate.parsed_text = _extract_resume(candidate.resume)
+    candidate.save(update_fields=["parsed_text"])
+    if candidate.video:
+        return ScoringJob.STAGE_TRANSCRIBE
+    return ScoringJob.STAGE_SCORE
+
+
+def run_transcribe(job: ScoringJob) -> str:
+    video = job.candidate.video
+    if video and getattr(video, "path", None):
+        job.transcript = transcribe_video(video.path) or ""
+        job.save(update_fields=["transcript"])
+    return ScoringJob.STAGE_SCORE
+
+
+def run_score(job: ScoringJob):
+    candidate = job.candidate
+    resume_text = candidate.parsed_text or ""
+    if job.transcript:
+        resume_text += "\n" + job.transcript
+
+    profile = get_profile(candidate.applied_to)
+    analysis = analyze_resume_with_gemini(profile.raw_text, resume_text, keywords=profile.keywords)
+
+    candidate.missing_skills = analysis.get("missing_skills", [])
+    candidate.feedback = analysis.get("feedback", "")
+    candidate.score = analysis.get("final_score")
+    candidate.verdict = score_verdict(candidate.score)
+    candidate.save(update_fields=["missing_skills", "feedback", "score", "verdict"])
+    return None
+
+
+STAGE_HANDLERS = {
+    ScoringJob.STAGE_EXTRACT: run_extract,
+    ScoringJob.STAGE_TRANSCRIBE: run_transcribe,
+    ScoringJob.STAGE_SCORE: run_score,
+}
+
+
+def execute_job(job_id: int) -> str:
+    """
+    Run the current stage of a claimed job and advance it. Executed inside
+    the worker's process pools; failures are recorded for retry here so the
+    parent only has to deal with crashed processes.
+    """
+    close_old_connections()
+    try:
+        job = ScoringJob.objects.select_related("candidate__applied_to").get(id=job_id)
+        next_stage = STAGE_HANDLERS[job.stage](job)
+        if next_stage:
+            job.stage = next_stage
+            job.status = ScoringJob.STATUS_PENDING
+            job.attempts = 0
+            job.run_after = timezone.now()
+        else:
+            job.status = ScoringJob.STATUS_DONE
+        job.last_error = ""
+        job.save(update_fields=["stage", "status", "attempts", "run_after", "last_error", "updated_at"])
+        return job.status
+    except Exception as e:
+        logger.exception("Scoring job %s failed: %s", job_id, e)
+        return record_failure(job_id, f"{type(e).__name__}: {e}")
+    finally:
+        close_old_connections()
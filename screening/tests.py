@@ -1,3 +1,786 @@
-from django.test import TestCase
+import importlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import SkipTest, mock, skipIf
 
-# Create your tests here.
+import numpy as np
+import requests
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from screening import (
+    bulk_import, chunking, content_cache, embedding_backends, embeddings, gemini, profiles, sidecar, vector_index,
+)
+from screening.matching import SkillMatcher
+from screening.models import Candidate, CandidateImport, Embedding, IndexJob, JobDescription, ScoringJob
+from screening.rescoring import rescore_job
+from screening.utils import extract_text, transcribe_video
+
+
+def _gemini_body(text):
+    return {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+
+
+class StubGeminiServer:
+    """
+    Local HTTP server standing in for the Gemini API. Each request pops the
+    next scripted (status, headers, body) and records the prompt and the
+    client's port, so tests can tell whether a connection was reused.
+    """
+    def __init__(self, responses=()):
+        self.responses = list(responses)
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.requests.append({
+                    "path": self.path,
+                    "port": self.client_address[1],
+                    "api_key": self.headers.get("x-goog-api-key"),
+                    "prompt": payload["contents"][0]["parts"][0]["text"],
+                })
+                status, headers, body = stub.responses.pop(0) if stub.responses else \
+                    (200, {}, _gemini_body("ok"))
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _client(stub, **kwargs):
+    kwargs.setdefault("limiter", gemini.TokenBucket(0, 1))
+    kwargs.setdefault("cache", gemini.ResponseCache(16, 60))
+    kwargs.setdefault("max_retries", 3)
+    return gemini.GeminiClient("test-key", model="stub-model", base_url=stub.url, timeout=5, **kwargs)
+
+
+class GeminiClientTests(SimpleTestCase):
+    def test_retries_429_and_5xx_with_backoff(self):
+        responses = [(429, {"Retry-After": "0"}, {}), (503, {}, {}), (200, {}, _gemini_body("done"))]
+        with StubGeminiServer(responses) as stub, mock.patch.object(gemini.time, "sleep") as sleep:
+            data = _client(stub).generate("score this")
+        self.assertEqual(gemini.response_text(data), "done")
+        self.assertEqual(len(stub.requests), 3)
+        self.assertEqual(stub.requests[0]["path"], "/models/stub-model:generateContent")
+        self.assertEqual(stub.requests[0]["api_key"], "test-key")
+        delays = [call.args[0] for call in sleep.call_args_list]
+        # Retry-After is honoured; otherwise full jitter up to base * 2**attempt.
+        self.assertEqual(delays[0], 0)
+        self.assertTrue(0 <= delays[1] <= gemini.BACKOFF_BASE_SECONDS * 2)
+
+    def test_gives_up_after_max_retries(self):
+        with StubGeminiServer([(500, {}, {})] * 5) as stub, mock.patch.object(gemini.time, "sleep"):
+            with self.assertRaises(gemini.GeminiError):
+                _client(stub, max_retries=2).generate("score this")
+        self.assertEqual(len(stub.requests), 3)
+
+    def test_client_errors_are_not_retried(self):
+        with StubGeminiServer([(400, {}, {"error": "bad request"})]) as stub:
+            with self.assertRaises(requests.HTTPError):
+                _client(stub).generate("score this")
+        self.assertEqual(len(stub.requests), 1)
+
+    def test_cache_serves_repeated_prompts(self):
+        with StubGeminiServer() as stub:
+            client = _client(stub)
+            first = client.generate("same resume, same job")
+            second = client.generate("same resume, same job")
+            client.generate("another resume")
+        self.assertEqual(first, second)
+        self.assertEqual([r["prompt"] for r in stub.requests], ["same resume, same job", "another resume"])
+
+    def test_failures_are_not_cached(self):
+        with StubGeminiServer([(500, {}, {})]) as stub, mock.patch.object(gemini.time, "sleep"):
+            client = _client(stub, max_retries=0)
+            with self.assertRaises(gemini.GeminiError):
+                client.generate("score this")
+            self.assertEqual(gemini.response_text(client.generate("score this")), "ok")
+        self.assertEqual(len(stub.requests), 2)
+
+    def test_session_reuses_one_connection(self):
+        with StubGeminiServer() as stub:
+            client = _client(stub)
+            for i in range(3):
+                client.generate(f"resume {i}")
+        self.assertEqual(len(stub.requests), 3)
+        self.assertEqual(len({r["port"] for r in stub.requests}), 1)
+
+    def test_rate_limiter_spaces_requests(self):
+        with StubGeminiServer() as stub:
+            client = _client(stub, limiter=gemini.TokenBucket(rate=20, burst=2))
+            started = time.monotonic()
+            for i in range(6):
+                client.generate(f"resume {i}")
+            elapsed = time.monotonic() - started
+        # Two requests ride the burst, the other four wait 1/20 s each.
+        self.assertGreaterEqual(elapsed, 4 / 20 * 0.9)
+        self.assertEqual(len(stub.requests), 6)
+
+    def test_get_client_is_shared_per_key(self):
+        self.assertIs(gemini.get_client("key-a"), gemini.get_client("key-a"))
+        self.assertIsNot(gemini.get_client("key-a"), gemini.get_client("key-b"))
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_burst_then_rate(self):
+        bucket = gemini.TokenBucket(rate=50, burst=3)
+        started = time.monotonic()
+        for _ in range(3):
+            bucket.acquire()
+        self.assertLess(time.monotonic() - started, 0.05)
+        for _ in range(5):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 5 / 50 * 0.9)
+
+    def test_zero_rate_disables_limiting(self):
+        bucket = gemini.TokenBucket(rate=0, burst=1)
+        started = time.monotonic()
+        for _ in range(100):
+            bucket.acquire()
+        self.assertLess(time.monotonic() - started, 0.05)
+
+
+class ResponseCacheTests(SimpleTestCase):
+    def test_lru_eviction(self):
+        cache = gemini.ResponseCache(maxsize=2, ttl=60)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertEqual((cache.get("a"), cache.get("b"), cache.get("c")), (1, None, 3))
+
+    def test_ttl_expiry(self):
+        cache = gemini.ResponseCache(maxsize=2, ttl=10)
+        with mock.patch.object(gemini.time, "monotonic", return_value=100.0):
+            cache.put("a", 1)
+        with mock.patch.object(gemini.time, "monotonic", return_value=105.0):
+            self.assertEqual(cache.get("a"), 1)
+        with mock.patch.object(gemini.time, "monotonic", return_value=111.0):
+            self.assertIsNone(cache.get("a"))
+
+    def test_key_depends_on_model_and_prompt(self):
+        self.assertEqual(gemini.prompt_key("m", "p"), gemini.prompt_key("m", "p"))
+        self.assertNotEqual(gemini.prompt_key("m", "p"), gemini.prompt_key("n", "p"))
+        self.assertNotEqual(gemini.prompt_key("m", "p"), gemini.prompt_key("m", "q"))
+
+
+class LeaderboardPaginationTests(TestCase):
+    def test_tied_scores_are_paged_exactly_once(self):
+        job = JobDescription.objects.create(title="Backend", raw_text="python")
+        Candidate.objects.bulk_create([
+            Candidate(applied_to=job, resume=f"resumes/{i}.txt", score=[50.0, 70.0, 50.0][i % 3])
+            for i in range(45)
+        ])
+        scores = dict(Candidate.objects.values_list("id", "score"))
+        expected = {
+            "": sorted(scores, key=lambda pk: (-scores[pk], -pk)),
+            "-score": sorted(scores, key=lambda pk: (-scores[pk], -pk)),
+            "score": sorted(scores, key=lambda pk: (scores[pk], pk)),
+        }
+        for ordering in expected:
+            seen = []
+            url = reverse("api-jobs-candidates", args=[job.pk]) + f"?page_size=4&ordering={ordering}"
+            while url:
+                page = self.client.get(url).json()
+                seen += [row["id"] for row in page["results"]]
+                url = page["next"]
+            # Ties in id order, so the cursor's offset lands on the same rows.
+            self.assertEqual(seen, expected[ordering], ordering)
+
+
+class ExtractTextTests(SimpleTestCase):
+    def test_plain_text(self):
+        self.assertEqual(extract_text(ContentFile(b"Python developer", name="cv.txt")), "Python developer")
+
+    def test_broken_docx_falls_back_to_its_bytes(self):
+        self.assertEqual(extract_text(ContentFile(b"Python developer", name="cv.docx")), "Python developer")
+
+    def test_broken_pdf_yields_no_text(self):
+        with self.assertLogs("screening.utils", "ERROR"):
+            self.assertEqual(extract_text(ContentFile(b"%PDF-1.4 garbage", name="cv.pdf")), "")
+
+
+class ContentCacheTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings_override = override_settings(CONTENT_CACHE_DIR=tmp.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_round_trip(self):
+        content_cache.put("ab" * 32, "Python developer", np.ones(4, dtype=np.float32))
+        text, vector = content_cache.get("ab" * 32)
+        self.assertEqual(text, "Python developer")
+        self.assertEqual(vector.tolist(), [1.0] * 4)
+
+    def test_empty_text_is_not_cached(self):
+        content_cache.put("ab" * 32, "", np.ones(4, dtype=np.float32))
+        self.assertIsNone(content_cache.get("ab" * 32))
+
+    def test_chunked_mode_skips_the_whole_text_embedding(self):
+        from screening import tasks
+        with override_settings(EMBEDDING_CHUNKING="mean"), mock.patch.object(tasks, "get_embedding") as encode:
+            text = tasks._extract_resume(ContentFile(b"Python developer", name="cv.txt"))
+        encode.assert_not_called()
+        self.assertEqual(text, "Python developer")
+        self.assertEqual(content_cache.get(content_cache.file_digest(ContentFile(b"Python developer"))),
+                         ("Python developer", None))
+
+    def test_vectors_from_another_backend_are_dropped(self):
+        with mock.patch.object(embeddings, "store_name", return_value="all-MiniLM-L6-v2"):
+            content_cache.put("ab" * 32, "Python developer", np.ones(4, dtype=np.float32))
+        with mock.patch.object(embeddings, "store_name", return_value="all-MiniLM-L6-v2-int8"):
+            self.assertEqual(content_cache.get("ab" * 32), ("Python developer", None))
+
+
+def _tiny_sentence_model(path):
+    """
+    Save a randomly initialised two-layer BERT with mean pooling as a
+    sentence-transformers model, so export can be tested offline.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    words = ("senior python developer django postgresql aws data pipelines spark team engineers nurse "
+             "frontend react backend payments accountant machine learning store manager with and a of "
+             "for to our in").split()
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", *words, *"abcdefghijklmnopqrstuvwxyz0123456789.,;:-",
+             *(f"##{c}" for c in "abcdefghijklmnopqrstuvwxyz")]
+    hf = os.path.join(path, "hf")
+    os.makedirs(hf)
+    with open(os.path.join(path, "vocab.txt"), "w") as f:
+        f.write("\n".join(vocab))
+    torch.manual_seed(0)
+    config = BertConfig(vocab_size=len(vocab), hidden_size=64, num_hidden_layers=2, num_attention_heads=4,
+                        intermediate_size=128)
+    BertModel(config).save_pretrained(hf)
+    BertTokenizerFast(vocab_file=os.path.join(path, "vocab.txt")).save_pretrained(hf)
+    transformer = models.Transformer(hf, max_seq_length=128)
+    model = SentenceTransformer(modules=[transformer, models.Pooling(64, "mean"), models.Normalize()])
+    model.save(os.path.join(path, "st"))
+    return os.path.join(path, "st")
+
+
+def _missing(*modules):
+    import importlib.util
+    return [m for m in modules if importlib.util.find_spec(m) is None]
+
+
+@skipIf(_missing("onnx", "onnxruntime", "torch", "transformers"), "needs onnx, onnxruntime and transformers")
+class EmbeddingParityTests(SimpleTestCase):
+    """
+    The ONNX export against sentence-transformers on the PARITY_TEXTS, fp32
+    and int8, within the bounds `semantic_score` can tolerate.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        try:
+            from sentence_transformers import models  # noqa: F401
+        except ImportError:
+            raise SkipTest("needs sentence-transformers")
+        tmp = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(tmp.cleanup)
+        cls.model = _tiny_sentence_model(tmp.name)
+        cls.onnx_dir = embedding_backends.export_onnx(cls.model, os.path.join(tmp.name, "onnx"), quantize=True)
+        cls.reference = embedding_backends.load_backend("torch", cls.model)
+
+    def report(self, quantized):
+        candidate = embedding_backends.load_backend("onnx", onnx_dir=self.onnx_dir, quantized=quantized)
+        return embedding_backends.parity_report(self.reference, candidate)
+
+    def test_fp32_matches_torch(self):
+        report = self.report(quantized=False)
+        self.assertGreater(report["min_vector_cosine"], 0.9999)
+        self.assertLess(report["max_semantic_score_drift"], 0.01)
+
+    def test_int8_stays_close(self):
+        report = self.report(quantized=True)
+        self.assertGreater(report["min_vector_cosine"], 0.99)
+        self.assertLess(report["max_semantic_score_drift"], 1.0)
+
+
+class SidecarClientTests(SimpleTestCase):
+    def serve(self, encode, transcribe=None, **kwargs):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        server = sidecar.SidecarServer(os.path.join(tmp.name, "sidecar.sock"), encode, transcribe=transcribe,
+                                       max_delay_ms=0, **kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_encode_is_split_into_max_batch_requests(self):
+        batches = []
+
+        def encode(texts):
+            batches.append(len(texts))
+            return np.array([[float(t)] for t in texts], dtype=np.float32)
+
+        server = self.serve(encode, store_suffix="-int8")
+        client = sidecar.SidecarClient(server.path, max_batch=4)
+        vectors = client.encode([str(i) for i in range(10)])
+        self.assertEqual(vectors[:, 0].tolist(), list(range(10)))
+        self.assertEqual(batches, [4, 4, 2])
+        self.assertEqual(client.store_suffix, "-int8")
+
+    def test_timeout_does_not_mark_the_sidecar_down(self):
+        delays = [0.5, 0]
+
+        def encode(texts):
+            time.sleep(delays.pop(0))
+            return np.zeros((len(texts), 2), dtype=np.float32)
+
+        server = self.serve(encode)
+        client = sidecar.SidecarClient(server.path, timeout=0.1)
+        with self.assertRaises(sidecar.SidecarTimeout):
+            client.encode(["slow"])
+        time.sleep(0.5)
+        self.assertEqual(client.encode(["fast"]).shape, (1, 2))
+
+    def test_unreachable_sidecar_is_marked_down(self):
+        client = sidecar.SidecarClient("/nonexistent/sidecar.sock", retry_after=60)
+        real_close = sidecar.socket.socket.close
+        with mock.patch.object(sidecar.socket.socket, "close", autospec=True, side_effect=real_close) as close, \
+                self.assertRaises(sidecar.SidecarUnavailable):
+            client.encode(["text"])
+        close.assert_called_once()
+        with mock.patch.object(client, "_connect") as connect, self.assertRaises(sidecar.SidecarUnavailable):
+            client.encode(["text"])
+        connect.assert_not_called()
+
+    def test_transcription_falls_back_in_process_when_sidecar_cannot(self):
+        server = self.serve(lambda texts: np.zeros((len(texts), 2), dtype=np.float32))
+        client = sidecar.SidecarClient(server.path)
+        with mock.patch.object(sidecar, "get_client", return_value=client), \
+                mock.patch("screening.utils.VOSK_AVAILABLE", False), \
+                self.assertLogs("screening.utils", "WARNING") as logs:
+            self.assertEqual(transcribe_video("interview.mp4"), "")
+        self.assertIn("transcribing in-process", logs.output[0])
+
+
+class ClaimNextTests(TestCase):
+    def test_command_line_imports_are_not_claimed(self):
+        job = JobDescription.objects.create(title="Backend", raw_text="python")
+        CandidateImport.objects.create(job=job, source_name="resumes.zip")
+        uploaded = CandidateImport.objects.create(job=job, archive="imports/resumes.zip")
+        self.assertEqual(bulk_import.claim_next(), uploaded.pk)
+        self.assertIsNone(bulk_import.claim_next())
+
+
+class BulkImportTests(TestCase):
+    def setUp(self):
+        for setting in ("MEDIA_ROOT", "CONTENT_CACHE_DIR"):
+            tmp = tempfile.TemporaryDirectory()
+            self.addCleanup(tmp.cleanup)
+            settings_override = override_settings(**{setting: tmp.name})
+            settings_override.enable()
+            self.addCleanup(settings_override.disable)
+        self.job = JobDescription.objects.create(title="Backend", raw_text="python")
+        self.record = CandidateImport.objects.create(job=self.job, source_name="resumes.zip")
+
+    def archive(self, files):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+            for name, data in files.items():
+                archive.writestr(name, data)
+        return buffer.getvalue()
+
+    def stored_files(self):
+        directory = f"resumes/import-{self.record.pk}"
+        if not default_storage.exists(directory):
+            return []
+        return sorted(default_storage.listdir(directory)[1])
+
+    def test_manifest_rows_are_keyed_by_path_or_file_name(self):
+        rows = bulk_import.read_manifest(
+            "\ufeffFile,Name,Email\r\nCVs\\Ann.txt,Ann Marie Lee,ann@example.com\r\nbob.pdf,Bob,\r\n,Nobody,\r\n"
+            .encode("utf-8")
+        )
+        self.assertEqual(rows, {
+            "cvs/ann.txt": {"first_name": "Ann", "last_name": "Marie Lee", "email": "ann@example.com"},
+            "bob.pdf": {"first_name": "Bob", "last_name": "", "email": ""},
+        })
+        with self.assertRaises(bulk_import.ArchiveError):
+            bulk_import.read_manifest(b"name,email\nAnn,ann@example.com\n")
+
+    @override_settings(BULK_IMPORT_MAX_ENTRY_BYTES=64)
+    def test_skipped_entries_are_recorded_with_their_reason(self):
+        Candidate.objects.create(email="ann@example.com", applied_to=self.job, resume="resumes/ann.txt")
+        data = self.archive({
+            "ann.txt": b"Python developer", "photo.png": b"png", "big.txt": b"x" * 65,
+            "broken.txt": b"CORRUPT MEMBER", "cvs/bob.txt": b"Django developer",
+        }).replace(b"CORRUPT MEMBER", b"CORRUPT MEMBEX")
+        manifest = b"file,first_name,email\nann.txt,Ann,Ann@Example.com\nbob.txt,Bob,bob@example.com\n"
+        bulk_import.run_import(self.record, io.BytesIO(data), manifest, workers=1)
+
+        self.assertEqual(self.record.status, CandidateImport.STATUS_DONE)
+        self.assertEqual((self.record.created, self.record.skipped, self.record.failed), (1, 4, 0))
+        reasons = {error["file"]: error["error"] for error in self.record.errors}
+        self.assertEqual(reasons["ann.txt"], "ann@example.com has already applied to this job")
+        self.assertEqual(reasons["photo.png"], "unsupported file type")
+        self.assertEqual(reasons["big.txt"], "larger than 64 bytes")
+        self.assertTrue(reasons["broken.txt"].startswith("unreadable: BadZipFile"))
+        bob = Candidate.objects.get(email="bob@example.com")
+        self.assertEqual((bob.first_name, bob.parsed_text), ("Bob", "Django developer"))
+        self.assertEqual(bob.resume.name, f"resumes/import-{self.record.pk}/bob.txt")
+        # The corrupt member's partial copy is not left in storage.
+        self.assertEqual(self.stored_files(), ["bob.txt"])
+
+    def test_entry_losing_the_insert_race_is_skipped(self):
+        # ann@ uploads through the API after the importer read the job's emails.
+        Candidate.objects.create(email="ann@example.com", applied_to=self.job, resume="resumes/ann.txt")
+        importer = bulk_import.BulkImporter(self.record, None)
+        entries = []
+        for name, email in (("ann.txt", "ann@example.com"), ("bob.txt", "bob@example.com")):
+            entry = bulk_import._Entry(0, zipfile.ZipInfo(name), {"email": email})
+            entry.stored = default_storage.save(f"resumes/import-{self.record.pk}/{name}", ContentFile(b"cv"))
+            entries.append(entry)
+        ann, bob = entries
+
+        created = importer._create(entries)
+        self.assertEqual([(entry, candidate.email) for entry, candidate in created], [(bob, "bob@example.com")])
+        self.assertIsNotNone(created[0][1].pk)
+        self.assertEqual(ann.skipped, "ann@example.com has already applied to this job")
+        self.assertIsNone(ann.stored)
+        self.assertEqual(self.stored_files(), ["bob.txt"])
+
+    def test_resume_starts_after_the_last_committed_batch(self):
+        data = self.archive({"a.txt": b"Python", "b.txt": b"Django", "c.txt": b"Docker"})
+        # The worker dies in the second batch, after all three files were stored.
+        with mock.patch.object(bulk_import.BulkImporter, "_embed", side_effect=[None, RuntimeError("killed")]), \
+                self.assertRaises(RuntimeError):
+            bulk_import.run_import(self.record, io.BytesIO(data), batch_size=1, workers=1)
+        self.assertEqual((self.record.status, self.record.processed), (CandidateImport.STATUS_FAILED, 1))
+        self.assertEqual(self.stored_files(), ["a.txt", "b.txt", "c.txt"])
+        first = Candidate.objects.get()
+
+        bulk_import.run_import(self.record, io.BytesIO(data), batch_size=1, workers=1)
+
+        self.assertEqual((self.record.status, self.record.processed), (CandidateImport.STATUS_DONE, 3))
+        self.assertEqual(self.record.created, 3)
+        self.assertEqual(list(Candidate.objects.order_by("pk").values_list("parsed_text", flat=True)),
+                         ["Python", "Django", "Docker"])
+        self.assertEqual(Candidate.objects.order_by("pk").first(), first)
+        self.assertEqual(self.stored_files(), ["a.txt", "b.txt", "c.txt"])
+        self.assertEqual(ScoringJob.objects.filter(stage=ScoringJob.STAGE_SCORE).count(), 3)
+
+
+class SkillMatcherTests(SimpleTestCase):
+    def test_matches_the_per_skill_loop(self):
+        from rapidfuzz import fuzz
+        skills = ["Python", "python", " Docker ", "kubernetes", "ci/cd", "postgres", "go lang", ""]
+        resume = "Built Django services on PostgreSQL with Docker and a CI-CD pipeline."
+        expected = [s for s in skills if s.lower().strip() in resume.lower()
+                    or fuzz.partial_ratio(s.lower().strip(), resume.lower()) > 75]
+        present, missing = SkillMatcher(skills, workers=-1).match(resume)
+        self.assertEqual(present, expected)
+        self.assertEqual(missing, [s for s in skills if s not in expected])
+
+
+class CandidateUpsertTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.job = JobDescription.objects.create(title="Backend", raw_text="python")
+
+    def upload(self, email, first_name="Ann"):
+        return self.client.post(reverse("api-candidates-create"), {
+            "first_name": first_name, "last_name": "Lee", "email": email, "applied_to": self.job.pk,
+            "resume": SimpleUploadedFile("cv.txt", b"Python developer"),
+        })
+
+    def test_reupload_updates_the_same_candidate(self):
+        first = self.upload("Ann@Example.com").json()
+        second = self.upload(" ann@example.com", first_name="Anne").json()
+        self.assertEqual((first["status"], second["status"]), ("created", "updated"))
+        self.assertEqual(first["id"], second["id"])
+        candidate = Candidate.objects.get()
+        self.assertEqual((candidate.email, candidate.first_name), ("ann@example.com", "Anne"))
+        # The first upload's run is superseded, not scored twice.
+        self.assertEqual(ScoringJob.objects.filter(status=ScoringJob.STATUS_PENDING).count(), 1)
+
+    def test_lost_insert_race_updates_the_winner(self):
+        existing = Candidate.objects.create(first_name="Ann", email="ann@example.com", applied_to=self.job,
+                                            resume="resumes/old.txt")
+        locked = Candidate.objects.select_for_update
+        # The first lookup runs before the concurrent upload's insert commits.
+        lookups = [Candidate.objects.none(), locked()]
+        with mock.patch.object(Candidate.objects, "select_for_update", side_effect=lookups):
+            response = self.upload("ann@example.com", first_name="Anne").json()
+        self.assertEqual((response["status"], response["id"]), ("updated", existing.pk))
+        self.assertEqual(Candidate.objects.get().first_name, "Anne")
+
+    def test_email_is_unique_per_job(self):
+        Candidate.objects.create(email="ann@example.com", applied_to=self.job, resume="resumes/a.txt")
+        other_job = JobDescription.objects.create(title="Frontend", raw_text="react")
+        Candidate.objects.create(email="ann@example.com", applied_to=other_job, resume="resumes/b.txt")
+        Candidate.objects.create(email="", applied_to=self.job, resume="resumes/c.txt")
+        Candidate.objects.create(email="", applied_to=self.job, resume="resumes/d.txt")
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Candidate.objects.create(email="ANN@example.com", applied_to=self.job, resume="resumes/e.txt")
+
+
+class NormalizeEmailsMigrationTests(TestCase):
+    migration = importlib.import_module("screening.migrations.0005_candidate_indexes_and_unique_email")
+
+    def test_duplicates_are_listed_not_deleted(self):
+        job = JobDescription.objects.create(title="Backend", raw_text="python")
+        # bulk_create skips `Candidate.save`, like rows written before it normalised emails.
+        rows = Candidate.objects.bulk_create([
+            Candidate(email="Ann@Example.com", applied_to=job, resume="resumes/a.txt"),
+            Candidate(email="ann@example.com ", applied_to=job, resume="resumes/b.txt"),
+            Candidate(email="Bob@Example.com", applied_to=job, resume="resumes/c.txt"),
+        ])
+        with self.assertRaises(RuntimeError) as raised:
+            self.migration.normalize_candidate_emails(apps, None)
+        self.assertIn(f"ann@example.com on job {job.pk}: candidates {rows[0].pk}, {rows[1].pk}",
+                      str(raised.exception))
+        self.assertNotIn("bob@example.com", str(raised.exception))
+        self.assertEqual(Candidate.objects.count(), 3)
+        self.assertEqual(Candidate.objects.get(pk=rows[2].pk).email, "Bob@Example.com")
+
+    def test_normalizes_emails_when_there_are_no_duplicates(self):
+        job = JobDescription.objects.create(title="Backend", raw_text="python")
+        Candidate.objects.bulk_create([Candidate(email=" Bob@Example.com", applied_to=job, resume="resumes/c.txt")])
+        self.migration.normalize_candidate_emails(apps, None)
+        self.assertEqual(Candidate.objects.get().email, "bob@example.com")
+
+
+def _unit_vectors(n, dim=8, seed=0):
+    return vector_index.normalize(np.random.default_rng(seed).normal(size=(n, dim)))
+
+
+class VectorIndexTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+
+    def open(self):
+        return vector_index.VectorIndex("candidates", directory=self.dir)
+
+    def test_upsert_skips_unchanged_text(self):
+        index, vectors = self.open(), _unit_vectors(2)
+        self.assertTrue(index.upsert(1, vector_index.text_digest("a"), vectors[0]))
+        self.assertFalse(index.upsert(1, vector_index.text_digest("a"), vectors[1]))
+        self.assertTrue(index.upsert(1, vector_index.text_digest("b"), vectors[1]))
+        self.assertEqual(len(index), 1)
+        (doc_id, sim), = index.search(vectors[1], k=5)
+        self.assertEqual(doc_id, 1)
+        self.assertAlmostEqual(sim, 1.0, places=5)
+
+    def test_delete(self):
+        index, vectors = self.open(), _unit_vectors(3)
+        index.upsert_many([(i, vector_index.text_digest(str(i)), v) for i, v in enumerate(vectors)])
+        self.assertTrue(index.delete(1))
+        self.assertFalse(index.delete(1))
+        self.assertEqual(sorted(doc_id for doc_id, _ in index.search(vectors[1], k=5)), [0, 2])
+
+    def test_compaction_keeps_results(self):
+        index, vectors = self.open(), _unit_vectors(20)
+        index.upsert_many([(i, vector_index.text_digest(str(i)), v) for i, v in enumerate(vectors)])
+        index.delete(3)
+        before = index.search(vectors[5], k=4)
+        index.compact()
+        self.assertEqual(index.stats()["journal_records"], 0)
+        self.assertEqual(index.generation, 1)
+        self.assertEqual(len(index), 19)
+        self.assertEqual([doc_id for doc_id, _ in index.search(vectors[5], k=4)], [doc_id for doc_id, _ in before])
+        self.assertEqual(index.digest(5), vector_index.text_digest("5"))
+
+    def test_ivf_lists_find_exact_matches(self):
+        vectors = _unit_vectors(300, dim=16)
+        with override_settings(VECTOR_INDEX_IVF_MIN_SIZE=100, VECTOR_INDEX_NPROBE=4):
+            index = self.open()
+            index.upsert_many([(i, vector_index.text_digest(str(i)), v) for i, v in enumerate(vectors)])
+            index.compact()
+            self.assertIsNotNone(index.centroids)
+            for i in (0, 150, 299):
+                self.assertEqual(index.search(vectors[i], k=1)[0][0], i)
+
+    def test_other_processes_see_writes_after_reopen(self):
+        writer, vectors = self.open(), _unit_vectors(4)
+        writer.upsert_many([(i, vector_index.text_digest(str(i)), v) for i, v in enumerate(vectors[:2])])
+        reader = self.open()
+        self.assertEqual(reader.search(vectors[1], k=1)[0][0], 1)
+        # Journal records appended after the reader opened are replayed on its next query...
+        writer.upsert(2, vector_index.text_digest("2"), vectors[2])
+        writer.delete(0)
+        self.assertEqual(sorted(doc_id for doc_id, _ in reader.search(vectors[2], k=5)), [1, 2])
+        # ...and so is a snapshot written by another process.
+        writer.compact()
+        writer.upsert(3, vector_index.text_digest("3"), vectors[3])
+        self.assertEqual(sorted(doc_id for doc_id, _ in reader.search(vectors[3], k=5)), [1, 2, 3])
+        self.assertEqual(reader.generation, 1)
+
+
+class IndexQueueTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings_override = override_settings(VECTOR_INDEX_DIR=tmp.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        indexes = mock.patch.dict(vector_index._indexes, clear=True)
+        indexes.start()
+        self.addCleanup(indexes.stop)
+
+    def test_saves_are_indexed_by_the_worker_not_the_request(self):
+        with mock.patch.object(vector_index, "index_documents") as index_documents:
+            job = JobDescription.objects.create(title="Backend", raw_text="Python developer")
+            candidate = Candidate.objects.create(applied_to=job, resume="resumes/a.txt")
+        index_documents.assert_not_called()
+        self.assertEqual(list(IndexJob.objects.values_list("index", "document_id")), [("jobs", job.pk)])
+
+        candidate.parsed_text = "Python and Django"
+        candidate.save(update_fields=["parsed_text"])
+        self.assertEqual(vector_index.index_pending(), 2)
+        self.assertFalse(IndexJob.objects.exists())
+        self.assertEqual(len(vector_index.get_index("jobs")), 1)
+        self.assertEqual(len(vector_index.get_index("candidates")), 1)
+
+        candidate.delete()
+        self.assertEqual(len(vector_index.get_index("candidates")), 1)
+        self.assertEqual(vector_index.index_pending(), 1)
+        self.assertEqual(len(vector_index.get_index("candidates")), 0)
+
+
+class ChunkingTests(SimpleTestCase):
+    def words(self, prefix, n):
+        return " ".join(f"{prefix}{i}" for i in range(n))
+
+    def test_windows_overlap_and_never_span_sections(self):
+        text = f"Experience\n{self.words('e', 100)}\nSKILLS\n{self.words('s', 60)}"
+        chunks = chunking.chunk_text(text, max_words=50, overlap=10)
+        experience = [c for c in chunks if c.split()[1].startswith("e")]
+        skills = [c for c in chunks if c.split()[1].startswith("s") or c.startswith("SKILLS")]
+        self.assertEqual(len(experience) + len(skills), len(chunks))
+        self.assertTrue(all(len(c.split()) <= 50 for c in chunks))
+        self.assertEqual(chunks[0].split()[:2], ["Experience", "e0"])
+        # Consecutive windows of one section share `overlap` words.
+        self.assertEqual(chunks[0].split()[-10:], chunks[1].split()[:10])
+        self.assertTrue(skills[0].startswith("SKILLS s0"))
+        self.assertTrue(skills[-1].endswith("s59"))
+
+    def test_small_sections_are_merged(self):
+        text = f"Summary\n{self.words('a', 5)}\nEducation\n{self.words('b', 5)}"
+        self.assertEqual(chunking.chunk_text(text, max_words=50, overlap=10),
+                         [f"Summary {self.words('a', 5)} Education {self.words('b', 5)}"])
+
+    def test_max_chunks_and_empty_text(self):
+        chunks = chunking.chunk_text(self.words("w", 1000), max_words=20, overlap=0, max_chunks=3)
+        self.assertEqual(chunks, [self.words("w", 20), " ".join(f"w{i}" for i in range(20, 40)),
+                                  " ".join(f"w{i}" for i in range(40, 60))])
+        self.assertEqual(chunking.chunk_text("  "), [""])
+
+    def test_mean_and_max_pooling(self):
+        vectors = np.array([[3.0, 0.0], [0.0, 2.0]])
+        np.testing.assert_allclose(chunking.pool(vectors, "mean"), [2 ** -0.5, 2 ** -0.5], rtol=1e-6)
+        vectors = np.array([[1.0, 0.0, 0.0], [0.0, 1.0, -1.0]])
+        # Element-wise max of the unit vectors [1, 0, 0] and [0, .71, -.71], renormalised.
+        expected = np.array([1.0, 2 ** -0.5, 0.0])
+        np.testing.assert_allclose(chunking.pool(vectors, "max"), expected / np.linalg.norm(expected), rtol=1e-6)
+
+    def test_document_vectors_follow_the_mode(self):
+        def fake_embeddings(texts):
+            return np.array([[len(t.split()), 1.0] for t in texts], dtype=np.float32)
+
+        text = f"Experience\n{self.words('e', 100)}"
+        with mock.patch.object(embeddings, "get_embeddings", side_effect=fake_embeddings) as get:
+            with override_settings(EMBEDDING_CHUNKING="off"):
+                chunking.document_vectors([text])
+            self.assertEqual(get.call_args.args[0], [text])
+            with override_settings(EMBEDDING_CHUNKING="mean", EMBEDDING_CHUNK_WORDS=50, EMBEDDING_CHUNK_OVERLAP=10):
+                vector, = chunking.document_vectors([text])
+            self.assertEqual(len(get.call_args.args[0]), 3)
+            self.assertAlmostEqual(float(np.linalg.norm(vector)), 1.0, places=5)
+
+
+class JobProfileTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings_override = override_settings(VECTOR_INDEX_DIR=tmp.name, EMBEDDING_CHUNKING="off")
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        indexes = mock.patch.dict(vector_index._indexes, clear=True)
+        indexes.start()
+        self.addCleanup(indexes.stop)
+        profiles.CACHE.clear()
+        self.job = JobDescription.objects.create(title="Backend", raw_text="python\ndjango\ndocker")
+
+    def test_rescoring_reuses_the_profile_matcher(self):
+        Candidate.objects.create(applied_to=self.job, resume="resumes/a.txt", parsed_text="python and docker")
+        with mock.patch("screening.matching.SkillMatcher", wraps=SkillMatcher) as built:
+            rescore_job(self.job)
+            rescore_job(self.job)
+        built.assert_called_once_with(["python", "django", "docker"], workers=-1)
+        self.assertEqual(Candidate.objects.get().rescore_missing_skills, ["django"])
+
+    def test_jd_embedding_is_precomputed_by_the_worker(self):
+        vector_index.index_pending()
+        embeddings.LRU.clear()
+        with mock.patch.object(embeddings, "_encode") as encode:
+            self.assertEqual(profiles.get_profile(self.job).embedding.ndim, 1)
+        encode.assert_not_called()
+
+
+class EmbeddingStoreNameTests(TestCase):
+    def setUp(self):
+        embeddings.LRU.clear()
+        self.addCleanup(embeddings.LRU.clear)
+        for patch in (mock.patch.object(embeddings, "_encoded_as", None),
+                      mock.patch.object(sidecar, "get_client", return_value=None)):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_vectors_are_stored_under_the_backend_that_encoded_them(self):
+        # EMBEDDING_BACKEND=onnx with int8, but the ONNX model failed to load.
+        with mock.patch.object(embeddings, "STORE_NAME", "all-MiniLM-L6-v2-int8"):
+            self.assertEqual(embeddings.store_name(), "all-MiniLM-L6-v2-int8")
+            embeddings.get_embedding("Python developer")
+            self.assertEqual(embeddings.store_name(), "all-MiniLM-L6-v2")
+        self.assertEqual(list(Embedding.objects.values_list("model_name", flat=True)), ["all-MiniLM-L6-v2"])
+        self.assertEqual(Embedding.objects.get().key, embeddings.content_key("Python developer", "all-MiniLM-L6-v2"))
@@ -0,0 +1,158 @@
+# transcription.py
+"""
+Opt-in parallel transcription for long candidate videos.
+
+The audio is decoded once to 16 kHz mono PCM, cut into segments of roughly
+TRANSCRIBE_SEGMENT_SECONDS at the quietest point near each target boundary,
+and the segments are recognised by a pool of processes that each hold their
+own Vosk model. Cuts that don't land on silence get TRANSCRIBE_OVERLAP_SECONDS
+of context on both sides; word timestamps are then used to keep every word
+exactly once when the segments are stitched back in order.
+
+Enabled by `transcribe_video` when TRANSCRIBE_WORKERS > 1.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import ffmpeg
+import numpy as np
+
+from .utils import SAMPLE_RATE, AUDIO_CHUNK_BYTES, get_vosk_model, preload_vosk_model
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", "0"))
+TRANSCRIBE_SEGMENT_SECONDS = float(os.getenv("TRANSCRIBE_SEGMENT_SECONDS", "120"))
+TRANSCRIBE_OVERLAP_SECONDS = float(os.getenv("TRANSCRIBE_OVERLAP_SECONDS", "2"))
+
+# Boundaries move by at most this much (and never more than a quarter of a
+# segment) to find a pause.
+SEARCH_SECONDS = 10.0
+FRAME_SECONDS = 0.1
+# A frame counts as silence below this fraction of the median frame energy.
+SILENCE_RATIO = 0.1
+
+_POOL = None
+_POOL_WORKERS = 0
+_POOL_LOCK = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _POOL, _POOL_WORKERS
+    with _POOL_LOCK:
+        if _POOL is None or _POOL_WORKERS != workers:
+            if _POOL is not None:
+                _POOL.shutdown(wait=False, cancel_futures=True)
+            # "spawn" so every worker loads its own model instead of sharing
+            # a forked copy of the parent's native Vosk state.
+            _POOL = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=preload_vosk_model,
+            )
+            _POOL_WORKERS = workers
+        return _POOL
+
+
+def _decode_pcm(file_path: str) -> bytes:
+    out, _ = (
+        ffmpeg.input(file_path)
+        .output("pipe:", format="s16le", acodec="pcm_s16le", ac=1, ar=SAMPLE_RATE)
+        .global_args("-nostdin", "-loglevel", "error")
+        .run(capture_stdout=True)
+    )
+    return out
+
+
+def plan_segments(samples: np.ndarray, segment_seconds: float, overlap_seconds: float):
+    """
+    Return [(start, end, keep_from, keep_to)] in seconds. Words are recognised
+    over [start, end) but only kept if they begin in [keep_from, keep_to).
+    """
+    duration = len(samples) / SAMPLE_RATE
+    frame = int(SAMPLE_RATE * FRAME_SECONDS)
+    n_frames = len(samples) // frame
+    frames = samples[: n_frames * frame].astype(np.float32).reshape(n_frames, frame)
+    energy = np.sqrt(np.mean(frames * frames, axis=1))
+    silence = SILENCE_RATIO * float(np.median(energy)) if n_frames else 0.0
+
+    search = min(SEARCH_SECONDS, segment_seconds / 4)
+    cuts = []
+    target = segment_seconds
+    while target < duration - segment_seconds / 2:
+        lo = max(int((target - search) / FRAME_SECONDS), 0)
+        hi = min(int((target + search) / FRAME_SECONDS), n_frames)
+        if hi > lo:
+            idx = lo + int(np.argmin(energy[lo:hi]))
+            cut, quiet = (idx + 0.5) * FRAME_SECONDS, energy[idx] <= silence
+        else:
+            cut, quiet = target, False
+        cuts.append((cut, quiet))
+        target = cut + segment_seconds
+
+    bounds = [(0.0, True)] + cuts + [(duration, True)]
+    segments = []
+    for (keep_from, quiet_before), (keep_to, quiet_after) in zip(bounds, bounds[1:]):
+        start = keep_from if quiet_before else max(keep_from - overlap_seconds, 0.0)
+        end = keep_to if quiet_after else min(keep_to + overlap_seconds, duration)
+        segments.append((start, end, keep_from, keep_to))
+    return segments
+
+
+def _transcribe_segment(pcm: bytes, offset: float):
+    """
+    Runs inside a pool worker; returns [(absolute_start_seconds, word)].
+    """
+    from vosk import KaldiRecognizer
+
+    rec = KaldiRecognizer(get_vosk_model(), SAMPLE_RATE)
+    rec.SetWords(True)
+    words = []
+    for i in range(0, len(pcm), AUDIO_CHUNK_BYTES):
+        if rec.AcceptWaveform(pcm[i:i + AUDIO_CHUNK_BYTES]):
+            words.extend(json.loads(rec.Result()).get("result", []))
+    words.extend(json.loads(rec.FinalResult()).get("result", []))
+    return [(offset + w["start"], w["word"]) for w in words]
+
+
+def transcribe_parallel(file_path: str, workers: int = None, segment_seconds: float = None,
+                        overlap_seconds: float = None):
+    """
+    Transcribe `file_path` across `workers` processes. Returns None when the
+    video is too short to be worth splitting or anything goes wrong, so the
+    caller can fall back to the sequential path.
+    """
+    workers = workers or TRANSCRIBE_WORKERS
+    segment_seconds = segment_seconds or TRANSCRIBE_SEGMENT_SECONDS
+    overlap_seconds = TRANSCRIBE_OVERLAP_SECONDS if overlap_seconds is None else overlap_seconds
+    try:
+        pcm = _decode_pcm(file_path)
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        if len(samples) < 2 * segment_seconds * SAMPLE_RATE:
+            return None
+
+        segments = plan_segments(samples, segment_seconds, overlap_seconds)
+        pool = _get_pool(workers)
+        futures = []
+        for start, end, _, _ in segments:
+            a, b = int(start * SAMPLE_RATE) * 2, int(end * SAMPLE_RATE) * 2
+            futures.append(pool.submit(_transcribe_segment, pcm[a:b], start))
+
+        words = []
+        for future, (_, _, keep_from, keep_to) in zip(futures, segments):
+            for t, w in future.result():
+                if not keep_from <= t < keep_to:
+                    continue
+                # The two sides of a cut can time the same word a few
+                # milliseconds apart; don't let it land on both.
+                if words and words[-1][1] == w and t - words[-1][0] < FRAME_SECONDS:
+                    continue
+                words.append((t, w))
+        return " ".join(w for _, w in words)
+    except Exception as e:
+        logger.exception("Parallel transcription failed for %s: %s", file_path, e)
+        return None
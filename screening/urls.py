@@ -4,6 +4,10 @@ from django.urls import path
 from .views import (
     JobCreateView, JobListView,
     CandidateCreateView, CandidateListView, CandidateDetailView, UploadPDFJobView, JobDetailAPIView,
+    ScoringJobDetailView, JobRescoreView, JobCandidatesView, JobStatsView,
+    JobImportView, CandidateImportDetailView,
+    JobTopCandidatesView, CandidateTopJobsView,
+    MCRASPredictView, MCRASMetricsView,
     home, job_create_page, candidate_create_page, dashboard_page, job_list
 )
 
@@ -11,12 +15,22 @@ api_patterns = [
     path('jobs/list/', job_list, name='job-list'),
     path("jobs/", JobListView.as_view(), name="api-jobs-list"),
     path("jobs/create/", JobCreateView.as_view(), name="api-jobs-create"),
+    path("jobs/stats/", JobStatsView.as_view(), name="api-jobs-stats"),
     path("candidates/create/", CandidateCreateView.as_view(), name="api-candidates-create"),
     path("candidates/", CandidateListView.as_view(), name="api-candidates-list"),
     path("candidates/<int:pk>/", CandidateDetailView.as_view(), name="api-candidate-detail"),
     path('jobs/create/', JobCreateView.as_view(), name='job_create'),
     path('jobs/upload_pdf/', UploadPDFJobView.as_view(), name='upload_pdf_job'),
     path('jobs/<int:pk>/', JobDetailAPIView.as_view(), name='api-jobs-detail'),
+    path("jobs/<int:pk>/rescore/", JobRescoreView.as_view(), name="api-jobs-rescore"),
+    path("jobs/<int:pk>/candidates/", JobCandidatesView.as_view(), name="api-jobs-candidates"),
+    path("jobs/<int:pk>/top-candidates/", JobTopCandidatesView.as_view(), name="api-jobs-top-candidates"),
+    path("candidates/<int:pk>/top-jobs/", CandidateTopJobsView.as_view(), name="api-candidate-top-jobs"),
+    path("jobs/<int:pk>/import/", JobImportView.as_view(), name="api-jobs-import"),
+    path("imports/<int:pk>/", CandidateImportDetailView.as_view(), name="api-import-detail"),
+    path("scoring-jobs/<int:pk>/", ScoringJobDetailView.as_view(), name="api-scoring-job-detail"),
+    path("mcras/predict/", MCRASPredictView.as_view(), name="api-mcras-predict"),
+    path("mcras/metrics/", MCRASMetricsView.as_view(), name="api-mcras-metrics"),
 ]
 
 ui_patterns = [
@@ -1,45 +1,36 @@
 # utils.py
-import io
 import os
 import json
-import wave
 import logging
+import importlib.util
 from typing import Tuple
-from collections import Counter
-import re
 
-import requests
 import ffmpeg
-import pdfplumber
-from docx import Document
-import nltk
-from nltk.corpus import stopwords
+
+from . import sidecar
+from .extraction import extract_text as extract_file_text
+from .gemini import GEMINI_API_KEY, get_client, response_text
+from .orchestrator import Stage, run_stages
+from .profiles import weighted_keywords
+from .scoring import tokenize_skills
+from .registry import VOSK_MODEL, get_model
+from .stopwords import ENGLISH_STOPWORDS
 
 logger = logging.getLogger(__name__)
 
-try:
-    STOPWORDS = set(stopwords.words("english"))
-except LookupError:
-    nltk.download('stopwords')
-    STOPWORDS = set(stopwords.words("english"))
+STOPWORDS = ENGLISH_STOPWORDS
 
 VOSK_MODEL_PATH = os.getenv("VOSK_MODEL_PATH", "models/vosk-model-small-en-us-0.15")
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
-
-def extract_important_keywords(jd_text, min_words=1, max_words=4, top_n=20):
-    tokens = re.split(r"[\n,;•\-]+", jd_text.lower())
-    keywords = []
-    for token in tokens:
-        token = token.strip()
-        words = token.split()
-        if min_words <= len(words) <= max_words and all(w not in STOPWORDS for w in words):
-            keywords.append(token)
-    freq = Counter(keywords)
-    return [kw for kw, _ in freq.most_common(top_n)]
-
-def keyword_boost_dynamic(resume_text, jd_text, weight=5):
-    jd_keywords = extract_important_keywords(jd_text)
+# Covers the Gemini client's own retries; past this the score falls back.
+GEMINI_STAGE_TIMEOUT = float(os.getenv("GEMINI_STAGE_TIMEOUT", "90"))
+LOCAL_STAGE_TIMEOUT = float(os.getenv("LOCAL_STAGE_TIMEOUT", "10"))
+
+def extract_important_keywords(jd_text, top_n=20):
+    # Same tokens as `tokenize_skills`; jobs store these precompiled in their profile.
+    return [kw for kw, _ in weighted_keywords(tokenize_skills(jd_text), top_n)]
+
+def keyword_boost_dynamic(resume_text, jd_text, weight=5, keywords=None):
+    jd_keywords = extract_important_keywords(jd_text) if keywords is None else keywords
     resume_lower = resume_text.lower()
     score = 0
     matched = []
@@ -52,55 +43,86 @@ def keyword_boost_dynamic(resume_text, jd_text, weight=5):
 def extract_text(file_field) -> str:
     if not file_field:
         return ""
-    try:
-        file_field.open()
-    except Exception:
-        pass
-    content = file_field.read()
-    if isinstance(content, str):
-        content = content.encode("utf-8", errors="ignore")
     name = getattr(file_field, "name", "").lower()
-    bio = io.BytesIO(content)
     try:
-        if name.endswith(".pdf"):
-            text_pages = []
-            with pdfplumber.open(bio) as pdf:
-                for p in pdf.pages:
-                    page_text = p.extract_text()
-                    if page_text:
-                        text_pages.append(page_text)
-            return "\n".join(text_pages)
-        elif name.endswith(".docx"):
-            doc = Document(bio)
-            return "\n".join([p.text for p in doc.paragraphs])
-        else:
-            return content.decode("utf8", errors="ignore")
+        return extract_file_text(file_field, name)
     except Exception as e:
         logger.exception("Error extracting text from %s: %s", name, e)
-        return content.decode("utf8", errors="ignore")
+        if name.endswith(".pdf"):
+            return ""
+    # Misnamed or broken non-PDF files: keep whatever text the bytes hold.
+    try:
+        file_field.open("rb")
+        file_field.seek(0)
+        content = file_field.read()
+    except Exception as e:
+        logger.warning("Could not re-read %s: %s", name, e)
+        return ""
+    if isinstance(content, str):
+        return content
+    return content.decode("utf8", errors="ignore")
 
-try:
-    from vosk import Model, KaldiRecognizer
-    VOSK_AVAILABLE = True
-except Exception:
-    VOSK_AVAILABLE = False
+# Only check that Vosk is installed; its native library loads on first use.
+VOSK_AVAILABLE = importlib.util.find_spec("vosk") is not None
 
-def transcribe_video(file_path: str) -> str:
+SAMPLE_RATE = 16000
+# 2 s of 16-bit mono PCM per AcceptWaveform call.
+AUDIO_CHUNK_BYTES = SAMPLE_RATE * 2 * 2
+
+def get_vosk_model():
+    """
+    Process-wide Vosk model; loading takes seconds and hundreds of MB, so
+    it happens once per worker instead of once per video.
+    """
+    return get_model(VOSK_MODEL)
+
+
+def preload_vosk_model():
+    """
+    Warm-up hook for worker boot; a no-op when Vosk isn't installed.
+    """
+    if VOSK_AVAILABLE and os.path.exists(VOSK_MODEL_PATH):
+        get_vosk_model()
+
+
+def transcribe_video(file_path: str, workers: int = None) -> str:
+    client = sidecar.get_client() if file_path else None
+    if client is not None:
+        try:
+            return client.transcribe(file_path)
+        except sidecar.SidecarUnavailable:
+            pass
+        except sidecar.SidecarTimeout as e:
+            logger.warning("Sidecar transcription of %s timed out: %s", file_path, e)
+            return ""
+        except sidecar.SidecarError as e:
+            # e.g. a `run_sidecar --no-transcribe` sidecar; Vosk may still be here.
+            logger.warning("Sidecar transcription of %s failed, transcribing in-process: %s", file_path, e)
     if not file_path or not VOSK_AVAILABLE or not os.path.exists(VOSK_MODEL_PATH):
         return ""
-    wav_path = f"{file_path}.wav"
+    from .transcription import TRANSCRIBE_WORKERS, transcribe_parallel
+    workers = TRANSCRIBE_WORKERS if workers is None else workers
+    if workers > 1:
+        text = transcribe_parallel(file_path, workers=workers)
+        if text is not None:
+            return text
     try:
-        ffmpeg.input(file_path).output(wav_path, ac=1, ar=16000).overwrite_output().run(quiet=True)
+        # Decode straight to 16 kHz mono PCM on stdout; no intermediate WAV.
+        proc = (
+            ffmpeg.input(file_path)
+            .output("pipe:", format="s16le", acodec="pcm_s16le", ac=1, ar=SAMPLE_RATE)
+            .global_args("-nostdin", "-loglevel", "error")
+            .run_async(pipe_stdout=True)
+        )
     except Exception as e:
         logger.exception("ffmpeg extraction failed: %s", e)
         return ""
     try:
-        wf = wave.open(wav_path, "rb")
-        model = Model(VOSK_MODEL_PATH)
-        rec = KaldiRecognizer(model, wf.getframerate())
+        from vosk import KaldiRecognizer
+        rec = KaldiRecognizer(get_vosk_model(), SAMPLE_RATE)
         text_chunks = []
         while True:
-            data = wf.readframes(4000)
+            data = proc.stdout.read(AUDIO_CHUNK_BYTES)
             if not data:
                 break
             if rec.AcceptWaveform(data):
@@ -108,37 +130,23 @@ def transcribe_video(file_path: str) -> str:
                 text_chunks.append(result.get("text", ""))
         final_result = json.loads(rec.FinalResult())
         text_chunks.append(final_result.get("text", ""))
+        if proc.wait() != 0:
+            logger.warning("ffmpeg exited with %s for %s", proc.returncode, file_path)
         return " ".join([t for t in text_chunks if t])
     except Exception as e:
         logger.exception("Vosk transcription error: %s", e)
         return ""
     finally:
-        try:
-            wf.close()
-        except Exception:
-            pass
-        try:
-            os.remove(wav_path)
-        except Exception:
-            pass
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
 
-def analyze_resume_with_gemini(jd_text: str, resume_text: str, api_key: str = None) -> dict:
+def gemini_analysis(jd_text: str, resume_text: str, api_key: str = None) -> dict:
     api_key = api_key or GEMINI_API_KEY
-    jd_text = jd_text or ""
-    resume_text = resume_text or ""
-    def hard_skill_score(resume, jd):
-        rw, jw = set(resume.lower().split()), set(jd.lower().split())
-        return round(len(rw & jw) / max(len(jw), 1) * 100, 2)
-    def semantic_score(resume, jd):
-        return round(min(len(resume), len(jd)) / max(len(jd), 1) * 100, 2)
-    def final_local(resume, jd):
-        return round(0.5 * hard_skill_score(resume, jd) + 0.5 * semantic_score(resume, jd), 2)
-
     gemini_result = {"match_score": None, "missing_skills": [], "feedback": ""}
     if api_key:
         try:
-            api_url = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent"
-            headers = {"Content-Type": "application/json", "x-goog-api-key": api_key}
             prompt = f"""
             You are an AI recruiter. Analyze the resume vs the job description.
             Return ONLY valid JSON with keys:
@@ -152,16 +160,8 @@ def analyze_resume_with_gemini(jd_text: str, resume_text: str, api_key: str = No
             Resume:
             {resume_text}
             """
-            payload = {"contents": [{"parts": [{"text": prompt}]}]}
-            resp = requests.post(api_url, headers=headers, json=payload, timeout=30)
-            resp.raise_for_status()
-            data = resp.json()
-            text_output = (
-                data.get("candidates", [{}])[0]
-                .get("content", {})
-                .get("parts", [{}])[0]
-                .get("text", "")
-            )
+            data = get_client(api_key).generate(prompt)
+            text_output = response_text(data)
             if text_output.startswith("```"):
                 text_output = text_output.strip("`").replace("json\n", "").replace("json", "")
             try:
@@ -173,10 +173,32 @@ def analyze_resume_with_gemini(jd_text: str, resume_text: str, api_key: str = No
             gemini_result["feedback"] = f"Gemini API error: {e}"
     else:
         gemini_result["feedback"] = "No Gemini API key provided; used fallback scoring."
+    return gemini_result
 
-    local = final_local(resume_text, jd_text)
+def analyze_resume_with_gemini(jd_text: str, resume_text: str, api_key: str = None, keywords=None) -> dict:
+    jd_text = jd_text or ""
+    resume_text = resume_text or ""
+    def hard_skill_score(resume, jd):
+        rw, jw = set(resume.lower().split()), set(jd.lower().split())
+        return round(len(rw & jw) / max(len(jw), 1) * 100, 2)
+    def semantic_score(resume, jd):
+        return round(min(len(resume), len(jd)) / max(len(jd), 1) * 100, 2)
+    def final_local(resume, jd):
+        return round(0.5 * hard_skill_score(resume, jd) + 0.5 * semantic_score(resume, jd), 2)
+
+    # The Gemini round trip dominates; the local scores run alongside it.
+    degraded = []
+    results = run_stages([
+        Stage("gemini", gemini_analysis, (jd_text, resume_text, api_key), GEMINI_STAGE_TIMEOUT,
+              {"match_score": None, "missing_skills": [], "feedback": "Gemini analysis unavailable; used fallback scoring."}),
+        Stage("local", final_local, (resume_text, jd_text), LOCAL_STAGE_TIMEOUT, 0),
+        Stage("keywords", keyword_boost_dynamic, (resume_text, jd_text, 5, keywords), LOCAL_STAGE_TIMEOUT, (0, [])),
+    ], degraded)
+    gemini_result = results["gemini"]
+
+    local = results["local"]
     gemini = gemini_result.get("match_score") or 0
-    boost, matched_keywords = keyword_boost_dynamic(resume_text, jd_text)
+    boost, matched_keywords = results["keywords"]
     final_match = round(0.4 * local + 0.4 * gemini + 0.2 * boost, 2)
 
     return {
@@ -186,6 +208,6 @@ def analyze_resume_with_gemini(jd_text: str, resume_text: str, api_key: str = No
         "keyword_boost": boost,
         "matched_keywords": matched_keywords,
         "missing_skills": gemini_result.get("missing_skills", []),
-        "feedback": gemini_result.get("feedback", "")
+        "feedback": gemini_result.get("feedback", ""),
+        "degraded_stages": degraded,
     }
-
@@ -0,0 +1,556 @@
+# vector_index.py
+"""
+Approximate nearest-neighbour search over JD and resume embeddings.
+
+Two indexes, "jobs" (`JobDescription.raw_text`) and "candidates"
+(`Candidate.parsed_text`), hold one L2-normalised vector per row, so a dot
+product is the cosine similarity `semantic_score` is built on. Saves and
+deletes only queue an `IndexJob` (see signals.py); the scoring worker
+embeds the queued rows in batches (`index_pending`), so no request waits
+on the sentence model.
+
+Search is IVF: at compaction the vectors are clustered into ~sqrt(n)
+k-means lists and stored sorted by list, and a query only reads the
+VECTOR_INDEX_NPROBE lists whose centroids are closest. Indexes smaller
+than VECTOR_INDEX_IVF_MIN_SIZE are scanned in full, which is exact.
+
+On disk each index is a directory:
+
+* `CURRENT`: the live generation number;
+* `<generation>/*.npy`: the snapshot, memory-mapped read-only, so every
+  gunicorn worker shares one copy through the page cache;
+* `<generation>/journal.log`: fixed-size upsert/delete records appended
+  since the snapshot.
+
+Before searching, each process replays journal records it hasn't seen
+yet, so writes from any worker are visible everywhere within one query.
+Journal entries are scanned in full, so the scoring worker folds them
+into a new snapshot (`compact`) once there are VECTOR_INDEX_MAX_JOURNAL of
+them; `manage.py vector_index` compacts or rebuilds on demand.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import struct
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows dev servers run a single process.
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+JOBS = "jobs"
+CANDIDATES = "candidates"
+
+OP_UPSERT = 1
+OP_DELETE = 2
+JOURNAL_MAGIC = b"MCVI"
+_HEADER = struct.Struct("<4si")    # magic, dim
+_RECORD = struct.Struct("<bq32s")  # op, document id, sha256 of the text
+
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE = 20000
+REBUILD_BATCH = 256
+
+
+def index_dir() -> str:
+    return str(getattr(settings, "VECTOR_INDEX_DIR", os.path.join(settings.BASE_DIR, "cache", "vectors")))
+
+
+def nprobe() -> int:
+    return int(getattr(settings, "VECTOR_INDEX_NPROBE", 8))
+
+
+def ivf_min_size() -> int:
+    return int(getattr(settings, "VECTOR_INDEX_IVF_MIN_SIZE", 20000))
+
+
+def max_journal() -> int:
+    return int(getattr(settings, "VECTOR_INDEX_MAX_JOURNAL", 5000))
+
+
+def index_batch() -> int:
+    return int(getattr(settings, "VECTOR_INDEX_BATCH", 64))
+
+
+def text_digest(text: str) -> bytes:
+    return hashlib.sha256((text or "").encode("utf-8")).digest()
+
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def train_centroids(vectors, nlist: int, seed: int = 0):
+    """
+    Spherical k-means on (a sample of) `vectors`; returns (nlist, dim).
+    """
+    rng = np.random.default_rng(seed)
+    if len(vectors) > KMEANS_SAMPLE:
+        vectors = vectors[rng.choice(len(vectors), KMEANS_SAMPLE, replace=False)]
+    centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        empty = ~np.bincount(assign, minlength=nlist).astype(bool)
+        # Re-seed empty lists with random points so none stay unused.
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+        centroids = normalize(sums)
+    return centroids
+
+
+def assign_lists(vectors, centroids, batch: int = 8192):
+    return np.concatenate([
+        np.argmax(vectors[i:i + batch] @ centroids.T, axis=1) for i in range(0, len(vectors), batch)
+    ]) if len(vectors) else np.zeros(0, dtype=np.int64)
+
+
+class VectorIndex:
+    def __init__(self, name: str, directory: str = None):
+        self.name = name
+        self.path = os.path.join(directory or index_dir(), name)
+        self._lock = threading.RLock()
+        self.generation = None
+        self._load(None)
+
+    # -- files -------------------------------------------------------------
+
+    def _gen_dir(self, generation):
+        return os.path.join(self.path, str(generation))
+
+    def _journal_path(self, generation=None):
+        return os.path.join(self._gen_dir(self.generation if generation is None else generation), "journal.log")
+
+    def _current_generation(self) -> int:
+        try:
+            with open(os.path.join(self.path, "CURRENT")) as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    @contextmanager
+    def _file_lock(self):
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, "lock"), "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    # -- in-memory state ---------------------------------------------------
+
+    def _load(self, generation):
+        """
+        Map the snapshot of `generation` (None or missing: empty index).
+        """
+        self.dim = None
+        self.base_ids = np.zeros(0, dtype=np.int64)
+        self.base_vectors = None
+        self.base_digests = np.zeros((0, 32), dtype=np.uint8)
+        self.centroids = None
+        self.offsets = None
+        gen_dir = self._gen_dir(generation) if generation is not None else None
+        if gen_dir and os.path.exists(os.path.join(gen_dir, "ids.npy")):
+            load = lambda name: np.load(os.path.join(gen_dir, f"{name}.npy"), mmap_mode="r")  # noqa: E731
+            self.base_ids = np.array(load("ids"))
+            self.base_vectors = load("vectors")
+            self.base_digests = load("digests")
+            self.dim = self.base_vectors.shape[1]
+            if os.path.exists(os.path.join(gen_dir, "centroids.npy")):
+                self.centroids = np.array(load("centroids"))
+                self.offsets = np.array(load("offsets"))
+        self.base_rows = dict(zip(self.base_ids.tolist(), range(len(self.base_ids))))
+        self.base_alive = np.ones(len(self.base_ids), dtype=bool)
+        # Journal entries: id -> (digest, vector), insertion ordered.
+        self.recent = {}
+        self._recent_cache = None
+        self.generation = generation
+        self._journal_offset = 0
+        self.journal_records = 0
+
+    def _apply(self, op, doc_id, digest, vector):
+        row = self.base_rows.get(doc_id)
+        if row is not None:
+            self.base_alive[row] = False
+        self.recent.pop(doc_id, None)
+        if op == OP_UPSERT:
+            self.recent[doc_id] = (digest, vector)
+        self._recent_cache = None
+        self.journal_records += 1
+
+    def _replay(self):
+        path = self._journal_path()
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        if size <= self._journal_offset:
+            return
+        with open(path, "rb") as f:
+            f.seek(self._journal_offset)
+            data = f.read(size - self._journal_offset)
+        pos = 0
+        if self._journal_offset == 0:
+            if len(data) < _HEADER.size:
+                return
+            magic, dim = _HEADER.unpack_from(data)
+            if magic != JOURNAL_MAGIC:
+                logger.error("Vector index %s: bad journal header in %s", self.name, path)
+                return
+            self.dim = self.dim or dim
+            pos = _HEADER.size
+        record_size = _RECORD.size + 4 * self.dim
+        # A record still being appended by another process is left for later.
+        while pos + record_size <= len(data):
+            op, doc_id, digest = _RECORD.unpack_from(data, pos)
+            vector = np.frombuffer(data, dtype=np.float32, count=self.dim, offset=pos + _RECORD.size)
+            self._apply(op, doc_id, digest, vector)
+            pos += record_size
+        self._journal_offset += pos
+
+    def refresh(self):
+        """
+        Pick up a newer snapshot and any journal records written since the
+        last call, from this or any other process.
+        """
+        with self._lock:
+            generation = self._current_generation()
+            if generation != self.generation:
+                self._load(generation)
+            self._replay()
+
+    # -- reads -------------------------------------------------------------
+
+    def __len__(self):
+        return int(self.base_alive.sum()) + len(self.recent)
+
+    def digest(self, doc_id):
+        if doc_id in self.recent:
+            return self.recent[doc_id][0]
+        row = self.base_rows.get(doc_id)
+        if row is not None and self.base_alive[row]:
+            return bytes(self.base_digests[row])
+        return None
+
+    def _recent_arrays(self):
+        if self._recent_cache is None:
+            ids = np.fromiter(self.recent.keys(), dtype=np.int64, count=len(self.recent))
+            vectors = (np.stack([v for _, v in self.recent.values()]) if self.recent
+                       else np.zeros((0, self.dim or 0), dtype=np.float32))
+            self._recent_cache = (ids, vectors)
+        return self._recent_cache
+
+    def _base_rows_to_scan(self, query):
+        n = len(self.base_ids)
+        if self.centroids is None or n < ivf_min_size():
+            return None
+        probe = min(nprobe(), len(self.centroids))
+        lists = np.argpartition(-(self.centroids @ query), probe - 1)[:probe]
+        return np.concatenate([np.arange(self.offsets[l], self.offsets[l + 1]) for l in np.sort(lists)])
+
+    def search(self, vector, k: int = 10, exclude=()):
+        """
+        [(id, cosine similarity)] of the `k` nearest documents, best first.
+        """
+        with self._lock:
+            self.refresh()
+            if self.dim is None:
+                return []
+            query = normalize(vector)
+            ids_parts, sims_parts = [], []
+            if len(self.base_ids):
+                rows = self._base_rows_to_scan(query)
+                if rows is None:
+                    sims = np.asarray(self.base_vectors @ query)
+                    ids, alive = self.base_ids, self.base_alive
+                else:
+                    sims = np.asarray(self.base_vectors[rows] @ query)
+                    ids, alive = self.base_ids[rows], self.base_alive[rows]
+                ids_parts.append(ids[alive])
+                sims_parts.append(sims[alive])
+            recent_ids, recent_vectors = self._recent_arrays()
+            if len(recent_ids):
+                ids_parts.append(recent_ids)
+                sims_parts.append(recent_vectors @ query)
+        if not ids_parts:
+            return []
+        ids = np.concatenate(ids_parts)
+        sims = np.concatenate(sims_parts)
+        if exclude:
+            keep = ~np.isin(ids, list(exclude))
+            ids, sims = ids[keep], sims[keep]
+        if len(ids) > k:
+            top = np.argpartition(-sims, k - 1)[:k]
+            ids, sims = ids[top], sims[top]
+        order = np.argsort(-sims, kind="stable")
+        return [(int(ids[i]), float(sims[i])) for i in order]
+
+    # -- writes ------------------------------------------------------------
+
+    def _append(self, records):
+        path = self._journal_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "ab") as f:
+            if f.tell() == 0:
+                f.write(_HEADER.pack(JOURNAL_MAGIC, self.dim))
+            f.write(b"".join(
+                _RECORD.pack(op, doc_id, digest) + np.asarray(vector, dtype=np.float32).tobytes()
+                for op, doc_id, digest, vector in records
+            ))
+
+    def upsert(self, doc_id: int, digest: bytes, vector) -> bool:
+        """
+        Index `vector` for `doc_id`; a no-op when `digest` (sha256 of the
+        text) is already indexed for it. Returns True when written.
+        """
+        return self.upsert_many([(doc_id, digest, vector)]) > 0
+
+    def upsert_many(self, items) -> int:
+        """
+        `upsert` for many (doc_id, digest, vector) in one journal write.
+        Returns the number written.
+        """
+        items = [(doc_id, digest, normalize(vector)) for doc_id, digest, vector in items]
+        with self._lock, self._file_lock():
+            self.refresh()
+            records = []
+            for doc_id, digest, vector in items:
+                if self.digest(doc_id) == digest:
+                    continue
+                if self.dim is None:
+                    self.dim = vector.shape[0]
+                if vector.shape[0] != self.dim:
+                    raise ValueError(f"Vector index {self.name} has dim {self.dim}, got {vector.shape[0]}")
+                records.append((OP_UPSERT, doc_id, digest, vector))
+            if records:
+                self._append(records)
+                self._replay()
+            return len(records)
+
+    def delete(self, doc_id: int) -> bool:
+        with self._lock, self._file_lock():
+            self.refresh()
+            if self.digest(doc_id) is None:
+                return False
+            self._append([(OP_DELETE, doc_id, b"\0" * 32, np.zeros(self.dim, dtype=np.float32))])
+            self._replay()
+            return True
+
+    def _write_snapshot(self, ids, vectors, digests):
+        generation = (self.generation or 0) + 1
+        gen_dir = self._gen_dir(generation)
+        tmp_dir = gen_dir + ".tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        arrays = {}
+        if len(ids) >= ivf_min_size():
+            nlist = int(min(max(np.sqrt(len(ids)), 16), 4096, len(ids)))
+            centroids = train_centroids(vectors, nlist)
+            lists = assign_lists(vectors, centroids)
+            order = np.argsort(lists, kind="stable")
+            ids, vectors, digests, lists = ids[order], vectors[order], digests[order], lists[order]
+            offsets = np.searchsorted(lists, np.arange(nlist + 1))
+            arrays.update(centroids=centroids, offsets=offsets)
+        arrays.update(ids=ids, vectors=vectors, digests=digests)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+        os.replace(tmp_dir, gen_dir)
+        current_tmp = os.path.join(self.path, "CURRENT.tmp")
+        with open(current_tmp, "w") as f:
+            f.write(str(generation))
+        os.replace(current_tmp, os.path.join(self.path, "CURRENT"))
+        for entry in os.listdir(self.path):
+            if entry.isdigit() and int(entry) < generation:
+                shutil.rmtree(os.path.join(self.path, entry), ignore_errors=True)
+        self._load(generation)
+
+    def compact(self):
+        """
+        Fold the journal into a new snapshot, re-clustering the lists.
+        """
+        with self._lock, self._file_lock():
+            self.refresh()
+            if self.dim is None:
+                return
+            alive = np.flatnonzero(self.base_alive)
+            recent_ids, recent_vectors = self._recent_arrays()
+            recent_digests = np.frombuffer(b"".join(d for d, _ in self.recent.values()),
+                                           dtype=np.uint8).reshape(-1, 32)
+            ids = np.concatenate([self.base_ids[alive], recent_ids])
+            vectors = (np.concatenate([np.asarray(self.base_vectors[alive]), recent_vectors])
+                       if self.base_vectors is not None else recent_vectors)
+            digests = np.concatenate([np.asarray(self.base_digests[alive]), recent_digests])
+            self._write_snapshot(ids, vectors.astype(np.float32), digests)
+
+    def replace_all(self, ids, vectors, digests):
+        """
+        Swap the whole index for the given rows (used by rebuilds).
+        """
+        with self._lock, self._file_lock():
+            self.refresh()
+            self._write_snapshot(np.asarray(ids, dtype=np.int64), normalize(vectors),
+                                 np.asarray(digests, dtype=np.uint8).reshape(-1, 32))
+
+    def stats(self) -> dict:
+        with self._lock:
+            self.refresh()
+            return {
+                "name": self.name,
+                "documents": len(self),
+                "snapshot": int(self.base_alive.sum()),
+                "journal_records": self.journal_records,
+                "lists": len(self.centroids) if self.centroids is not None else 0,
+                "dim": self.dim,
+                "generation": self.generation,
+            }
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(name: str) -> VectorIndex:
+    with _indexes_lock:
+        index = _indexes.get(name)
+        if index is None:
+            index = _indexes[name] = VectorIndex(name)
+        return index
+
+
+# -- document sources ------------------------------------------------------
+
+def _source(name):
+    from .models import Candidate, JobDescription
+    if name == JOBS:
+        return JobDescription.objects.all(), "raw_text"
+    return Candidate.objects.all(), "parsed_text"
+
+
+def index_document(name: str, doc_id: int, text: str) -> bool:
+    """
+    Bring one document's vector up to date (or drop it when its text is
+    empty). Returns True when the index changed.
+    """
+    index = get_index(name)
+    if not (text or "").strip():
+        return index.delete(doc_id)
+    digest = text_digest(text)
+    index.refresh()
+    if index.digest(doc_id) == digest:
+        return False
+    from .chunking import document_vectors
+    return index.upsert(doc_id, digest, document_vectors([text])[0])
+
+
+def index_documents(name: str, docs) -> int:
+    """
+    `index_document` for many (doc_id, text) pairs, embedding the changed
+    ones in one batch. Returns the number of documents written.
+    """
+    index = get_index(name)
+    index.refresh()
+    changed = []
+    for doc_id, text in docs:
+        if not (text or "").strip():
+            continue
+        digest = text_digest(text)
+        if index.digest(doc_id) != digest:
+            changed.append((doc_id, digest, text))
+    if not changed:
+        return 0
+    from .chunking import document_vectors
+    vectors = document_vectors([text for _, _, text in changed])
+    return index.upsert_many([(doc_id, digest, vector)
+                              for (doc_id, digest, _), vector in zip(changed, vectors)])
+
+
+def remove_document(name: str, doc_id: int) -> bool:
+    return get_index(name).delete(doc_id)
+
+
+def index_pending(limit: int = None) -> int:
+    """
+    Bring the oldest `limit` (VECTOR_INDEX_BATCH) queued documents up to
+    date from their current text, embedding the changed ones in one batch
+    per index. Returns the number of queue entries handled.
+    """
+    from .models import IndexJob
+    entries = list(IndexJob.objects.order_by("id").values_list("id", "index", "document_id")[:limit or index_batch()])
+    if not entries:
+        return 0
+    try:
+        for name in (JOBS, CANDIDATES):
+            doc_ids = sorted({doc_id for _, index, doc_id in entries if index == name})
+            if not doc_ids:
+                continue
+            queryset, field = _source(name)
+            texts = dict(queryset.filter(pk__in=doc_ids).values_list("pk", field))
+            index_documents(name, [(pk, texts[pk]) for pk in doc_ids if (texts.get(pk) or "").strip()])
+            for pk in doc_ids:
+                if not (texts.get(pk) or "").strip():
+                    remove_document(name, pk)
+    except Exception as e:
+        # The index is derived data; `manage.py vector_index --rebuild` repairs it.
+        logger.exception("Could not index %s queued documents: %s", len(entries), e)
+    IndexJob.objects.filter(id__in=[entry_id for entry_id, _, _ in entries]).delete()
+    return len(entries)
+
+
+def rebuild(name: str) -> int:
+    """
+    Re-index every row of `name` from the database.
+    """
+    from .chunking import document_vectors
+    queryset, field = _source(name)
+    ids, vectors, digests = [], [], []
+    rows = queryset.exclude(**{field: ""}).order_by("pk").values_list("pk", field)
+    batch = []
+    for row in rows.iterator(chunk_size=REBUILD_BATCH):
+        batch.append(row)
+        if len(batch) == REBUILD_BATCH:
+            _embed_batch(batch, document_vectors, ids, vectors, digests)
+            batch = []
+    if batch:
+        _embed_batch(batch, document_vectors, ids, vectors, digests)
+    if not ids:
+        shutil.rmtree(get_index(name).path, ignore_errors=True)
+        get_index(name)._load(None)
+        return 0
+    get_index(name).replace_all(ids, np.concatenate(vectors), [np.frombuffer(d, dtype=np.uint8) for d in digests])
+    return len(ids)
+
+
+def _embed_batch(batch, embed, ids, vectors, digests):
+    texts = [text for _, text in batch]
+    vectors.append(embed(texts))
+    ids.extend(pk for pk, _ in batch)
+    digests.extend(text_digest(text) for text in texts)
+
+
+def maybe_compact(names=(JOBS, CANDIDATES)):
+    """
+    Compact indexes whose journal has grown past VECTOR_INDEX_MAX_JOURNAL.
+    Called by the scoring worker when idle.
+    """
+    for name in names:
+        index = get_index(name)
+        try:
+            index.refresh()
+            if index.journal_records >= max_journal():
+                index.compact()
+                logger.info("Compacted vector index %s: %s", name, index.stats())
+        except Exception as e:
+            logger.warning("Could not compact vector index %s: %s", name, e)
@@ -2,13 +2,28 @@
 from rest_framework import generics
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.filters import OrderingFilter
+from django.conf import settings
 from django.shortcuts import render
-from django.db import transaction
+from django.db import transaction, IntegrityError
+from django.db.models import Avg, Count, Max, Min, Q
 import logging
+import queue
+import zipfile
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from . import serving
 from .scoring import verdict as score_verdict
-from .models import JobDescription, Candidate
-from .serializers import JobDescriptionSerializer, CandidateSerializer
-from .utils import extract_text, transcribe_video, analyze_resume_with_gemini
+from .models import JobDescription, Candidate, CandidateImport, ScoringJob
+from .serializers import (
+    JobDescriptionSerializer, CandidateSerializer, CandidateListSerializer, ScoringJobSerializer, RescoreSerializer,
+    CandidateImportSerializer,
+)
+from .pagination import CandidateCursorPagination, LeaderboardPagination
+from .rescoring import rescore_job
+from .tasks import enqueue_scoring
+from . import bulk_import, vector_index
+from .chunking import cosine_similarities, document_vectors
 from .scoring import tokenize_skills, hard_skill_score, semantic_score, final_score, verdict as score_verdict
 
 logger = logging.getLogger(__name__)
@@ -35,16 +50,16 @@ class JobCreateView(generics.CreateAPIView):
       
         jd_text = serializer.validated_data.get("raw_text", "")
         title = serializer.validated_data.get("title", "").strip() or "Untitled Job"
-        parsed = tokenize_skills(jd_text)
-        serializer.save(title=title, raw_text=jd_text, parsed_keywords=parsed)
+        # Skills and keywords are compiled in `JobDescription.save`; the JD is
+        # embedded by the scoring worker (`vector_index.index_pending`).
+        serializer.save(title=title, raw_text=jd_text)
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.core.files.storage import default_storage
 from .models import JobDescription
 from .serializers import JobDescriptionSerializer
-import PyPDF2
+from .extraction import extract_pdf_text
 
 class UploadPDFJobView(APIView):
     def post(self, request, *args, **kwargs):
@@ -53,20 +68,15 @@ class UploadPDFJobView(APIView):
             return Response({"error": "No file uploaded"}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            file_path = default_storage.save('tmp/' + pdf_file.name, pdf_file)
-            with default_storage.open(file_path, 'rb') as f:
-                reader = PyPDF2.PdfReader(f)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
-
-        
+            # Read straight from the upload; no copy under MEDIA_ROOT/tmp.
+            text = extract_pdf_text(pdf_file)
+
             lines = [line.strip() for line in text.split("\n") if line.strip()]
             title = lines[0][:255] if lines else "Untitled Job"
             raw_text = "\n".join(lines[1:]).strip() if len(lines) > 1 else text
             serializer = JobDescriptionSerializer(data={"title": title, "raw_text": raw_text})
             serializer.is_valid(raise_exception=True)
-            serializer.save(parsed_keywords=tokenize_skills(raw_text))
+            serializer.save()
 
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -76,7 +86,7 @@ class UploadPDFJobView(APIView):
 
 
 class JobListView(generics.ListAPIView):
-    queryset = JobDescription.objects.all().order_by("-created_at")
+    queryset = JobDescription.objects.annotate(candidate_count=Count("candidates")).order_by("-created_at")
     serializer_class = JobDescriptionSerializer
 
 
@@ -88,39 +98,30 @@ class CandidateCreateView(generics.CreateAPIView):
 
     @transaction.atomic
     def perform_create(self, serializer):
-        email = serializer.validated_data.get('email').strip().lower()
+        email = (serializer.validated_data.get('email') or "").strip().lower()
         applied_to = serializer.validated_data.get('applied_to')
-        candidate = Candidate.objects.filter(email=email, applied_to=applied_to).first()
-        if candidate:
+        candidate = None
+        if email:
+            candidate = Candidate.objects.select_for_update().filter(email=email, applied_to=applied_to).first()
+        if candidate is None:
+            try:
+                with transaction.atomic():
+                    candidate = serializer.save(verdict="Pending")
+                created = True
+            except IntegrityError:
+                # A concurrent upload for the same email and job won the insert.
+                candidate = Candidate.objects.select_for_update().get(email=email, applied_to=applied_to)
+        if candidate is not serializer.instance:
             for field, value in serializer.validated_data.items():
                 setattr(candidate, field, value)
+            candidate.score = None
+            candidate.verdict = "Pending"
+            candidate.save()
+            serializer.instance = candidate
             created = False
-        else:
-            candidate = serializer.save()
-            created = True
-        resume_text = extract_text(candidate.resume) or ""
-        candidate.parsed_text = resume_text
-        if candidate.video and getattr(candidate.video, "path", None):
-            try:
-                video_text = transcribe_video(candidate.video.path) or ""
-                resume_text += "\n" + video_text
-            except Exception as e:
-                logger.exception("Video transcription failed: %s", e)
-
-        analysis = analyze_resume_with_gemini(candidate.applied_to.raw_text, resume_text)
-
-        candidate.final_score = analysis.get("final_score")
-        candidate.local_score = analysis.get("local_score")
-        candidate.gemini_score = analysis.get("gemini_score")
-        candidate.keyword_boost = analysis.get("keyword_boost")
-        candidate.matched_keywords = analysis.get("matched_keywords", [])
-        candidate.missing_skills = analysis.get("missing_skills", [])
-        candidate.feedback = analysis.get("feedback", "")
-        candidate.score = candidate.final_score
-        candidate.verdict = score_verdict(candidate.score)
-
-        candidate.save()
 
+        # Extraction, transcription and scoring run in `run_scoring_worker`.
+        self.job = enqueue_scoring(candidate)
         self.instance = candidate
         self.created = created
 
@@ -132,7 +133,9 @@ class CandidateCreateView(generics.CreateAPIView):
         headers = self.get_success_headers(serializer.data)
         response_data = serializer.data
         response_data['status'] = 'created' if self.created else 'updated'
-        return Response(response_data, status=status.HTTP_201_CREATED, headers=headers)
+        response_data['job_id'] = self.job.id
+        response_data['job_status_url'] = reverse('api-scoring-job-detail', args=[self.job.id], request=request)
+        return Response(response_data, status=status.HTTP_202_ACCEPTED, headers=headers)
 
 class JobDetailView(generics.RetrieveAPIView):
     queryset = JobDescription.objects.all()
@@ -141,15 +144,47 @@ class JobDetailView(generics.RetrieveAPIView):
 
 
 
+# Columns the list views never send; `parsed_text` is the whole resume.
+LIST_DEFERRED_FIELDS = (
+    "parsed_text", "applied_to__raw_text", "applied_to__parsed_keywords", "applied_to__profile",
+)
+
+
 class CandidateListView(generics.ListAPIView):
-    queryset = Candidate.objects.all().order_by("-created_at")
-    serializer_class = CandidateSerializer
+    queryset = Candidate.objects.select_related("applied_to").defer(*LIST_DEFERRED_FIELDS)
+    serializer_class = CandidateListSerializer
+    pagination_class = CandidateCursorPagination
+
+
+class JobCandidatesView(generics.ListAPIView):
+    """
+    Scored applicants for one job, best first by default. Unscored (pending
+    or failed) candidates are left out since they have no rank yet.
+    """
+    serializer_class = CandidateListSerializer
+    pagination_class = LeaderboardPagination
+    filter_backends = [OrderingFilter]
+    ordering_fields = ["score", "created_at"]
+    ordering = ["-score", "-id"]
+
+    def get_queryset(self):
+        job = generics.get_object_or_404(JobDescription, pk=self.kwargs["pk"])
+        return (
+            Candidate.objects.filter(applied_to=job, score__isnull=False)
+            .select_related("applied_to")
+            .defer(*LIST_DEFERRED_FIELDS)
+        )
 
 
 class CandidateDetailView(generics.RetrieveAPIView):
     queryset = Candidate.objects.all()
     serializer_class = CandidateSerializer
 
+
+class ScoringJobDetailView(generics.RetrieveAPIView):
+    queryset = ScoringJob.objects.select_related("candidate")
+    serializer_class = ScoringJobSerializer
+
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
@@ -164,3 +199,219 @@ class JobDetailAPIView(generics.RetrieveAPIView):
     queryset = JobDescription.objects.all()
     serializer_class = JobDescriptionSerializer
 
+
+STATS_BUCKET_WIDTH = 10
+STATS_VERDICTS = ("High", "Medium", "Low", "Pending", "Failed", "Unknown")
+
+
+class JobStatsView(APIView):
+    """
+    Per-job applicant counts, score histograms and verdict breakdowns,
+    computed by the database in one grouped query.
+    """
+    def get(self, request, *args, **kwargs):
+        buckets = list(range(0, 100, STATS_BUCKET_WIDTH))
+        aggregates = {
+            "applicants": Count("candidates"),
+            "scored": Count("candidates", filter=Q(candidates__score__isnull=False)),
+            "avg_score": Avg("candidates__score"),
+            "min_score": Min("candidates__score"),
+            "max_score": Max("candidates__score"),
+        }
+        for lo in buckets:
+            # The last bucket is closed so a perfect 100 is counted.
+            upper = Q(candidates__score__lt=lo + STATS_BUCKET_WIDTH) if lo + STATS_BUCKET_WIDTH < 100 else Q()
+            aggregates[f"bucket_{lo}"] = Count("candidates", filter=Q(candidates__score__gte=lo) & upper)
+        for name in STATS_VERDICTS:
+            aggregates[f"verdict_{name}"] = Count("candidates", filter=Q(candidates__verdict=name))
+
+        rows = JobDescription.objects.order_by("-created_at").values("id", "title").annotate(**aggregates)
+        jobs = []
+        for row in rows:
+            avg = row["avg_score"]
+            jobs.append({
+                "id": row["id"],
+                "title": row["title"],
+                "applicants": row["applicants"],
+                "scored": row["scored"],
+                "avg_score": round(avg, 2) if avg is not None else None,
+                "min_score": row["min_score"],
+                "max_score": row["max_score"],
+                "histogram": [
+                    {"min": lo, "max": lo + STATS_BUCKET_WIDTH, "count": row[f"bucket_{lo}"]} for lo in buckets
+                ],
+                "verdicts": {name: row[f"verdict_{name}"] for name in STATS_VERDICTS},
+            })
+        return Response({"bucket_width": STATS_BUCKET_WIDTH, "jobs": jobs})
+
+
+class JobRescoreView(APIView):
+    def post(self, request, pk, *args, **kwargs):
+        job = generics.get_object_or_404(JobDescription, pk=pk)
+        params = RescoreSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        count = rescore_job(job, **params.validated_data)
+        return Response({"job": job.pk, "rescored": count}, status=status.HTTP_200_OK)
+
+
+class JobImportView(APIView):
+    """
+    Bulk upload for one job: `archive` is a ZIP of resumes, `manifest` an
+    optional CSV of names and emails (see `screening.bulk_import`). Only
+    the upload is stored here; `run_scoring_worker` runs the import and
+    `status_url` reports its progress.
+    """
+    def post(self, request, pk, *args, **kwargs):
+        job = generics.get_object_or_404(JobDescription, pk=pk)
+        archive = request.FILES.get("archive")
+        if not archive:
+            return Response({"error": "No archive uploaded"}, status=status.HTTP_400_BAD_REQUEST)
+        if not zipfile.is_zipfile(archive):
+            return Response({"error": "archive is not a ZIP file"}, status=status.HTTP_400_BAD_REQUEST)
+        manifest = request.FILES.get("manifest")
+        if manifest:
+            try:
+                bulk_import.read_manifest(manifest.read())
+            except bulk_import.ArchiveError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            manifest.seek(0)
+        record = CandidateImport.objects.create(job=job, archive=archive, manifest=manifest,
+                                                source_name=archive.name[:255])
+        data = CandidateImportSerializer(record).data
+        data["status_url"] = reverse("api-import-detail", args=[record.pk], request=request)
+        return Response(data, status=status.HTTP_202_ACCEPTED)
+
+
+class CandidateImportDetailView(generics.RetrieveAPIView):
+    queryset = CandidateImport.objects.all()
+    serializer_class = CandidateImportSerializer
+
+
+# Nearest-neighbour search: the index shortlists SIMILAR_SHORTLIST_FACTOR * k
+# documents (at least SIMILAR_SHORTLIST_MIN) and the exact semantic score of
+# their current text decides the final top `k`.
+SIMILAR_DEFAULT_K = 10
+SIMILAR_MAX_K = 100
+SIMILAR_SHORTLIST_FACTOR = 4
+SIMILAR_SHORTLIST_MIN = 50
+
+
+def _similar_k(request):
+    k = int(request.query_params.get("k", SIMILAR_DEFAULT_K))
+    if not 1 <= k <= SIMILAR_MAX_K:
+        raise ValueError(f"k must be between 1 and {SIMILAR_MAX_K}")
+    return k
+
+
+def _similar(index_name, text, queryset, field, k):
+    """
+    [(pk, semantic score)] of the `k` rows of `queryset` whose `field` is
+    closest to `text`, best first.
+    """
+    vector = document_vectors([text])[0]
+    shortlist = max(k * SIMILAR_SHORTLIST_FACTOR, SIMILAR_SHORTLIST_MIN)
+    hits = vector_index.get_index(index_name).search(vector, shortlist)
+    # Rows deleted or emptied since they were indexed drop out here.
+    texts = dict(queryset.filter(pk__in=[pk for pk, _ in hits]).exclude(**{field: ""}).values_list("pk", field))
+    if not texts:
+        return []
+    ids = list(texts)
+    sims = cosine_similarities(text, [texts[pk] for pk in ids])
+    scores = [(pk, round((float(sim) + 1) / 2 * 100, 2)) for pk, sim in zip(ids, sims)]
+    return sorted(scores, key=lambda row: -row[1])[:k]
+
+
+class JobTopCandidatesView(APIView):
+    """
+    The `k` resumes (across all jobs) semantically closest to this job.
+    """
+    def get(self, request, pk, *args, **kwargs):
+        job = generics.get_object_or_404(JobDescription.objects.only("id", "raw_text"), pk=pk)
+        try:
+            k = _similar_k(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        ranked = _similar(vector_index.CANDIDATES, job.raw_text, Candidate.objects.all(), "parsed_text", k) \
+            if job.raw_text else []
+        rows = Candidate.objects.select_related("applied_to").defer(*LIST_DEFERRED_FIELDS).in_bulk(
+            [pk for pk, _ in ranked])
+        results = []
+        for candidate_id, score in ranked:
+            row = CandidateListSerializer(rows[candidate_id], context={"request": request}).data
+            row["semantic_score"] = score
+            results.append(row)
+        return Response({"job": job.pk, "k": k, "results": results})
+
+
+class CandidateTopJobsView(APIView):
+    """
+    The `k` job descriptions semantically closest to this resume.
+    """
+    def get(self, request, pk, *args, **kwargs):
+        candidate = generics.get_object_or_404(Candidate.objects.only("id", "parsed_text"), pk=pk)
+        try:
+            k = _similar_k(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if not candidate.parsed_text:
+            return Response({"error": "Resume text has not been extracted yet"}, status=status.HTTP_409_CONFLICT)
+        ranked = _similar(vector_index.JOBS, candidate.parsed_text, JobDescription.objects.all(), "raw_text", k)
+        jobs = JobDescription.objects.only("id", "title", "created_at").in_bulk([pk for pk, _ in ranked])
+        results = [
+            {"id": job_id, "title": jobs[job_id].title, "created_at": jobs[job_id].created_at,
+             "semantic_score": score}
+            for job_id, score in ranked
+        ]
+        return Response({"candidate": candidate.pk, "k": k, "results": results})
+
+
+class MCRASPredictView(APIView):
+    """
+    Logits and predicted classes for `inputs`: one sample shaped
+    (num_channels, seq_len, input_size) or a list of them. Samples padded
+    to a common seq_len can pass their real `lengths`. Each sample goes
+    through the process-wide micro-batcher, so concurrent requests share
+    forward passes.
+    """
+    def post(self, request, *args, **kwargs):
+        inputs = request.data.get("inputs")
+        if inputs is None:
+            return Response({"error": "inputs is required"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            engine = serving.get_engine()
+            batcher = serving.get_batcher()
+        except FileNotFoundError as e:
+            return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        try:
+            batch = engine.as_batch(inputs)
+            lengths = request.data.get("lengths")
+            if lengths is not None:
+                lengths = engine.as_lengths(lengths, batch)
+        except (TypeError, ValueError, RuntimeError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        samples = list(batch) if lengths is None else [s[:, :n] for s, n in zip(batch, lengths.tolist())]
+
+        try:
+            futures = [batcher.submit(sample) for sample in samples]
+        except queue.Full:
+            return Response({"error": "MCRAS queue is full"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        timeout = getattr(settings, "MCRAS_PREDICT_TIMEOUT_SECONDS", 10)
+        try:
+            logits = [future.result(timeout) for future in futures]
+        except FutureTimeoutError:
+            for future in futures:
+                future.cancel()
+            return Response({"error": "MCRAS prediction timed out"}, status=status.HTTP_504_GATEWAY_TIMEOUT)
+        return Response({
+            "logits": [row.tolist() for row in logits],
+            "predictions": [int(row.argmax()) for row in logits],
+        })
+
+
+class MCRASMetricsView(APIView):
+    """
+    Batcher latency (p50/p99), throughput and batch sizes for this process,
+    plus the engine's size and accuracy report.
+    """
+    def get(self, request, *args, **kwargs):
+        return Response(serving.metrics())
@@ -0,0 +1,25 @@
+# worker.py
+"""
+Process-pool bootstrap for `manage.py run_scoring_worker`.
+
+Kept free of model imports: with the "spawn" start method this module is
+unpickled in a fresh interpreter before Django has been configured.
+"""
+import django
+
+
+def init_worker(stage: str):
+    # Each child sets Django up from scratch so it never shares the
+    # parent's database sockets.
+    django.setup()
+    from django.conf import settings
+    if getattr(settings, "SIDECAR_SOCKET", ""):
+        # The models live in the sidecar; load them here only on fallback.
+        return
+    if stage == "transcribe":
+        from .utils import preload_vosk_model
+        preload_vosk_model()
+    elif stage == "extract":
+        # Extraction warms the resume embedding of every candidate.
+        from .registry import SENTENCE_MODEL, preload
+        preload(SENTENCE_MODEL)
@@ -26,6 +26,7 @@ import streamlit as st
 from rapidfuzz import fuzz
 import requests
 
+from screening.orchestrator import Stage, run_stages
 from data_loader import (
     extract_text_from_upload,
     transcribe_video_upload,
@@ -50,18 +51,36 @@ GEMINI_API_KEY = get_secret("GEMINI_API_KEY")
 GEMINI_MODEL = get_secret("GEMINI_MODEL", "gemini-2.0-flash")
 
 # ---------------------------------------------------------------------
-# Optional: sentence-transformers (semantic similarity). Heavy dependency —
+# Optional: sentence embeddings (semantic similarity). Heavy dependency —
 # guarded so the app still works (with hard-skill + Gemini scoring only)
-# if it fails to load on a resource-constrained deploy.
+# if it fails to load on a resource-constrained deploy. Set
+# EMBEDDING_BACKEND=onnx (and EMBEDDING_ONNX_QUANTIZE=True) to run the
+# exported ONNX model instead of torch; see screening/embedding_backends.py.
+# With SIDECAR_SOCKET set the model is borrowed from `manage.py run_sidecar`
+# and only loaded here if the sidecar can't be reached.
 # ---------------------------------------------------------------------
 try:
-    from sentence_transformers import SentenceTransformer
     import numpy as np
-    SEMANTIC_MODEL = SentenceTransformer("all-MiniLM-L6-v2")
+    from screening.embedding_backends import load_backend
+    from screening.sidecar import SidecarClient, SidecarEncoder
+
+    def load_semantic_model():
+        return load_backend(
+            get_secret("EMBEDDING_BACKEND", "torch"),
+            onnx_dir=get_secret("EMBEDDING_ONNX_DIR"),
+            quantized=get_secret("EMBEDDING_ONNX_QUANTIZE", "False") == "True",
+        )
+
+    SIDECAR_SOCKET = get_secret("SIDECAR_SOCKET")
+    SEMANTIC_MODEL = (SidecarEncoder(SidecarClient(SIDECAR_SOCKET), load_semantic_model) if SIDECAR_SOCKET
+                      else load_semantic_model())
     SEMANTIC_AVAILABLE = True
 except Exception as e:
     logger.warning("sentence-transformers unavailable, semantic scoring disabled: %s", e)
     SEMANTIC_AVAILABLE = False
+
+
+def hard_skill_score(jd_skills, resume_text: str):
     resume = (resume_text or "").lower()
     missing, present = [], []
     if not jd_skills:
@@ -122,9 +141,16 @@ def verdict(score: float):
 
 def analyze(jd_text: str, resume_text: str):
     jd_skills = tokenize_skills(jd_text)
-    hard, missing = hard_skill_score(jd_skills, resume_text)
-    semantic = semantic_score(jd_text, resume_text)
-    gemini = gemini_score(jd_text, resume_text)
+    # Gemini waits on the network while the encode runs; neither needs the other.
+    results = run_stages([
+        Stage("hard", hard_skill_score, (jd_skills, resume_text), 20, (50.0, [])),
+        Stage("semantic", semantic_score, (jd_text, resume_text), 30, 50.0),
+        Stage("gemini", gemini_score, (jd_text, resume_text), 45,
+              {"match_score": None, "missing_skills": [], "feedback": "Gemini timed out; scored without it."}),
+    ])
+    hard, missing = results["hard"]
+    semantic = results["semantic"]
+    gemini = results["gemini"]
     gemini_val = gemini.get("match_score") or 0
     final = round(0.4 * hard + 0.4 * gemini_val + 0.2 * semantic, 2)
     return {
@@ -0,0 +1,66 @@
+"""
+Train MCRAS on a memory-mapped dataset (see mcras/data_loader.py).
+
+    python train.py --data data/train --val-data data/val --epochs 50 \
+        --batch-size 32 --accumulation-steps 4 --checkpoint checkpoints/mcras.pt
+
+Re-running with --resume continues from the last completed epoch in
+--checkpoint. The checkpoint loads straight into mcras.inference.
+"""
+import argparse
+import logging
+import os
+
+import torch
+
+from mcras.data_loader import MemmapDataset, make_loader
+from mcras.inference.checkpoint import load_checkpoint
+from mcras.models import MCRAS
+from mcras.train_utils import train
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", required=True, help="training dataset directory")
+    parser.add_argument("--val-data", help="validation dataset directory")
+    parser.add_argument("--epochs", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--accumulation-steps", type=int, default=1)
+    parser.add_argument("--lr", type=float, default=0.001)
+    parser.add_argument("--grad-clip", type=float)
+    parser.add_argument("--hidden-size", type=int, default=64)
+    parser.add_argument("--rnn-type", choices=["LSTM", "GRU"], default="LSTM")
+    parser.add_argument("--workers", type=int, help="DataLoader worker processes")
+    parser.add_argument("--checkpoint", default="checkpoints/mcras.pt")
+    parser.add_argument("--resume", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--threads", type=int, default=torch.get_num_threads())
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    torch.set_num_threads(args.threads)
+    torch.manual_seed(args.seed)
+
+    train_set = MemmapDataset(args.data)
+    meta = train_set.meta
+    if args.resume and os.path.exists(args.checkpoint):
+        # Rebuild with the checkpoint's sizes; weights are restored by train().
+        model, _ = load_checkpoint(args.checkpoint)
+    else:
+        model = MCRAS(meta["input_size"], args.hidden_size, meta["num_channels"], meta["num_classes"],
+                      args.rnn_type)
+
+    train_loader = make_loader(train_set, args.batch_size, shuffle=True, num_workers=args.workers, seed=args.seed)
+    val_loader = None
+    if args.val_data:
+        val_loader = make_loader(args.val_data, args.batch_size, shuffle=False, num_workers=args.workers)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.checkpoint)), exist_ok=True)
+    history = train(model, train_loader, val_loader, epochs=args.epochs, lr=args.lr,
+                    accumulation_steps=args.accumulation_steps, checkpoint_path=args.checkpoint,
+                    resume=args.resume, grad_clip=args.grad_clip)
+    if history:
+        print(history[-1])
+
+
+if __name__ == "__main__":
+    main()